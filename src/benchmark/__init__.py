@@ -0,0 +1,2 @@
+from .syntheticMap import generate_zones, write_map
+from .benchmarkSuite import run_benchmark, compare_reports
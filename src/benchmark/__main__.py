@@ -0,0 +1,7 @@
+# Execução da suite de benchmarks: python -m benchmark (a partir da pasta src)
+
+import sys
+
+from benchmark.benchmarkSuite import main
+
+sys.exit(main())
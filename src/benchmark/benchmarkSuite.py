@@ -0,0 +1,318 @@
+# benchmark/benchmarkSuite.py
+
+from map.mapGenerator import MapGenerator
+from search import BFS, DFS, UCS, GreedyBestFirstSearch, AStar
+from simulation import Simulation, SimulationWithLimits
+from benchmark.syntheticMap import write_map
+
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+# Suite de benchmarks: gera mapas sintéticos de vários tamanhos (syntheticMap), mede as procuras e
+# as duas simulações em cada um e escreve um relatório JSON. Cada caso é executado algumas vezes
+# sem medição (aquecimento) e depois repetido; são registados a mediana e o percentil 95 do tempo
+# e, numa execução à parte com tracemalloc, o pico de memória alocada.
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_ALGORITHMS = ["BFS", "DFS", "UCS", "Greedy", "AStar"]
+SIMULATION_TYPES = ["normal", "limits"]
+
+def create_algorithm(graph, compiled, algorithm_type):
+    """
+    Cria a instância de procura de um algoritmo.
+
+    :param graph: Grafo representando o mapa.
+    :param compiled: Grafo compilado (CSR).
+    :param algorithm_type: Nome do algoritmo.
+    :return: Instância do algoritmo.
+    """
+    algorithms = {
+        "BFS": BFS,
+        "DFS": DFS,
+        "UCS": UCS,
+        "Greedy": GreedyBestFirstSearch,
+        "AStar": AStar
+    }
+    if algorithm_type not in algorithms:
+        raise ValueError(f"Algoritmo inválido para o benchmark: {algorithm_type}.")
+    return algorithms[algorithm_type](graph, compiled=compiled)
+
+def summarize(times):
+    """
+    Resume os tempos das repetições de um caso.
+
+    :param times: Lista de tempos em segundos.
+    :return: Dicionário com a mediana, o percentil 95, o mínimo, o máximo e os tempos medidos.
+    """
+    values = np.array(times, dtype=np.float64)
+    return {
+        "median_s": float(np.median(values)),
+        "p95_s": float(np.percentile(values, 95)),
+        "min_s": float(values.min()),
+        "max_s": float(values.max()),
+        "runs_s": [float(value) for value in times]
+    }
+
+def measure(function, repeats=5, warmup=1):
+    """
+    Mede um caso: aquecimento, repetições cronometradas e uma execução com tracemalloc.
+
+    :param function: Função sem argumentos que executa o caso.
+    :param repeats: Número de repetições cronometradas.
+    :param warmup: Número de execuções de aquecimento (não medidas).
+    :return: Dicionário com o resumo dos tempos e o pico de memória (bytes).
+    """
+    for _ in range(warmup):
+        function()
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # O tracemalloc torna a execução mais lenta, por isso a memória é medida à parte
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = summarize(times)
+    result["peak_memory_bytes"] = peak
+    return result
+
+def prepare_map(size, seed, map_dir):
+    """
+    Gera (se ainda não existir) e carrega o mapa sintético de um tamanho.
+
+    :param size: Número de zonas.
+    :param seed: Seed do mapa e do estado das estradas.
+    :param map_dir: Pasta dos mapas gerados.
+    :return: Tuplo (MapGenerator com o mapa carregado e compilado, dicionário com a informação do mapa).
+    """
+    os.makedirs(map_dir, exist_ok=True)
+    path = os.path.join(map_dir, f"synthetic_{size}_{seed}.json")
+    info = {"zones": size, "path": path, "generate_s": None}
+
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        info.update(write_map(path, size, seed))
+        info["generate_s"] = time.perf_counter() - start
+
+    map_generator = MapGenerator(path, seed=seed)
+    start = time.perf_counter()
+    map_generator.load(use_cache=False)
+    info["load_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    map_generator.compile()
+    info["compile_s"] = time.perf_counter() - start
+
+    info["roads"] = map_generator.graph.number_of_edges()
+    info["file_bytes"] = os.path.getsize(path)
+    return map_generator, info
+
+def sample_pairs(graph, count, seed):
+    """
+    Escolhe pares (zona de suporte, zona normal) para as procuras.
+
+    :param graph: Grafo representando o mapa.
+    :param count: Número de pares.
+    :param seed: Seed da escolha.
+    :return: Lista de pares.
+    """
+    support_zones = [node for node, attrs in graph.nodes(data=True) if attrs.get('zone_type') == "support"]
+    normal_zones = [node for node, attrs in graph.nodes(data=True) if attrs.get('zone_type') == "normal"]
+    rng = random.Random(seed)
+    return [(rng.choice(support_zones), rng.choice(normal_zones)) for _ in range(count)]
+
+def search_case(graph, compiled, algorithm_type, pairs):
+    """
+    Cria o caso de benchmark de uma procura: todos os pares, com uma instância nova do algoritmo.
+    """
+    def run():
+        algorithm = create_algorithm(graph, compiled, algorithm_type)
+        for start, goal in pairs:
+            algorithm.search(start, goal)
+    return run
+
+def simulation_case(graph, compiled, algorithm_type, simulation_type):
+    """
+    Cria o caso de benchmark de uma simulação: inicialização das zonas e cálculo dos caminhos.
+    A escrita dos resultados em ficheiro não é medida; os avisos da simulação são descartados.
+    """
+    def run():
+        with redirect_stdout(io.StringIO()):
+            if simulation_type == "normal":
+                simulation = Simulation(graph, algorithm_type, compiled_graph=compiled)
+            else:
+                simulation = SimulationWithLimits(graph, algorithm_type, compiled_graph=compiled)
+            simulation.initialize_zones()
+            simulation.calculate_best_paths()
+    return run
+
+def environment():
+    """
+    Obtém a informação do ambiente de execução, guardada no relatório.
+    """
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__
+    }
+
+def run_benchmark(sizes=None, algorithms=None, simulations=None, repeats=5, warmup=1, pairs=10,
+                  seed=0, max_simulation_zones=10000, map_dir=os.path.join("results", "benchmark", "maps")):
+    """
+    Executa a suite de benchmarks.
+
+    :param sizes: Tamanhos dos mapas (número de zonas).
+    :param algorithms: Algoritmos de procura a medir.
+    :param simulations: Simulações a medir ("normal" e/ou "limits").
+    :param repeats: Número de repetições cronometradas de cada caso.
+    :param warmup: Número de execuções de aquecimento de cada caso.
+    :param pairs: Número de pares (zona de suporte, zona normal) por caso de procura.
+    :param seed: Seed dos mapas, do estado das estradas e dos pares.
+    :param max_simulation_zones: Tamanho máximo dos mapas em que as simulações são medidas.
+    :param map_dir: Pasta dos mapas gerados (reutilizados entre execuções).
+    :return: Relatório (dicionário serializável em JSON).
+    """
+    sizes = sizes or DEFAULT_SIZES
+    algorithms = algorithms or DEFAULT_ALGORITHMS
+    simulations = SIMULATION_TYPES if simulations is None else simulations
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {
+            "sizes": sizes,
+            "algorithms": algorithms,
+            "simulations": simulations,
+            "repeats": repeats,
+            "warmup": warmup,
+            "pairs": pairs,
+            "seed": seed,
+            "max_simulation_zones": max_simulation_zones
+        },
+        "maps": [],
+        "results": []
+    }
+
+    for size in sizes:
+        print(f"Mapa com {size} zonas...")
+        map_generator, info = prepare_map(size, seed, map_dir)
+        report["maps"].append(info)
+        graph, compiled = map_generator.graph, map_generator.compiled_graph
+        search_pairs = sample_pairs(graph, pairs, seed)
+
+        cases = [("search", algorithm_type, search_case(graph, compiled, algorithm_type, search_pairs))
+                 for algorithm_type in algorithms]
+        if size <= max_simulation_zones:
+            cases += [(f"simulation_{simulation_type}", algorithm_type,
+                       simulation_case(graph, compiled, algorithm_type, simulation_type))
+                      for simulation_type in simulations for algorithm_type in algorithms]
+
+        for case, algorithm_type, function in cases:
+            result = measure(function, repeats, warmup)
+            result.update({"case": case, "algorithm": algorithm_type, "zones": size})
+            report["results"].append(result)
+            print(f"  {case:<18} {algorithm_type:<8} mediana {result['median_s']:.4f} s, "
+                  f"p95 {result['p95_s']:.4f} s, pico {result['peak_memory_bytes'] / 2**20:.1f} MiB")
+
+    return report
+
+def compare_reports(baseline, report, threshold=0.10):
+    """
+    Compara um relatório com um relatório de referência.
+
+    :param baseline: Relatório de referência.
+    :param report: Relatório atual.
+    :param threshold: Aumento relativo da mediana a partir do qual um caso é considerado uma regressão.
+    :return: Lista de regressões (caso, algoritmo, zonas, medianas e razão).
+    """
+    reference = {
+        (result["case"], result["algorithm"], result["zones"]): result["median_s"]
+        for result in baseline.get("results", [])
+    }
+    regressions = []
+    for result in report["results"]:
+        key = (result["case"], result["algorithm"], result["zones"])
+        baseline_median = reference.get(key)
+        if not baseline_median:
+            continue
+        ratio = result["median_s"] / baseline_median
+        if ratio > 1 + threshold:
+            regressions.append({
+                "case": key[0], "algorithm": key[1], "zones": key[2],
+                "baseline_median_s": baseline_median, "median_s": result["median_s"], "ratio": ratio
+            })
+    return regressions
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de benchmarks com mapas sintéticos.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Tamanhos dos mapas (zonas).")
+    parser.add_argument("--algorithms", nargs="+", choices=DEFAULT_ALGORITHMS, default=DEFAULT_ALGORITHMS,
+                        metavar="ALGORITHM", help=f"Algoritmos a medir ({', '.join(DEFAULT_ALGORITHMS)}).")
+    parser.add_argument("--simulations", nargs="*", choices=SIMULATION_TYPES, default=SIMULATION_TYPES,
+                        help="Simulações a medir (nenhuma para medir só as procuras).")
+    parser.add_argument("--repeats", type=int, default=5, help="Repetições cronometradas de cada caso.")
+    parser.add_argument("--warmup", type=int, default=1, help="Execuções de aquecimento de cada caso.")
+    parser.add_argument("--pairs", type=int, default=10, help="Pares (suporte, normal) por caso de procura.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed dos mapas e dos pares.")
+    parser.add_argument("--max-simulation-zones", type=int, default=10000,
+                        help="Tamanho máximo dos mapas em que as simulações são medidas.")
+    parser.add_argument("--map-dir", default=os.path.join("results", "benchmark", "maps"), help="Pasta dos mapas gerados.")
+    parser.add_argument("--output", default=os.path.join("results", "benchmark", "report.json"), help="Relatório JSON.")
+    parser.add_argument("--baseline", default=None, help="Relatório de referência para detetar regressões.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Aumento relativo da mediana considerado uma regressão (com --baseline).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Executa a suite a partir da linha de comandos.
+
+    :return: Código de saída (1 se houver regressões em relação à referência).
+    """
+    args = parse_arguments(argv)
+    if args.repeats < 1:
+        print("Erro: o número de repetições tem de ser pelo menos 1.")
+        return 1
+
+    report = run_benchmark(args.sizes, args.algorithms, args.simulations, args.repeats, args.warmup,
+                           args.pairs, args.seed, args.max_simulation_zones, args.map_dir)
+
+    output_dir = os.path.dirname(args.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=4)
+    print(f"Relatório escrito em '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare_reports(json.load(file), report, args.threshold)
+        for regression in regressions:
+            print(f"Regressão: {regression['case']} {regression['algorithm']} ({regression['zones']} zonas): "
+                  f"{regression['baseline_median_s']:.4f} s -> {regression['median_s']:.4f} s "
+                  f"({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print("Sem regressões em relação à referência.")
+    return 0
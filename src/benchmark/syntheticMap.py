@@ -0,0 +1,188 @@
+# benchmark/syntheticMap.py
+
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+# Gerador de mapas sintéticos no formato de input/braga_zones.json, para testes de escala.
+#
+# As zonas ficam numa grelha com perturbação aleatória (cerca de 2 km entre zonas vizinhas) e as
+# estradas ligam zonas vizinhas na horizontal e na vertical, com algumas diagonais (no máximo uma
+# por célula). Com a perturbação limitada a um quarto do espaçamento, as células continuam
+# convexas e nenhuma estrada cruza outra: a rede é planar, como uma rede rodoviária. Parte das
+# estradas é removida, mas cada zona mantém sempre a ligação a uma zona anterior (de cima ou da
+# esquerda), pelo que o mapa é conexo. O mesmo (tamanho, seed) gera sempre o mesmo mapa.
+
+BASE_LATITUDE = 38.0
+BASE_LONGITUDE = -9.0
+SPACING = 0.02  # Espaçamento da grelha em graus de latitude (cerca de 2,2 km)
+JITTER = 0.25  # Perturbação máxima, em fração do espaçamento
+ROAD_PROBABILITY = 0.8  # Probabilidade de manter uma estrada horizontal/vertical
+DIAGONAL_PROBABILITY = 0.15  # Probabilidade de uma célula ter uma diagonal
+
+SUPPORT_VEHICLES = [
+    {"id": "truck", "type": "truck", "available": 25},
+    {"id": "car", "type": "car", "available": 20},
+    {"id": "helicopter", "type": "helicopter", "available": 15}
+]
+ACCESSIBILITY_OPTIONS = [
+    ["car", "truck", "helicopter"],
+    ["car", "helicopter"],
+    ["truck", "car"],
+    ["helicopter"]
+]
+
+def zone_id(position):
+    return f"Z{position}"
+
+def generate_roads(size, columns, rng):
+    """
+    Gera as estradas da grelha.
+
+    :param size: Número de zonas.
+    :param columns: Número de colunas da grelha.
+    :param rng: Gerador numpy.
+    :return: Tuplo (origens, destinos) com uma entrada por estrada não dirigida.
+    """
+    positions = np.arange(size, dtype=np.int64)
+    column = positions % columns
+
+    # Candidatas: à direita, abaixo e uma diagonal por célula
+    right = positions[(column + 1 < columns) & (positions + 1 < size)]
+    down = positions[positions + columns < size]
+    cells = positions[(column + 1 < columns) & (positions + columns + 1 < size)]
+
+    # Ligação obrigatória de cada zona a uma zona anterior (árvore de suporte: mapa conexo)
+    has_left = column > 0
+    has_up = positions >= columns
+    use_up = has_up & (~has_left | (rng.random(size) < 0.5))
+    forced_down = set((positions[use_up] - columns).tolist())
+    forced_right = set((positions[has_left & ~use_up] - 1).tolist())
+
+    keep_right = rng.random(len(right)) < ROAD_PROBABILITY
+    keep_right |= np.fromiter((node in forced_right for node in right.tolist()), dtype=bool, count=len(right))
+    keep_down = rng.random(len(down)) < ROAD_PROBABILITY
+    keep_down |= np.fromiter((node in forced_down for node in down.tolist()), dtype=bool, count=len(down))
+
+    diagonal_cells = cells[rng.random(len(cells)) < DIAGONAL_PROBABILITY]
+    falling = rng.random(len(diagonal_cells)) < 0.5  # "\" ou "/"
+
+    sources = np.concatenate([
+        right[keep_right],
+        down[keep_down],
+        np.where(falling, diagonal_cells, diagonal_cells + 1)
+    ])
+    targets = np.concatenate([
+        right[keep_right] + 1,
+        down[keep_down] + columns,
+        np.where(falling, diagonal_cells + columns + 1, diagonal_cells + columns)
+    ])
+    return sources, targets
+
+def generate_zones(size, seed=0):
+    """
+    Gera as zonas de um mapa sintético.
+
+    :param size: Número de zonas.
+    :param seed: Seed do gerador.
+    :return: Tuplo (gerador de zonas (dicionários), número de estradas).
+    """
+    if size < 2:
+        raise ValueError("O mapa sintético precisa de pelo menos 2 zonas.")
+
+    rng = np.random.default_rng(seed)
+    columns = math.ceil(math.sqrt(size))
+    positions = np.arange(size, dtype=np.int64)
+    rows, cols = positions // columns, positions % columns
+
+    latitudes = BASE_LATITUDE + (rows + rng.uniform(-JITTER, JITTER, size)) * SPACING
+    longitude_spacing = SPACING / np.cos(np.radians(latitudes))
+    longitudes = BASE_LONGITUDE + (cols + rng.uniform(-JITTER, JITTER, size)) * longitude_spacing
+
+    sources, targets = generate_roads(size, columns, rng)
+
+    # Listas de adjacência (nos dois sentidos, como em braga_zones.json)
+    endpoints = np.concatenate([sources, targets])
+    neighbors = np.concatenate([targets, sources])
+    order = np.argsort(endpoints, kind="stable")
+    neighbors = neighbors[order]
+    bounds = np.searchsorted(endpoints[order], np.arange(size + 1))
+
+    # Tipos de zona: uma zona de suporte por cada 2500 zonas, uma zona afetada (normal) por cada
+    # 50 e as restantes de passagem (supply)
+    zone_types = np.full(size, "supply", dtype=object)
+    shuffled = rng.permutation(size)
+    support_count = max(2, size // 2500)
+    normal_count = max(1, size // 50)
+    zone_types[shuffled[:support_count]] = "support"
+    zone_types[shuffled[support_count:support_count + normal_count]] = "normal"
+
+    populations = np.clip(rng.lognormal(7.5, 1.0, size), 50, 200000).astype(np.int64)
+    priorities = rng.integers(0, 6, size)
+    critical_hours = np.where(rng.random(size) < 0.3, rng.integers(1, 72, size), 0)
+    accessibility = rng.integers(0, len(ACCESSIBILITY_OPTIONS), size)
+
+    def zones():
+        for position in range(size):
+            zone_type = zone_types[position]
+            normal = zone_type == "normal"
+            hours = int(critical_hours[position]) if normal else 0
+            yield {
+                "id": zone_id(position),
+                "latitude": round(float(latitudes[position]), 6),
+                "longitude": round(float(longitudes[position]), 6),
+                "zone_type": zone_type,
+                "priority": int(priorities[position]) if normal else 0,
+                "population": int(populations[position]) if normal else 0,
+                "critical_time": f"2030-01-{1 + hours // 24:02d} {hours % 24:02d}:00:00" if hours else "0",
+                "vehicles": SUPPORT_VEHICLES if zone_type == "support" else None,
+                "accessibility": ACCESSIBILITY_OPTIONS[accessibility[position]],
+                "accessible_zones": [
+                    zone_id(neighbor) for neighbor in neighbors[bounds[position]:bounds[position + 1]].tolist()
+                ]
+            }
+
+    return zones(), len(sources)
+
+def write_map(path, size, seed=0):
+    """
+    Gera um mapa sintético e escreve-o zona a zona (array JSON, ou JSON Lines se o caminho
+    terminar em .jsonl).
+
+    :param path: Caminho do ficheiro.
+    :param size: Número de zonas.
+    :param seed: Seed do gerador.
+    :return: Dicionário com o número de zonas e de estradas.
+    """
+    zones, road_count = generate_zones(size, seed)
+    json_lines = path.endswith(".jsonl")
+
+    with open(path, "w", encoding="utf-8") as file:
+        if not json_lines:
+            file.write("[\n")
+        for position, zone in enumerate(zones):
+            if position and not json_lines:
+                file.write(",\n")
+            file.write(json.dumps(zone, ensure_ascii=False))
+            if json_lines:
+                file.write("\n")
+        if not json_lines:
+            file.write("\n]\n")
+
+    return {"zones": size, "roads": road_count}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera um mapa sintético no formato de braga_zones.json.")
+    parser.add_argument("size", type=int, help="Número de zonas.")
+    parser.add_argument("output", help="Ficheiro de saída (.json ou .jsonl).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed do gerador.")
+    args = parser.parse_args()
+    try:
+        info = write_map(args.output, args.size, args.seed)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    print(f"Mapa com {info['zones']} zonas e {info['roads']} estradas escrito em '{args.output}'.")
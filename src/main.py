@@ -1,26 +1,218 @@
 from map import MapGenerator
 from simulation import Simulation
 from simulation import SimulationWithLimits
+from simulation import run_monte_carlo, write_monte_carlo_report, print_monte_carlo_report
+from utils import Landmarks, landmarks_path, expansion_report
+from utils import ResultsReader
+from utils import tracer, span
 
+import argparse
+import os
 import sys
-import json
-import matplotlib.pyplot as plt
 import time
 
+# Algoritmos disponíveis nas simulações
+ALGORITHM_TYPES = [
+    "BFS",
+    "DFS",
+    "UCS",
+    "Greedy",
+    "AStar",
+    "IDDFS",
+    "BidirectionalUCS",
+    "BidirectionalAStar",
+    "DStarLite"
+]
+
+
+def parse_arguments(argv):
+    """
+    Lê os argumentos do modo não interativo (execução em lote).
+
+    :param argv: Lista de argumentos da linha de comandos (sem o nome do programa).
+    :return: Namespace com os argumentos.
+    """
+    parser = argparse.ArgumentParser(
+        description="Executa as simulações de distribuição de suprimentos sem menus interativos."
+    )
+    parser.add_argument("--map", required=True, help="Caminho para o ficheiro do mapa (JSON ou JSON Lines).")
+    parser.add_argument("--simulation", choices=["normal", "limits"], default="normal",
+                        help="Tipo de simulação: normal (Simulation) ou limits (SimulationWithLimits).")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHM_TYPES, default=ALGORITHM_TYPES,
+                        metavar="ALGORITHM", help=f"Algoritmos a executar ({', '.join(ALGORITHM_TYPES)}).")
+    parser.add_argument("--output-dir", default="results", help="Pasta base dos resultados.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed do estado das estradas (com seed, o mapa compilado é guardado em cache).")
+    parser.add_argument("--no-cache", action="store_true", help="Não usar a cache de mapas compilados.")
+    parser.add_argument("--alt", action="store_true", help="Usar a heurística ALT (landmarks) no A*.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de processos para planear as zonas normais em paralelo (apenas na simulação normal).")
+    parser.add_argument("--plot", action="store_true", help="Mostrar o grafo (importa o matplotlib).")
+    parser.add_argument("--stats", action="store_true",
+                        help="Recolher contadores das procuras (nós expandidos, arestas, fila, heurística).")
+    parser.add_argument("--trace", default=None, metavar="FICHEIRO",
+                        help="Traçar as etapas da execução e exportar o traçado (Chrome trace-event JSON, "
+                             "para o Perfetto ou chrome://tracing), com uma tabela resumo no fim.")
+    parser.add_argument("--memory", default=None, metavar="FICHEIRO",
+                        help="Perfil de memória (tracemalloc): pico e memória retida por algoritmo, procura e "
+                             "etapa, com os locais de alocação; o relatório JSON é escrito no ficheiro indicado.")
+    parser.add_argument("--memory-top", type=int, default=10,
+                        help="Número de locais de alocação mostrados por snapshot (com --memory).")
+    parser.add_argument("--multi-source", action="store_true",
+                        help="Planeamento multi-fonte na simulação normal (apenas UCS e AStar).")
+    parser.add_argument("--scenarios", type=int, default=None,
+                        help="Estudo Monte Carlo: simular o número indicado de cenários (tempo e estradas "
+                             "fechadas sorteados sobre a topologia do mapa) e agregar os resultados.")
+    parser.add_argument("--scenario-seed", type=int, default=None,
+                        help="Seed dos cenários do estudo Monte Carlo (por omissão, a seed do mapa ou 0).")
+    return parser.parse_args(argv)
+
+
+def memory_snapshot_spans(algorithms):
+    """
+    Obtém os spans em cujo fim o perfil de memória guarda os locais de alocação: a execução de
+    cada algoritmo e o cálculo dos caminhos das duas simulações.
+
+    :param algorithms: Algoritmos executados.
+    :return: Lista de nomes de spans.
+    """
+    return [f"run.{algorithm_type}" for algorithm_type in algorithms] + [
+        "Simulation.calculate_best_paths", "SimulationWithLimits.calculate_best_paths"
+    ]
+
+
+def print_performance(performance_results):
+    """
+    Mostra a tabela de performance: tempo de execução e, se recolhidos, os contadores das procuras.
+
+    :param performance_results: Lista de tuplos (algoritmo, tempo de execução, SearchStats ou None).
+    """
+    with_stats = any(stats is not None for _, _, stats in performance_results)
+    if not with_stats:
+        print(f"\n{'Algoritmo':<20} {'Tempo de Execução (s)':<20}")
+        print("=" * 40)
+        for algorithm, exec_time, _ in performance_results:
+            print(f"{algorithm:<20} {exec_time:<20.4f}")
+        return
+
+    header = (f"{'Algoritmo':<20} {'Tempo (s)':>10} {'Procuras':>9} {'Expandidos':>11} {'Arestas':>11} "
+              f"{'Inserções':>11} {'Remoções':>11} {'Desatual.':>10} {'Heurística':>11} {'Veículos (s)':>13}")
+    print(f"\n{header}")
+    print("=" * len(header))
+    for algorithm, exec_time, stats in performance_results:
+        if stats is None:
+            print(f"{algorithm:<20} {exec_time:>10.4f}")
+            continue
+        print(f"{algorithm:<20} {exec_time:>10.4f} {stats.searches:>9} {stats.nodes_expanded:>11} "
+              f"{stats.edges_relaxed:>11} {stats.heap_pushes:>11} {stats.heap_pops:>11} {stats.stale_pops:>10} "
+              f"{stats.heuristic_evaluations:>11} {stats.vehicle_time_s:>13.4f}")
+
+
+def run_batch(args):
+    """
+    Executa as simulações pedidas na linha de comandos, sem interação com o utilizador.
+
+    :param args: Namespace devolvido por parse_arguments.
+    :return: Código de saída (0 em caso de sucesso).
+    """
+    if args.multi_source and (args.simulation != "normal" or set(args.algorithms) - {"UCS", "AStar"}):
+        print("Erro: O planeamento multi-fonte só está disponível na simulação normal, com UCS e AStar.")
+        return 1
+
+    if args.trace or args.memory:
+        tracer.enable(memory=bool(args.memory), snapshot_spans=memory_snapshot_spans(args.algorithms),
+                      top_sites=args.memory_top)
+
+    map_generator = MapGenerator(json_path=args.map, seed=args.seed)
+    try:
+        map_generator.load(use_cache=not args.no_cache)
+    except FileNotFoundError:
+        print(f"Erro: Ficheiro JSON não encontrado em {args.map}")
+        return 1
+    except Exception as e:
+        print(f"Erro ao carregar o ficheiro JSON: {e}")
+        return 1
+
+    if args.plot:
+        map_generator.display_graph()
+
+    graph = map_generator.graph
+    compiled_graph = map_generator.compile()
+
+    if args.scenarios is not None:
+        scenario_seed = args.scenario_seed if args.scenario_seed is not None else (args.seed or 0)
+        for algorithm_type in args.algorithms:
+            try:
+                report = run_monte_carlo(graph, algorithm_type, args.scenarios, seed=scenario_seed,
+                                         simulation_type=args.simulation, multi_source=args.multi_source,
+                                         workers=args.workers)
+            except ValueError as e:
+                print(f"Erro: {e}")
+                return 1
+            print_monte_carlo_report(report)
+            print(f"\nRelatório escrito no ficheiro '{write_monte_carlo_report(report, args.output_dir)}'.")
+        finish_tracing(args)
+        return 0
+
+    landmarks = Landmarks.load_or_compute(graph, landmarks_path(args.map)) if args.alt else None
+
+    performance_results = []
+    for algorithm_type in args.algorithms:
+        start_time = time.time()
+        with span(f"run.{algorithm_type}", simulation=args.simulation):
+            if args.simulation == "normal":
+                simulation = Simulation(graph, algorithm_type, multi_source=args.multi_source, landmarks=landmarks,
+                                        compiled_graph=compiled_graph, output_dir=args.output_dir,
+                                        workers=args.workers, collect_stats=args.stats)
+                simulation.start()
+            else:
+                simulation = SimulationWithLimits(graph, algorithm_type, landmarks=landmarks,
+                                                  compiled_graph=compiled_graph, output_dir=args.output_dir,
+                                                  collect_stats=args.stats)
+                simulation.start_simulation()
+        performance_results.append((algorithm_type, time.time() - start_time, simulation.search_stats))
+
+    print_performance(performance_results)
+    finish_tracing(args)
+    return 0
+
+
+def finish_tracing(args):
+    """
+    Desliga o traçado pedido na linha de comandos, mostra o resumo e exporta os ficheiros.
+
+    :param args: Namespace devolvido por parse_arguments.
+    """
+    if not (args.trace or args.memory):
+        return
+    tracer.disable()
+    tracer.print_summary()
+    if args.trace:
+        tracer.export_chrome_trace(args.trace)
+        print(f"\nTraçado escrito no ficheiro '{args.trace}'.")
+    if args.memory:
+        tracer.export_memory_report(args.memory)
+        print(f"Relatório de memória escrito no ficheiro '{args.memory}'.")
+
 
 def main():
 
     # Obter o caminho do ficheiro JSON do mapa
     input_path = input("Insira o caminho para o ficheiro JSON do mapa: ").strip()
 
+    # Obter a seed do estado das estradas (com seed, o mapa compilado é guardado em cache)
+    seed_input = input("Insira a seed do mapa (Enter para aleatória): ").strip()
+    seed = int(seed_input) if seed_input else None
+
     # Inicializar o gerador de mapas
     print("Inicializando o gerador de mapas...")
-    map_generator = MapGenerator(json_path=input_path)
+    map_generator = MapGenerator(json_path=input_path, seed=seed)
 
     # Carregar as zonas e gerar o grafo
     print("Carregando zonas e gerando o grafo...")
     try:
-        map_generator.load_zones()
+        if map_generator.load():
+            print("Mapa carregado da cache.")
     except FileNotFoundError:
         print(f"Erro: Ficheiro JSON não encontrado em {input_path}")
         sys.exit(1)
@@ -34,8 +226,12 @@ def main():
     # Obter informações úteis para debug
     graph = map_generator.graph
 
+    # Compilar o grafo (CSR) para os kernels de procura
+    compiled_graph = map_generator.compile()
+
     # Inicializar a simulação padrão
     current_simulation = "Simulation"  # Padrão: Simulation
+    landmarks = None  # Landmarks da heurística ALT (opção 7)
     print("")
     option = -1
     while option != 0:
@@ -47,6 +243,8 @@ def main():
         print("4. Visualizar Resultados")
         print("5. Alterar Simulação (Atual: {})".format("Simulação Padrão" if current_simulation == "Simulation" else "Simulação com Limites"))
         print("6. Testes de Performance")
+        print("7. Heurística ALT para o A* (Atual: {})".format("Ativa" if landmarks else "Inativa"))
+        print("8. Estudo Monte Carlo (cenários de tempo e estradas fechadas)")
         print("0. Sair")
         option = int(input("Selecione uma opção: "))
         
@@ -74,6 +272,10 @@ def main():
                 print("3. UCS (Uniform Cost Search)")
                 print("4. Greedy Best-First Search")
                 print("5. A* (A-Star)")
+                print("6. IDDFS (Iterative Deepening DFS)")
+                print("7. UCS Bidirecional")
+                print("8. A* Bidirecional")
+                print("9. D* Lite (Incremental)")
                 print("0. Sair")
 
                 algorithm_choice = input("Digite o número correspondente ao algoritmo: ")
@@ -88,7 +290,11 @@ def main():
                         "2": "DFS",
                         "3": "UCS",
                         "4": "Greedy",
-                        "5": "AStar"
+                        "5": "AStar",
+                        "6": "IDDFS",
+                        "7": "BidirectionalUCS",
+                        "8": "BidirectionalAStar",
+                        "9": "DStarLite"
                     }
 
                     if algorithm_choice not in algorithm_types:
@@ -99,10 +305,10 @@ def main():
 
                         # Executar a simulação com base na escolha atual
                         if current_simulation == "Simulation":
-                            simulation = Simulation(graph, algorithm_type)
+                            simulation = Simulation(graph, algorithm_type, landmarks=landmarks, compiled_graph=compiled_graph)
                             simulation.start()
                         else:
-                            simulation = SimulationWithLimits(graph, algorithm_type)
+                            simulation = SimulationWithLimits(graph, algorithm_type, landmarks=landmarks, compiled_graph=compiled_graph)
                             simulation.start_simulation()
 
                 print("")
@@ -119,6 +325,10 @@ def main():
                 print("3. UCS (Uniform Cost Search)")
                 print("4. Greedy Best-First Search")
                 print("5. A* (A-Star)")
+                print("6. IDDFS (Iterative Deepening DFS)")
+                print("7. UCS Bidirecional")
+                print("8. A* Bidirecional")
+                print("9. D* Lite (Incremental)")
                 print("0. Sair")
 
                 algorithm_choice = input("Digite o número correspondente ao algoritmo: ")
@@ -132,7 +342,11 @@ def main():
                         "2": "dfs",
                         "3": "ucs",
                         "4": "greedy",
-                        "5": "astar"
+                        "5": "astar",
+                        "6": "iddfs",
+                        "7": "bidirectionalucs",
+                        "8": "bidirectionalastar",
+                        "9": "dstarlite"
                     }
 
                     if algorithm_choice not in algorithm_types:
@@ -142,46 +356,53 @@ def main():
                         algorithm_name = algorithm_types[algorithm_choice]
                         
                         results_folder = "results/normalSim" if current_simulation == "Simulation" else "results/limitSim"
-                        file_name = f"{results_folder}/results_{algorithm_name}.json"
+                        file_name = f"{results_folder}/results_{algorithm_name}.jsonl"
 
+                        # Os registos são lidos um a um pelo índice, sem carregar o ficheiro inteiro
                         try:
-                            with open(file_name, 'r', encoding='utf-8') as file:
-                                results = json.load(file)
+                            results = ResultsReader(file_name)
                         except FileNotFoundError:
                             print(f"Erro: O ficheiro '{file_name}' não foi encontrado.")
                             continue
 
-                        index = 0
-                        while True:
-                            result = results[index]
-                            print(f"\nVisualizando Resultado {index + 1}/{len(results)}")
-                            print(f"Start Node: {result['start_node']}")
-                            print(f"End Node: {result['end_node']}")
-                            print(f"Population: {result['population']}")
-                            print(f"Distance: {result['distance']} km")
-                            print(f"Best Path: {result['best_path']}")
-                            print(f"Vehicles: {result['vehicles']}")
-                            print(f"Critical Time: {result['critical_time']}")
-                            print(f"Final Arrival Time: {result['final_arrival_time']}")
-
-                            # Converter caminho do formato "A -> B -> C" para lista
-                            path = result['best_path'].split(" -> ")
-
-                            # Mostrar grafo com destaque no caminho
-                            map_generator.display_graph(path=path)
-
-                            # Navegação entre resultados
-                            print("\nControles: 'a' para Anterior, 'd' para Próximo, '0' para Sair.")
-                            control = input("Digite sua escolha: ").strip().lower()
-                            if control == "0":
-                                print("Saindo da visualização de resultados...")
-                                break
-                            elif control == "d":
-                                index = (index + 1) % len(results)
-                            elif control == "a":
-                                index = (index - 1 + len(results)) % len(results)
-                            else:
-                                print("Comando inválido.")
+                        with results:
+                            if len(results) == 0:
+                                print("Não há resultados para mostrar.")
+                                continue
+
+                            index = 0
+                            while True:
+                                result = results[index]
+                                print(f"\nVisualizando Resultado {index + 1}/{len(results)}")
+                                print(f"Start Node: {result['start_node']}")
+                                print(f"End Node: {result['end_node']}")
+                                print(f"Population: {result['population']}")
+                                print(f"Distance: {result['distance']} km")
+                                print(f"Best Path: {result['best_path']}")
+                                print(f"Vehicles: {result['vehicles']}")
+                                print(f"Critical Time: {result['critical_time']}")
+                                print(f"Final Arrival Time: {result['final_arrival_time']}")
+
+                                # Converter caminho do formato "A -> B -> C" para lista
+                                path = result['best_path'].split(" -> ")
+
+                                # Mostrar grafo com destaque no caminho
+                                map_generator.display_graph(path=path)
+
+                                # Navegação entre resultados
+                                print("\nControles: 'a' para Anterior, 'd' para Próximo, número para ir para um resultado, '0' para Sair.")
+                                control = input("Digite sua escolha: ").strip().lower()
+                                if control == "0":
+                                    print("Saindo da visualização de resultados...")
+                                    break
+                                elif control == "d":
+                                    index = (index + 1) % len(results)
+                                elif control == "a":
+                                    index = (index - 1 + len(results)) % len(results)
+                                elif control.isdigit() and 1 <= int(control) <= len(results):
+                                    index = int(control) - 1
+                                else:
+                                    print("Comando inválido.")
                     print("")
 
         elif option == 5:
@@ -192,43 +413,100 @@ def main():
             
         elif option == 6:
 
-            algorithm_types = [
-                "BFS",
-                "DFS",
-                "UCS",
-                "Greedy",
-                "AStar"
-            ]
-
             # Lista para guardar os resultados de performance
             performance_results = []
 
+            # O perfil de memória (tracemalloc) torna as execuções mais lentas
+            profile_memory = input("Ativar o perfil de memória (tracemalloc)? (s/N): ").strip().lower() == "s"
+            if profile_memory:
+                tracer.enable(memory=True, snapshot_spans=memory_snapshot_spans(ALGORITHM_TYPES))
+
             print("\nTestes de Performance:")
 
-            # Executar os testes e guardar os tempos
-            for algorithm_type in algorithm_types:
+            # Executar os testes e guardar os tempos e os contadores das procuras
+            for algorithm_type in ALGORITHM_TYPES:
                 start_time = time.time()
-                if current_simulation == "Simulation":
-                    simulation = Simulation(graph, algorithm_type)
-                    simulation.start()
-                else:
-                    simulation = SimulationWithLimits(graph, algorithm_type)
-                    simulation.start_simulation()
+                with span(f"run.{algorithm_type}"):
+                    if current_simulation == "Simulation":
+                        simulation = Simulation(graph, algorithm_type, landmarks=landmarks, compiled_graph=compiled_graph,
+                                                collect_stats=True)
+                        simulation.start()
+                    else:
+                        simulation = SimulationWithLimits(graph, algorithm_type, landmarks=landmarks, compiled_graph=compiled_graph,
+                                                          collect_stats=True)
+                        simulation.start_simulation()
                 end_time = time.time()
 
                 execution_time = end_time - start_time
-                performance_results.append((algorithm_type, execution_time))
+                performance_results.append((algorithm_type, execution_time, simulation.search_stats))
 
             # Exibir os resultados após o loop
-            print(f"\n{'Algoritmo':<20} {'Tempo de Execução (s)':<20}")
-            print("=" * 40)
-            for algorithm, exec_time in performance_results:
-                print(f"{algorithm:<20} {exec_time:<20.4f}")
+            print_performance(performance_results)
+
+            if profile_memory:
+                tracer.disable()
+                tracer.print_summary()
+                memory_report_path = os.path.join("results", f"memory_{current_simulation.lower()}.json")
+                tracer.export_memory_report(memory_report_path)
+                print(f"\nRelatório de memória escrito no ficheiro '{memory_report_path}'.")
+
+        elif option == 7:
+            # Ativar/desativar a heurística ALT (A*, landmarks e desigualdade triangular)
+            if landmarks:
+                landmarks = None
+                print("Heurística ALT desativada.")
+            else:
+                print("A carregar/calcular landmarks...")
+                landmarks = Landmarks.load_or_compute(graph, landmarks_path(input_path))
+                print(f"Landmarks: {', '.join(landmarks.landmarks)}")
+
+                # Relatório de nós expandidos (heurística geodésica vs ALT)
+                support_zones = map_generator.get_zones_by_type("support")
+                normal_zones = map_generator.get_zones_by_type("normal")
+                pairs = [(support_zone, normal_zone) for support_zone in support_zones for normal_zone in normal_zones]
+                report = expansion_report(graph, landmarks, pairs)
+
+                print(f"\n{'Heurística':<20} {'Nós Expandidos':<20}")
+                print("=" * 40)
+                print(f"{'Geodésica':<20} {report['geodesic_expanded']:<20}")
+                print(f"{'ALT':<20} {report['alt_expanded']:<20}")
+                print(f"Redução: {report['reduction_percent']}%")
+            print("")
 
+        elif option == 8:
+            # Estudo Monte Carlo da simulação atual sobre a topologia do mapa carregado
+            algorithm_type = input(f"Algoritmo ({', '.join(ALGORITHM_TYPES)}): ").strip()
+            if algorithm_type not in ALGORITHM_TYPES:
+                print("Algoritmo inválido.")
+                print("")
+                continue
+            try:
+                scenarios = int(input("Número de cenários: ").strip())
+                scenario_seed_input = input("Seed dos cenários (Enter para 0): ").strip()
+                scenario_seed = int(scenario_seed_input) if scenario_seed_input else 0
+            except ValueError:
+                print("Valor inválido.")
+                print("")
+                continue
+
+            simulation_type = "normal" if current_simulation == "Simulation" else "limits"
+            try:
+                report = run_monte_carlo(graph, algorithm_type, scenarios, seed=scenario_seed,
+                                         simulation_type=simulation_type)
+            except ValueError as e:
+                print(f"Erro: {e}")
+                print("")
+                continue
+            print_monte_carlo_report(report)
+            print(f"\nRelatório escrito no ficheiro '{write_monte_carlo_report(report)}'.")
+            print("")
 
         else:
             print("Opção inválida.")
             print("")
 
 if __name__ == "__main__":
+    # Com argumentos na linha de comandos, executa em lote; caso contrário, abre os menus
+    if len(sys.argv) > 1:
+        sys.exit(run_batch(parse_arguments(sys.argv[1:])))
     main()
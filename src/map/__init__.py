@@ -1 +1,3 @@
-from .mapGenerator import MapGenerator
\ No newline at end of file
+from .mapGenerator import MapGenerator
+from .compiledGraph import CompiledGraph
+from .edgeUpdates import graph_version, update_edge
\ No newline at end of file
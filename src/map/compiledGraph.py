@@ -0,0 +1,244 @@
+# map/compiledGraph.py
+
+from multiprocessing import shared_memory
+
+import copy
+import numpy as np
+
+# Códigos das condições meteorológicas guardadas no array de arestas
+WEATHER_CONDITIONS = ("Sol", "Chuva", "Nevoeiro", "Neve/Gelo")
+
+# Arrays do grafo compilado (pela ordem dos argumentos do construtor, a seguir aos nomes)
+ARRAY_FIELDS = ("offsets", "targets", "weights", "closed", "weather", "latitudes", "longitudes", "edge_ids")
+
+class CompiledGraph:
+    def __init__(self, names, offsets, targets, weights, closed, weather, latitudes, longitudes, edge_ids):
+        """
+        Grafo compilado em formato CSR (compressed sparse row) para os kernels de procura.
+
+        Os nós são identificados por inteiros (ordem alfabética dos nomes, para que os desempates
+        por id coincidam com os desempates por nome das procuras sobre o networkx). As arestas de
+        cada nó ocupam as posições offsets[i]:offsets[i + 1] dos arrays de arestas, pela mesma
+        ordem das adjacências do networkx.
+
+        :param names: Lista de nomes dos nós (id -> nome).
+        :param offsets: Array com o início das arestas de cada nó (tamanho n + 1).
+        :param targets: Array com o nó de destino de cada aresta.
+        :param weights: Array com a distância de cada aresta.
+        :param closed: Array booleano com o estado (fechada) de cada aresta.
+        :param weather: Array com o código da condição meteorológica de cada aresta.
+        :param latitudes: Array com a latitude de cada nó.
+        :param longitudes: Array com a longitude de cada nó.
+        :param edge_ids: Array com o id da aresta não dirigida de cada posição.
+        """
+        self.names = list(names)
+        self.index = {name: node_id for node_id, name in enumerate(self.names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.closed = closed
+        self.weather = weather
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.edge_ids = edge_ids
+        self.version = 0  # Incrementada a cada alteração das arestas (update_edge)
+        self._adjacency = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Compila um grafo networkx.
+
+        :param graph: Grafo networkx gerado pelo MapGenerator.
+        :return: Instância de CompiledGraph.
+        """
+        names = sorted(graph.nodes, key=str)
+        index = {name: node_id for node_id, name in enumerate(names)}
+        weather_codes = {condition: code for code, condition in enumerate(WEATHER_CONDITIONS)}
+
+        # Id de cada aresta não dirigida, pela ordem de graph.edges
+        undirected_ids = {}
+        for edge_id, (u, v) in enumerate(graph.edges()):
+            undirected_ids[(u, v)] = edge_id
+            undirected_ids[(v, u)] = edge_id
+
+        offsets = np.zeros(len(names) + 1, dtype=np.int64)
+        targets, weights, closed, weather, edge_ids = [], [], [], [], []
+        for node_id, name in enumerate(names):
+            for neighbor, edge_data in graph.adj[name].items():
+                targets.append(index[neighbor])
+                weights.append(edge_data.get('weight', 1))
+                closed.append(edge_data.get('closed', False))
+                weather.append(weather_codes.get(edge_data.get('weather', "Sol"), 0))
+                edge_ids.append(undirected_ids[(name, neighbor)])
+            offsets[node_id + 1] = len(targets)
+
+        return cls(
+            names,
+            offsets,
+            np.array(targets, dtype=np.int64),
+            np.array(weights, dtype=np.float64),
+            np.array(closed, dtype=bool),
+            np.array(weather, dtype=np.int8),
+            np.array([graph.nodes[name]['latitude'] for name in names], dtype=np.float64),
+            np.array([graph.nodes[name]['longitude'] for name in names], dtype=np.float64),
+            np.array(edge_ids, dtype=np.int64)
+        )
+
+    def to_shared_memory(self, extra_arrays=None):
+        """
+        Copia os arrays do grafo para um bloco de memória partilhada, para que outros processos
+        os possam usar sem cópias nem serialização.
+
+        :param extra_arrays: Dicionário {nome: array} de arrays adicionais a partilhar.
+        :return: Tuplo (bloco SharedMemory, descritor). O descritor (nome do bloco, nomes dos nós
+                 e posição de cada array) é o que é enviado aos outros processos. Quem cria o bloco
+                 deve fechá-lo e libertá-lo (close e unlink) no fim.
+        """
+        arrays = {field: np.ascontiguousarray(getattr(self, field)) for field in ARRAY_FIELDS}
+        arrays.update({name: np.ascontiguousarray(array) for name, array in (extra_arrays or {}).items()})
+
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            size = (size + 63) // 64 * 64  # Alinhar cada array a 64 bytes
+            layout[name] = (array.dtype.str, array.shape, size)
+            size += array.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            dtype, shape, offset = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = array
+
+        descriptor = {"name": block.name, "names": self.names, "layout": layout}
+        return block, descriptor
+
+    @classmethod
+    def from_shared_memory(cls, descriptor):
+        """
+        Liga-se a um grafo compilado em memória partilhada (só de leitura).
+
+        :param descriptor: Descritor devolvido por to_shared_memory.
+        :return: Tuplo (grafo compilado, bloco SharedMemory, arrays adicionais). O bloco deve ser
+                 mantido aberto enquanto o grafo for usado.
+        """
+        block = shared_memory.SharedMemory(name=descriptor["name"])
+        arrays = {}
+        for name, (dtype, shape, offset) in descriptor["layout"].items():
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[name] = array
+
+        compiled = cls(descriptor["names"], *(arrays.pop(field) for field in ARRAY_FIELDS))
+        return compiled, block, arrays
+
+    @property
+    def node_count(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.targets) // 2
+
+    def adjacency(self):
+        """
+        Obtém as listas Python dos arrays CSR usadas pelos kernels (o acesso elemento a elemento
+        a listas é bastante mais rápido do que a arrays NumPy em código Python).
+
+        :return: Tuplo (offsets, targets, weights, closed).
+        """
+        if self._adjacency is None:
+            self._adjacency = (
+                self.offsets.tolist(),
+                self.targets.tolist(),
+                self.weights.tolist(),
+                self.closed.tolist()
+            )
+        return self._adjacency
+
+    def edge_slots(self, source, target):
+        """
+        Obtém as posições CSR de uma aresta não dirigida (uma em cada sentido).
+
+        :param source: Id de um extremo.
+        :param target: Id do outro extremo.
+        :return: Lista de posições (vazia se a aresta não existir).
+        """
+        offsets, targets = self.offsets, self.targets
+        slots = [
+            slot for slot in range(int(offsets[source]), int(offsets[source + 1]))
+            if targets[slot] == target
+        ]
+        if source != target:
+            slots += [
+                slot for slot in range(int(offsets[target]), int(offsets[target + 1]))
+                if targets[slot] == source
+            ]
+        return slots
+
+    def update_edge(self, source, target, weight=None, closed=None, weather=None):
+        """
+        Altera os atributos de uma aresta (nos dois sentidos) e incrementa a versão do grafo.
+        Arrays só de leitura (cache mapeada em memória, memória partilhada) são copiados na
+        primeira alteração.
+
+        :param source: Id de um extremo.
+        :param target: Id do outro extremo.
+        :param weight: Nova distância ou None para manter.
+        :param closed: Novo estado (fechada) ou None para manter.
+        :param weather: Novo código da condição meteorológica ou None para manter.
+        """
+        slots = self.edge_slots(source, target)
+        if not slots:
+            raise ValueError(f"A aresta {self.names[source]} - {self.names[target]} não existe no grafo compilado.")
+
+        for field, value in (("weights", weight), ("closed", closed), ("weather", weather)):
+            if value is None:
+                continue
+            array = getattr(self, field)
+            if not array.flags.writeable:
+                array = array.copy()
+                setattr(self, field, array)
+            array[slots] = value
+
+        # Manter as listas dos kernels coerentes com os arrays
+        if self._adjacency is not None:
+            for slot in slots:
+                if weight is not None:
+                    self._adjacency[2][slot] = float(weight)
+                if closed is not None:
+                    self._adjacency[3][slot] = bool(closed)
+        self.version += 1
+
+    def with_edge_state(self, closed, weather):
+        """
+        Cria uma cópia do grafo com outro estado das estradas, partilhando a topologia (nós,
+        offsets, destinos e distâncias) e as listas correspondentes dos kernels.
+
+        :param closed: Array booleano com o estado (fechada) de cada posição CSR.
+        :param weather: Array com o código da condição meteorológica de cada posição CSR.
+        :return: Nova instância de CompiledGraph.
+        """
+        compiled = copy.copy(self)
+        compiled.closed = closed
+        compiled.weather = weather
+        compiled.version = self.version + 1
+        if self._adjacency is not None:
+            offsets, targets, weights, _ = self._adjacency
+            compiled._adjacency = (offsets, targets, weights, closed.tolist())
+        return compiled
+
+    def to_ids(self, path):
+        """
+        Converte um caminho de nomes num caminho de ids.
+        """
+        return [self.index[name] for name in path]
+
+    def to_names(self, path):
+        """
+        Converte um caminho de ids num caminho de nomes.
+        """
+        return [self.names[node_id] for node_id in path]
+
+    def __repr__(self):
+        return f"CompiledGraph(nodes={self.node_count}, edges={self.edge_count})"
@@ -0,0 +1,60 @@
+# map/edgeUpdates.py
+
+from map.compiledGraph import WEATHER_CONDITIONS
+
+# Alterações do estado das estradas. O grafo networkx guarda uma versão em graph.graph["version"],
+# incrementada sempre que os atributos de uma aresta (closed, weather, weight) mudam, para que
+# os resultados calculados sobre uma versão anterior (ex.: cache de rotas) sejam invalidados.
+# As alterações devem passar por update_edge, que mantém também o grafo compilado coerente.
+
+EDGE_ATTRIBUTES = ("weight", "closed", "weather")
+
+def graph_version(graph):
+    """
+    Obtém a versão atual das arestas de um grafo.
+
+    :param graph: Grafo networkx.
+    :return: Versão (0 para um grafo nunca alterado).
+    """
+    return graph.graph.get("version", 0)
+
+def bump_version(graph):
+    """
+    Incrementa a versão das arestas de um grafo.
+
+    :param graph: Grafo networkx.
+    :return: Nova versão.
+    """
+    graph.graph["version"] = graph_version(graph) + 1
+    return graph.graph["version"]
+
+def update_edge(graph, u, v, compiled=None, **attributes):
+    """
+    Altera os atributos de uma estrada e incrementa a versão do grafo.
+
+    :param graph: Grafo networkx.
+    :param u: Zona de um extremo da estrada.
+    :param v: Zona do outro extremo.
+    :param compiled: Grafo compilado do mesmo grafo, a manter coerente (opcional).
+    :param attributes: Novos valores de "weight", "closed" e/ou "weather".
+    :return: Nova versão do grafo.
+    """
+    unknown = set(attributes) - set(EDGE_ATTRIBUTES)
+    if unknown:
+        raise ValueError(f"Atributos de estrada desconhecidos: {', '.join(sorted(unknown))}.")
+    if not graph.has_edge(u, v):
+        raise ValueError(f"A estrada {u} - {v} não existe no mapa.")
+    if "weather" in attributes and attributes["weather"] not in WEATHER_CONDITIONS:
+        raise ValueError(f"Condição meteorológica desconhecida: {attributes['weather']}.")
+
+    graph.edges[u, v].update(attributes)
+
+    if compiled is not None:
+        compiled.update_edge(
+            compiled.index[u], compiled.index[v],
+            weight=attributes.get("weight"),
+            closed=attributes.get("closed"),
+            weather=WEATHER_CONDITIONS.index(attributes["weather"]) if "weather" in attributes else None
+        )
+
+    return bump_version(graph)
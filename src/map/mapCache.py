@@ -0,0 +1,237 @@
+# map/mapCache.py
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import networkx as nx
+import numpy as np
+
+from map.compiledGraph import CompiledGraph, WEATHER_CONDITIONS
+
+# Formato do ficheiro de cache de um mapa compilado:
+#   MAGIC (8 bytes) | tamanho do cabeçalho (uint64, little-endian) | cabeçalho JSON | arrays
+# O cabeçalho guarda a versão do formato, o hash do ficheiro JSON de origem, a seed e a posição
+# (dtype, forma, offset) de cada array. Os arrays ficam alinhados a 64 bytes e são lidos
+# diretamente do ficheiro mapeado em memória.
+MAGIC = b"DAMAPC\x00\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+def file_hash(path):
+    """
+    Calcula o hash SHA-256 do conteúdo de um ficheiro.
+
+    :param path: Caminho para o ficheiro.
+    :return: Hash hexadecimal.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_path(json_path, source_hash, seed, cache_dir=None):
+    """
+    Obtém o caminho do ficheiro de cache de um mapa (endereçado pelo conteúdo do JSON e pela seed).
+
+    :param json_path: Caminho para o ficheiro JSON do mapa.
+    :param source_hash: Hash do ficheiro JSON.
+    :param seed: Seed usada para gerar o estado das estradas.
+    :param cache_dir: Pasta da cache (por omissão, .mapcache ao lado do ficheiro JSON).
+    :return: Caminho para o ficheiro de cache.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(json_path)), ".mapcache")
+    return os.path.join(cache_dir, f"{source_hash}-{seed}.bin")
+
+def edge_insertion_order(compiled):
+    """
+    Obtém uma ordem de inserção das arestas que reproduz a ordem das adjacências de todos os nós
+    (a ordem das adjacências do networkx é a ordem pela qual as arestas de cada nó foram
+    inseridas). Uma aresta pode ser inserida quando é a próxima nas adjacências dos dois extremos.
+
+    :param compiled: Grafo compilado.
+    :return: Lista de posições (slots) CSR, uma por aresta não dirigida, pela ordem de inserção.
+    """
+    offsets = compiled.offsets.tolist()
+    edge_ids = compiled.edge_ids.tolist()
+    edge_count = max(edge_ids) + 1 if edge_ids else 0
+
+    # Extremos e primeira posição de cada aresta (um lacete ocupa uma única posição)
+    endpoints = [[] for _ in range(edge_count)]
+    first_slot = [None] * edge_count
+    for node in range(compiled.node_count):
+        for slot in range(offsets[node], offsets[node + 1]):
+            edge_id = edge_ids[slot]
+            endpoints[edge_id].append(node)
+            if first_slot[edge_id] is None:
+                first_slot[edge_id] = slot
+
+    heads = offsets[:-1]  # Próxima posição por inserir de cada nó
+    votes = [0] * edge_count
+    ready = []
+
+    def advance(node):
+        if heads[node] < offsets[node + 1]:
+            edge_id = edge_ids[heads[node]]
+            votes[edge_id] += 1
+            if votes[edge_id] == len(endpoints[edge_id]):
+                ready.append(edge_id)
+
+    for node in range(compiled.node_count):
+        advance(node)
+
+    order = []
+    while ready:
+        edge_id = ready.pop()
+        order.append(first_slot[edge_id])
+        for node in endpoints[edge_id]:
+            heads[node] += 1
+            advance(node)
+
+    if len(order) != edge_count:
+        raise ValueError("Não foi possível reconstruir a ordem das arestas do grafo.")
+    return order
+
+def save_map_cache(path, graph, compiled, source_hash, seed):
+    """
+    Guarda o mapa compilado (topologia CSR, distâncias, estado das estradas e atributos das zonas).
+
+    :param path: Caminho para o ficheiro de cache.
+    :param graph: Grafo networkx gerado pelo MapGenerator.
+    :param compiled: Grafo compilado do mesmo grafo.
+    :param source_hash: Hash do ficheiro JSON de origem.
+    :param seed: Seed usada para gerar o estado das estradas.
+    """
+    slot_owner = np.repeat(np.arange(compiled.node_count, dtype=np.int64), np.diff(compiled.offsets))
+    edge_slots = np.array(edge_insertion_order(compiled), dtype=np.int64)
+
+    # Atributos das zonas (não numéricos) pela ordem de inserção dos nós
+    zones = [
+        [
+            node, data.get('zone_type'), data.get('accessibility'), data.get('vehicles'),
+            data.get('critical_time'), data.get('population', 0), data.get('priority', 0)
+        ]
+        for node, data in graph.nodes(data=True)
+    ]
+
+    arrays = {
+        "offsets": compiled.offsets,
+        "targets": compiled.targets,
+        "weights": compiled.weights,
+        "closed": compiled.closed,
+        "weather": compiled.weather,
+        "latitudes": compiled.latitudes,
+        "longitudes": compiled.longitudes,
+        "edge_ids": compiled.edge_ids,
+        "node_order": np.array([compiled.index[node] for node in graph.nodes], dtype=np.int64),
+        "edge_sources": slot_owner[edge_slots],
+        "edge_slots": edge_slots,
+        "zones": np.frombuffer(json.dumps(zones, ensure_ascii=False).encode("utf-8"), dtype=np.uint8)
+    }
+
+    # Posições dos arrays no ficheiro (offsets relativos ao fim do cabeçalho)
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        position = (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        layout[name] = [array.dtype.str, list(array.shape), position]
+        position += array.nbytes
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "source_hash": source_hash,
+        "seed": seed,
+        "arrays": layout
+    }).encode("utf-8")
+    data_start = (len(MAGIC) + 8 + len(header) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    # Escrever num ficheiro temporário e renomear, para nunca deixar uma cache incompleta
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(header)))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name][2])
+            file.write(array.tobytes())
+    os.replace(temporary_path, path)
+
+def load_map_cache(path, source_hash, seed):
+    """
+    Carrega um mapa compilado da cache, mapeando o ficheiro em memória.
+
+    :param path: Caminho para o ficheiro de cache.
+    :param source_hash: Hash esperado do ficheiro JSON de origem.
+    :param seed: Seed esperada.
+    :return: Tuplo (grafo networkx, grafo compilado) ou None se a cache não existir ou for inválida.
+    """
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # Verificar o cabeçalho
+    if len(buffer) < len(MAGIC) + 8 or buffer[:len(MAGIC)] != MAGIC:
+        return None
+    header_size = struct.unpack("<Q", buffer[len(MAGIC):len(MAGIC) + 8])[0]
+    try:
+        header = json.loads(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_size].decode("utf-8"))
+    except ValueError:
+        return None
+    if header.get("version") != FORMAT_VERSION or header.get("source_hash") != source_hash or header.get("seed") != seed:
+        return None
+
+    data_start = (len(MAGIC) + 8 + header_size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    arrays = {}
+    for name, (dtype, shape, offset) in header["arrays"].items():
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=data_start + offset).reshape(shape)
+
+    zones = json.loads(arrays["zones"].tobytes().decode("utf-8"))
+    names = [None] * len(zones)
+    for node_id, zone in zip(arrays["node_order"].tolist(), zones):
+        names[node_id] = zone[0]
+
+    compiled = CompiledGraph(
+        names, arrays["offsets"], arrays["targets"], arrays["weights"], arrays["closed"],
+        arrays["weather"], arrays["latitudes"], arrays["longitudes"], arrays["edge_ids"]
+    )
+
+    # Reconstruir o grafo networkx pela ordem original dos nós e das arestas
+    latitudes, longitudes = compiled.latitudes.tolist(), compiled.longitudes.tolist()
+    graph = nx.Graph()
+    graph.add_nodes_from(
+        (name, {
+            "latitude": latitudes[node_id],
+            "longitude": longitudes[node_id],
+            "zone_type": zone_type,
+            "accessibility": accessibility,
+            "vehicles": vehicles,
+            "critical_time": critical_time,
+            "population": population,
+            "priority": priority
+        })
+        for node_id, (name, zone_type, accessibility, vehicles, critical_time, population, priority)
+        in zip(arrays["node_order"].tolist(), zones)
+    )
+
+    targets, weights = compiled.targets.tolist(), compiled.weights.tolist()
+    closed, weather = compiled.closed.tolist(), compiled.weather.tolist()
+    graph.add_edges_from(
+        (names[source], names[targets[slot]], {
+            "weight": weights[slot],
+            "closed": closed[slot],
+            "weather": WEATHER_CONDITIONS[weather[slot]]
+        })
+        for source, slot in zip(arrays["edge_sources"].tolist(), arrays["edge_slots"].tolist())
+    )
+
+    return graph, compiled
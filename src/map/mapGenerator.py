@@ -1,25 +1,45 @@
 # map/mapGenerator.py
 
-from geopy.distance import geodesic
+from itertools import accumulate
+from array import array
 
 import random
 import networkx as nx
-import json
-import matplotlib.pyplot as plt
+import numpy as np
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from map.compiledGraph import CompiledGraph
+from map.zoneReader import iter_zones
+from map.mapCache import file_hash, cache_path, load_map_cache, save_map_cache
+from map.edgeUpdates import update_edge, bump_version
+from utils.tracing import traced
+
+# Probabilidade de cada condição meteorológica numa estrada e de uma estrada estar fechada
+WEATHER_PROBABILITIES = {
+    "Sol": 0.7,
+    "Chuva": 0.15,
+    "Nevoeiro": 0.1,
+    "Neve/Gelo": 0.05
+}
+CLOSURE_PROBABILITY = 0.1
+
 class MapGenerator:
-    def __init__(self, json_path):
+    def __init__(self, json_path, seed=None, cache_dir=None):
         """
         Inicializa o gerador de mapas com o caminho para o ficheiro JSON das zonas.
 
         :param json_path: Caminho para o ficheiro JSON com os dados das zonas.
+        :param seed: Seed do estado das estradas (tempo e estradas fechadas); None para aleatório.
+        :param cache_dir: Pasta da cache de mapas compilados (por omissão, .mapcache ao lado do JSON).
         """
         self.json_path = json_path
+        self.seed = seed
+        self.cache_dir = cache_dir
         self.graph = nx.Graph()
+        self.compiled_graph = None
 
     @staticmethod
     def calculate_distance(coord1, coord2):
@@ -30,6 +50,7 @@ class MapGenerator:
         :param coord2: Tuplo com (latitude, longitude) do ponto 2.
         :return: Distância em quilómetros.
         """
+        from geopy.distance import geodesic  # Importado apenas quando é usado
         return geodesic(coord1, coord2).kilometers
     
     def print_graph(self):
@@ -44,60 +65,243 @@ class MapGenerator:
         for u, v, data in self.graph.edges(data=True):  # Usa self.graph.edges
             print(f"  ({u} -> {v}): {data}")
 
+    @staticmethod
+    def calculate_distances(latitudes1, longitudes1, latitudes2, longitudes2, max_iterations=200):
+        """
+        Calcula a distância geodésica (elipsoide WGS-84) entre vários pares de coordenadas de uma
+        só vez, com a fórmula inversa de Vincenty vetorizada. Os pares em que o método não converge
+        (pontos quase antípodas) são calculados individualmente com calculate_distance.
+
+        :param latitudes1: Array com as latitudes dos pontos de origem (graus).
+        :param longitudes1: Array com as longitudes dos pontos de origem (graus).
+        :param latitudes2: Array com as latitudes dos pontos de destino (graus).
+        :param longitudes2: Array com as longitudes dos pontos de destino (graus).
+        :param max_iterations: Número máximo de iterações.
+        :return: Array com as distâncias em quilómetros.
+        """
+        a = 6378.137  # Semieixo maior (km)
+        f = 1 / 298.257223563  # Achatamento
+        b = a * (1 - f)
+
+        latitudes1, longitudes1 = np.asarray(latitudes1, dtype=np.float64), np.asarray(longitudes1, dtype=np.float64)
+        latitudes2, longitudes2 = np.asarray(latitudes2, dtype=np.float64), np.asarray(longitudes2, dtype=np.float64)
+
+        delta_longitude = np.radians(longitudes2 - longitudes1)
+        reduced1 = np.arctan((1 - f) * np.tan(np.radians(latitudes1)))
+        reduced2 = np.arctan((1 - f) * np.tan(np.radians(latitudes2)))
+        sin_u1, cos_u1 = np.sin(reduced1), np.cos(reduced1)
+        sin_u2, cos_u2 = np.sin(reduced2), np.cos(reduced2)
+
+        lam = delta_longitude.copy()
+        converged = np.zeros(lam.shape, dtype=bool)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for _ in range(max_iterations):
+                sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+                sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+                cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+                sigma = np.arctan2(sin_sigma, cos_sigma)
+                sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+                cos2_alpha = 1 - sin_alpha ** 2
+                # Linhas equatoriais (cos2_alpha = 0): o termo é nulo
+                cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+                c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+                previous = lam
+                lam = delta_longitude + (1 - c) * f * sin_alpha * (
+                    sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+                )
+                converged = np.abs(lam - previous) < 1e-12
+                if converged.all():
+                    break
+
+            u2 = cos2_alpha * (a ** 2 - b ** 2) / b ** 2
+            big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+            big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+            delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+            ))
+            distances = b * big_a * (sigma - delta_sigma)
+
+        # Pontos coincidentes têm distância 0; os pares que não convergiram usam o geopy
+        distances = np.where(sin_sigma == 0, 0.0, distances)
+        for i in np.flatnonzero(~converged | ~np.isfinite(distances)):
+            distances[i] = MapGenerator.calculate_distance(
+                (latitudes1[i], longitudes1[i]), (latitudes2[i], longitudes2[i])
+            )
+        return distances
+
+    @traced()
     def load_zones(self):
         """
-        Carrega os dados das zonas a partir do ficheiro JSON, cria o grafo
-        e devolve as zonas de suporte.
+        Carrega os dados das zonas a partir do ficheiro (array JSON ou JSON Lines) e cria o grafo.
 
-        :return: Lista de zonas de suporte (IDs).
+        As zonas são lidas uma a uma e adicionadas ao grafo à medida que são lidas; as zonas
+        acessíveis ficam num buffer compacto de arestas pendentes (posição da zona de origem e
+        id da zona de destino), resolvido numa segunda passagem quando todas as zonas são
+        conhecidas. Cada estrada (não dirigida) é criada uma única vez, mesmo que apareça nas
+        zonas acessíveis das duas zonas, e as distâncias de todas as estradas são calculadas de
+        uma só vez. Ids repetidos e zonas acessíveis inexistentes são rejeitados antes de o grafo
+        ser alterado.
         """
-        with open(self.json_path, "r") as file:
-            zones_data = json.load(file)
+        # Gerador próprio, para não alterar o estado global do módulo random (sem seed, é aleatório)
+        generator = random.Random(self.seed)
 
-        # Adicionar nós e coordenadas ao grafo
-        for zone in zones_data:
-            self.graph.add_node(zone["id"], 
-                                latitude=zone["latitude"], 
-                                longitude=zone["longitude"], 
-                                zone_type=zone["zone_type"], 
-                                accessibility=zone["accessibility"], 
-                                vehicles=zone["vehicles"],
-                                critical_time=zone.get("critical_time"),
-                                population=zone.get("population", 0),
-                                priority=zone.get("priority", 0))
+        graph = nx.Graph()
+        zone_positions = {}  # id -> posição (ordem de leitura)
+        latitudes = array("d")
+        longitudes = array("d")
+        duplicated_ids = []
 
-        # Adicionar arestas com as distâncias e condições meteorológicas
-        weather_conditions = {
-            "Sol": 0.7,
-            "Chuva": 0.15,
-            "Nevoeiro": 0.1,
-            "Neve/Gelo": 0.05
-        }
+        # Arestas pendentes: posição da zona de origem e id da zona de destino
+        pending_sources = array("q")
+        pending_targets = []
+
+        # Primeira passagem: adicionar os nós à medida que as zonas são lidas
+        for zone in iter_zones(self.json_path):
+            if zone["id"] in zone_positions:
+                duplicated_ids.append(zone["id"])
+                continue
+            position = len(zone_positions)
+            zone_positions[zone["id"]] = position
+            latitudes.append(zone["latitude"])
+            longitudes.append(zone["longitude"])
+
+            graph.add_node(zone["id"], 
+                           latitude=zone["latitude"], 
+                           longitude=zone["longitude"], 
+                           zone_type=zone["zone_type"], 
+                           accessibility=zone["accessibility"], 
+                           vehicles=zone["vehicles"],
+                           critical_time=zone.get("critical_time"),
+                           population=zone.get("population", 0),
+                           priority=zone.get("priority", 0))
 
-        for zone in zones_data:
-            current_zone_id = zone["id"]
-            current_coords = (zone["latitude"], zone["longitude"])
             for accessible_zone_id in zone["accessible_zones"]:
-                # Encontrar a zona de destino
-                destination_zone = next(z for z in zones_data if z["id"] == accessible_zone_id)
-                destination_coords = (destination_zone["latitude"], destination_zone["longitude"])
-                # Calcular a distância
-                distance = self.calculate_distance(current_coords, destination_coords)
+                pending_sources.append(position)
+                pending_targets.append(accessible_zone_id)
+
+        if duplicated_ids:
+            raise ValueError(f"Zonas com id repetido: {', '.join(map(str, duplicated_ids))}")
+
+        # Segunda passagem: resolver os destinos das arestas pendentes
+        names = list(zone_positions)
+        dangling_references = [
+            f"{names[source]} -> {target}"
+            for source, target in zip(pending_sources, pending_targets)
+            if target not in zone_positions
+        ]
+        if dangling_references:
+            raise ValueError(f"Zonas acessíveis inexistentes: {', '.join(map(str, dangling_references))}")
+
+        pending_target_positions = array("q", (zone_positions[target] for target in pending_targets))
+        del pending_targets
+
+        # Estradas não dirigidas, pela ordem em que aparecem pela primeira vez
+        edge_sources = array("q")
+        edge_targets = array("q")
+        seen_edges = set()
+        for source, target in zip(pending_sources, pending_target_positions):
+            edge_key = (source, target) if source <= target else (target, source)
+            if edge_key not in seen_edges:
+                seen_edges.add(edge_key)
+                edge_sources.append(source)
+                edge_targets.append(target)
+        del seen_edges, pending_sources, pending_target_positions
+
+        # Calcular as distâncias de todas as estradas de uma só vez
+        latitudes = np.frombuffer(latitudes, dtype=np.float64)
+        longitudes = np.frombuffer(longitudes, dtype=np.float64)
+        sources = np.frombuffer(edge_sources, dtype=np.int64)
+        targets = np.frombuffer(edge_targets, dtype=np.int64)
+        distances = self.calculate_distances(
+            latitudes[sources], longitudes[sources], latitudes[targets], longitudes[targets]
+        ).tolist()
+
+        # Adicionar arestas com as distâncias e condições meteorológicas
+        weather_population = list(WEATHER_PROBABILITIES.keys())
+        weather_cumulative_weights = list(accumulate(WEATHER_PROBABILITIES.values()))
+
+        def edge_list():
+            for source, target, distance in zip(edge_sources, edge_targets, distances):
                 # Determinar o estado do tempo
-                weather = random.choices(
-                    population=list(weather_conditions.keys()),
-                    weights=list(weather_conditions.values()),
+                weather = generator.choices(
+                    population=weather_population,
+                    cum_weights=weather_cumulative_weights,
                     k=1
                 )[0]
-                # Adicionar aresta ao grafo
-                self.graph.add_edge(
-                    current_zone_id, 
-                    accessible_zone_id, 
-                    weight=distance, 
-                    closed=(random.random() < 0.1),  # chance da estrada estar fechada
-                    weather=weather
+                yield (
+                    names[source],
+                    names[target],
+                    {
+                        "weight": distance,
+                        "closed": generator.random() < CLOSURE_PROBABILITY,  # chance da estrada estar fechada
+                        "weather": weather
+                    }
                 )
 
+        # Adicionar as arestas ao grafo
+        graph.add_edges_from(edge_list())
+
+        if self.graph.number_of_nodes() == 0:
+            self.graph = graph
+        else:
+            self.graph.update(graph)
+            bump_version(self.graph)  # Estradas existentes podem ter mudado de estado
+        self.compiled_graph = None
+
+    @traced()
+    def load(self, use_cache=True):
+        """
+        Carrega o mapa, usando a cache de mapas compilados quando há uma seed definida.
+
+        A cache é endereçada pelo hash do ficheiro JSON e pela seed: se o ficheiro mudar, a cache
+        deixa de corresponder e o mapa é gerado de novo com load_zones e guardado. Sem seed o
+        estado das estradas é aleatório em cada execução, pelo que a cache não é usada.
+
+        :param use_cache: Se False, gera sempre o mapa a partir do JSON.
+        :return: True se o mapa foi carregado da cache.
+        """
+        if self.seed is None or not use_cache:
+            self.load_zones()
+            return False
+
+        source_hash = file_hash(self.json_path)
+        path = cache_path(self.json_path, source_hash, self.seed, self.cache_dir)
+        cached = load_map_cache(path, source_hash, self.seed)
+        if cached is not None:
+            self.graph, self.compiled_graph = cached
+            return True
+
+        self.load_zones()
+        try:
+            save_map_cache(path, self.graph, self.compile(), source_hash, self.seed)
+        except OSError as e:
+            print(f"Aviso: não foi possível guardar a cache do mapa em {path}: {e}")
+        return False
+
+    def update_edge(self, u, v, **attributes):
+        """
+        Altera o estado de uma estrada (no grafo e no grafo compilado, se existir).
+
+        :param u: Zona de um extremo da estrada.
+        :param v: Zona do outro extremo.
+        :param attributes: Novos valores de "weight", "closed" e/ou "weather".
+        :return: Nova versão do grafo.
+        """
+        return update_edge(self.graph, u, v, self.compiled_graph, **attributes)
+
+    @traced()
+    def compile(self):
+        """
+        Compila o grafo para o formato CSR usado pelos kernels de procura.
+        Deve ser chamado depois de load_zones (ou de load, que pode obtê-lo da cache).
+
+        :return: Instância de CompiledGraph.
+        """
+        if self.compiled_graph is None:
+            self.compiled_graph = CompiledGraph.from_graph(self.graph)
+        return self.compiled_graph
+
     def display_graph(self, path=None):
         """
         Mostra o grafo criado em formato gráfico com as coordenadas reais e,
@@ -105,6 +309,9 @@ class MapGenerator:
 
         :param path: Lista de nós representando o caminho a destacar.
         """
+        # O matplotlib só é importado quando é pedido um gráfico
+        import matplotlib.pyplot as plt
+
         # Usar as coordenadas reais para posicionar os nós
         pos = {
             node: (self.graph.nodes[node]['longitude'], self.graph.nodes[node]['latitude'])
@@ -0,0 +1,127 @@
+# map/zoneReader.py
+
+import json
+
+# Leitura em streaming dos ficheiros de zonas: as zonas são lidas uma a uma, sem carregar o
+# documento inteiro em memória. São suportados dois formatos:
+#   - JSON: um array de zonas (formato original dos ficheiros em input/)
+#   - JSON Lines: uma zona (objeto JSON) por linha
+
+CHUNK_SIZE = 1 << 16
+
+def detect_format(file):
+    """
+    Deteta o formato do ficheiro pelo primeiro carácter não branco ('[' para JSON, '{' para JSON Lines).
+    Não altera a posição de leitura do ficheiro.
+
+    :param file: Ficheiro de texto aberto.
+    :return: "json" ou "jsonl".
+    """
+    position = file.tell()
+    while True:
+        char = file.read(1)
+        if not char:
+            file.seek(position)
+            raise ValueError("O ficheiro de zonas está vazio.")
+        if not char.isspace():
+            file.seek(position)
+            if char == "[":
+                return "json"
+            if char == "{":
+                return "jsonl"
+            raise ValueError(f"Formato de ficheiro de zonas desconhecido (começa por '{char}').")
+
+def iter_json_array(file, chunk_size=CHUNK_SIZE):
+    """
+    Lê os elementos de um array JSON um a um.
+
+    :param file: Ficheiro de texto aberto, posicionado antes do '['.
+    :param chunk_size: Número de caracteres lidos de cada vez.
+    :return: Gerador de zonas (dicionários).
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        # Saltar espaços e separadores até ao próximo elemento
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            fill()
+
+        if position >= len(buffer):
+            raise ValueError("Fim inesperado do ficheiro de zonas.")
+
+        char = buffer[position]
+        if not started:
+            if char != "[":
+                raise ValueError("O ficheiro de zonas não é um array JSON.")
+            started = True
+            position += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            position += 1
+            continue
+
+        # Um valor simples (ex.: número) só está completo quando aparece o delimitador seguinte
+        if char not in "{[\"":
+            while not eof and not any(delimiter in buffer[position:] for delimiter in ",] \t\r\n"):
+                fill()
+
+        # Descodificar um elemento completo, lendo mais dados se estiver incompleto
+        while True:
+            try:
+                zone, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            break
+
+        position = end
+        yield zone
+
+def iter_json_lines(file):
+    """
+    Lê as zonas de um ficheiro JSON Lines (linhas em branco são ignoradas).
+
+    :param file: Ficheiro de texto aberto.
+    :return: Gerador de zonas (dicionários).
+    """
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Linha {line_number} inválida no ficheiro de zonas: {e}") from e
+
+def iter_zones(path):
+    """
+    Lê as zonas de um ficheiro (array JSON ou JSON Lines), uma de cada vez.
+
+    :param path: Caminho para o ficheiro de zonas.
+    :return: Gerador de zonas (dicionários).
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        if detect_format(file) == "json":
+            yield from iter_json_array(file)
+        else:
+            yield from iter_json_lines(file)
@@ -1,5 +1,9 @@
 from .astar import AStar
 from .bfs import BFS
+from .bidirectional import BidirectionalUCS, BidirectionalAStar
 from .dfs import DFS
 from .greedy import GreedyBestFirstSearch
-from .ucs import UCS
\ No newline at end of file
+from .multiSource import MultiSourceSearch
+from .ucs import UCS
+from .dstarLite import DStarLite
+from .searchStats import SearchStats
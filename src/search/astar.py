@@ -1,23 +1,38 @@
 # search/astar.py
 
 from utils import calculate_vehicle_combination
-from utils import straight_line_distance, heuristic
+from search import kernels
+from search.searchStats import instrumented
+from search.priorityQueue import create_priority_queue
+from utils import HeuristicTable
 from models import Truck, Car, Helicopter
 
 from itertools import combinations_with_replacement
-from geopy.distance import geodesic
-
-import heapq
 
 class AStar:
-    def __init__(self, graph):
+    def __init__(self, graph, heuristic_kernel="haversine", landmarks=None, compiled=None, queue="heap", stats=None):
         """
         Inicializa o algoritmo A* com o grafo.
 
         :param graph: Grafo representando o mapa.
+        :param heuristic_kernel: Cálculo da heurística ("haversine", "equirectangular", "geodesic" ou "alt").
+        :param landmarks: Landmarks pré-calculados, usados pela heurística "alt".
+        :param compiled: Grafo compilado (CSR); se indicado, a procura usa o kernel sobre arrays.
+        :param queue: Fila de prioridade ("heap", "indexed" ou "bucket").
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
         """
         self.graph = graph
-
+        self.compiled = compiled
+        self.queue = queue
+        self.stats = stats
+        create_priority_queue(queue)  # Validar o tipo de fila
+        self.heuristic_table = HeuristicTable(
+            graph, kernel=heuristic_kernel, landmarks=landmarks,
+            nodes=compiled.names if compiled is not None else None
+        )
+        self.expanded_nodes = 0  # Nós expandidos na última procura
+
+    @instrumented
     def search(self, start, goal):
         """
         Realiza a busca A* no grafo, considerando tanto o custo acumulado quanto a heurística,
@@ -30,6 +45,11 @@ class AStar:
         if start not in self.graph.nodes or goal not in self.graph.nodes:
             raise ValueError(f"O nó {start} ou {goal} não está no grafo.")
 
+        if self.compiled is not None:
+            goal_estimates = self.heuristic_table.goal_vector(goal)
+            path, cost = kernels.astar(self.compiled, self.compiled.index[start], self.compiled.index[goal], goal_estimates, self.queue, self.stats)
+            return kernels.build_search_result(self.graph, self.compiled, start, goal, path, cost, self.stats)
+
         # Obter a população da zona de ajuda
         goal_population = self.graph.nodes[goal].get('population', 0)
 
@@ -44,18 +64,22 @@ class AStar:
             ]
             vehicles = [v for v in vehicles if v is not None]
 
-        open_set = []
-        heapq.heappush(open_set, (0, start))  # (f_score, nó atual)
-        came_from = {}
+        # Estimativas de todos os nós até ao objetivo (pré-calculadas e reutilizadas entre procuras)
+        goal_estimates = self.heuristic_table.goal_vector(goal)
+        node_index = self.heuristic_table.index
+
+        self.expanded_nodes = 0
 
-        g_score = {node: float('inf') for node in self.graph.nodes}
-        g_score[start] = 0
+        open_set = create_priority_queue(self.queue)  # (f_score, nó atual)
+        open_set.push(start, goal_estimates[node_index[start]])
+        came_from = {}
 
-        f_score = {node: float('inf') for node in self.graph.nodes}
-        f_score[start] = heuristic(self.graph ,start, goal)
+        # Apenas os nós alcançados têm entrada (os restantes têm g_score infinito)
+        g_score = {start: 0}
 
         while open_set:
-            _, current_node = heapq.heappop(open_set)
+            _, current_node = open_set.pop()
+            self.expanded_nodes += 1
 
             if current_node == goal:
                 # Reconstruir o caminho a partir dos pais
@@ -81,12 +105,11 @@ class AStar:
                     continue
                 tentative_g_score = g_score[current_node] + edge_data.get('weight', 1)
 
-                if tentative_g_score < g_score[neighbor]:
+                if tentative_g_score < g_score.get(neighbor, float('inf')):
                     came_from[neighbor] = current_node
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + heuristic(self.graph ,neighbor, goal)
 
-                    if neighbor not in [item[1] for item in open_set]:
-                        heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                    # Insere o vizinho ou diminui a sua prioridade na fila
+                    open_set.push(neighbor, tentative_g_score + goal_estimates[node_index[neighbor]])
 
         return None, float('inf'), []  # Nenhum caminho encontrado
@@ -0,0 +1,194 @@
+# search/bidirectional.py
+
+from models import Truck, Car, Helicopter
+from utils import calculate_vehicle_combination
+from utils import HeuristicTable
+from search import kernels
+from search.searchStats import instrumented
+from search.priorityQueue import create_priority_queue
+
+class BidirectionalUCS:
+    def __init__(self, graph, compiled=None, queue="heap", stats=None):
+        """
+        Inicializa a procura de custo uniforme bidirecional com o grafo.
+
+        Uma procura avança a partir da zona de suporte e outra a partir da zona normal (o grafo
+        é não dirigido), expandindo alternadamente a fronteira com menos nós, até a soma dos
+        topos das duas filas atingir o custo do melhor caminho encontrado.
+
+        :param graph: Grafo representando o mapa.
+        :param compiled: Grafo compilado (CSR); se indicado, a procura usa o kernel sobre arrays.
+        :param queue: Fila de prioridade ("heap", "indexed" ou "bucket").
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
+        """
+        self.graph = graph
+        self.compiled = compiled
+        self.queue = queue
+        self.stats = stats
+        create_priority_queue(queue)  # Validar o tipo de fila
+        self.expanded_nodes = 0  # Nós expandidos (nas duas direções) na última procura
+
+    def get_potentials(self, start, goal):
+        """
+        Obtém o potencial de cada nó para a procura a partir do início (a procura a partir do
+        objetivo usa o simétrico). A UCS não usa potenciais.
+
+        :return: Lista alinhada com os nós do grafo compilado, dicionário {nó: potencial} ou None.
+        """
+        return None
+
+    @instrumented
+    def search(self, start, goal):
+        """
+        Realiza a procura bidirecional no grafo.
+
+        :param start: Nó inicial (zona de suporte).
+        :param goal: Nó objetivo (zona normal).
+        :return: Caminho, custo total e lista de veículos usados.
+        """
+        if start not in self.graph.nodes or goal not in self.graph.nodes:
+            raise ValueError(f"O nó {start} ou {goal} não está no grafo.")
+
+        potentials = self.get_potentials(start, goal)
+
+        if self.compiled is not None:
+            path, cost, self.expanded_nodes = kernels.bidirectional(
+                self.compiled, self.compiled.index[start], self.compiled.index[goal], potentials, self.queue, self.stats
+            )
+            return kernels.build_search_result(self.graph, self.compiled, start, goal, path, cost, self.stats)
+
+        path = self.bidirectional_search(start, goal, potentials)
+        if path is None:
+            return None, float('inf'), []  # Nenhum caminho encontrado
+
+        # Calcular o custo real do caminho percorrido
+        total_cost = 0
+        for i in range(len(path) - 1):
+            edge_data = self.graph.get_edge_data(path[i], path[i + 1])
+            total_cost += edge_data.get('weight', 1)
+
+        # Obter a população da zona de ajuda
+        goal_population = self.graph.nodes[goal].get('population', 0)
+
+        # Obter a lista de veículos disponíveis na zona de suporte
+        vehicles = self.graph.nodes[start].get('vehicles', [])
+        if isinstance(vehicles, list) and vehicles and isinstance(vehicles[0], dict):
+            vehicles = [
+                Truck(v['id']) if v['type'] == 'truck' else
+                Car(v['id']) if v['type'] == 'car' else
+                Helicopter(v['id']) if v['type'] == 'helicopter' else None
+                for v in vehicles
+            ]
+            vehicles = [v for v in vehicles if v is not None]
+
+        # Calcular a combinação ótima de veículos para atender à demanda
+        vehicle_combination = calculate_vehicle_combination(goal_population, vehicles)
+        return path, total_cost, vehicle_combination
+
+    def bidirectional_search(self, start, goal, potentials=None):
+        """
+        Procura bidirecional sobre o grafo networkx, ignorando estradas fechadas.
+
+        :param potentials: Dicionário {nó: potencial} para a procura a partir do início, ou None.
+        :return: Caminho ou None.
+        """
+        self.expanded_nodes = 0
+        if start == goal:
+            return [start]
+
+        def potential(node, side):
+            if potentials is None:
+                return 0
+            return potentials[node] if side == 0 else -potentials[node]
+
+        # Índice 0: procura a partir do início; índice 1: procura a partir do objetivo
+        scores = ({start: 0}, {goal: 0})
+        parents = ({start: None}, {goal: None})
+        settled = (set(), set())
+        open_sets = (create_priority_queue(self.queue), create_priority_queue(self.queue))
+        open_sets[0].push(start, potential(start, 0))
+        open_sets[1].push(goal, potential(goal, 1))
+
+        best_cost = float('inf')
+        meeting = None
+        while open_sets[0] and open_sets[1]:
+            # Nenhum caminho por descobrir pode ser melhor do que o melhor já encontrado
+            if open_sets[0].peek()[0] + open_sets[1].peek()[0] >= best_cost:
+                break
+
+            side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+            other = 1 - side
+            _, current_node = open_sets[side].pop()
+            settled[side].add(current_node)
+            self.expanded_nodes += 1
+
+            current_score = scores[side][current_node]
+            for neighbor, edge_data in self.graph.adj[current_node].items():
+                if edge_data.get('closed', False):  # Ignora estradas fechadas
+                    continue
+                tentative_score = current_score + edge_data.get('weight', 1)
+
+                # Caminho que passa pela aresta e encontra a outra procura
+                if neighbor in scores[other]:
+                    candidate = tentative_score + scores[other][neighbor]
+                    if candidate < best_cost:
+                        best_cost = candidate
+                        meeting = (current_node, neighbor) if side == 0 else (neighbor, current_node)
+
+                if neighbor in settled[side]:
+                    continue
+                if tentative_score < scores[side].get(neighbor, float('inf')):
+                    scores[side][neighbor] = tentative_score
+                    parents[side][neighbor] = current_node
+                    open_sets[side].push(neighbor, tentative_score + potential(neighbor, side))
+
+        if meeting is None:
+            return None
+
+        # Juntar o caminho do início até à aresta de encontro e o caminho inverso até ao objetivo
+        path = []
+        node = meeting[0]
+        while node is not None:
+            path.append(node)
+            node = parents[0][node]
+        path.reverse()
+        node = meeting[1]
+        while node is not None:
+            path.append(node)
+            node = parents[1][node]
+        return path
+
+
+class BidirectionalAStar(BidirectionalUCS):
+    def __init__(self, graph, heuristic_kernel="haversine", landmarks=None, compiled=None, queue="heap", stats=None):
+        """
+        Inicializa o A* bidirecional com o grafo.
+
+        Usa o potencial médio p(v) = (h(v, objetivo) - h(v, início)) / 2 na procura a partir do
+        início e -p(v) na procura a partir do objetivo. Com heurísticas consistentes os dois
+        potenciais são consistentes, pelo que o critério de paragem da UCS bidirecional se mantém.
+
+        :param graph: Grafo representando o mapa.
+        :param heuristic_kernel: Cálculo da heurística ("haversine", "equirectangular", "geodesic" ou "alt").
+        :param landmarks: Landmarks pré-calculados, usados pela heurística "alt".
+        :param compiled: Grafo compilado (CSR); se indicado, a procura usa o kernel sobre arrays.
+        :param queue: Fila de prioridade ("heap", "indexed" ou "bucket").
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
+        """
+        super().__init__(graph, compiled=compiled, queue=queue, stats=stats)
+        self.heuristic_table = HeuristicTable(
+            graph, kernel=heuristic_kernel, landmarks=landmarks,
+            nodes=compiled.names if compiled is not None else None
+        )
+
+    def get_potentials(self, start, goal):
+        """
+        Calcula o potencial médio de cada nó para a procura a partir do início.
+
+        :return: Lista alinhada com os nós do grafo compilado ou dicionário {nó: potencial}.
+        """
+        potentials = self.heuristic_table.potential_vector(start, goal)
+
+        if self.compiled is not None:
+            return potentials
+        return dict(zip(self.heuristic_table.index, potentials))
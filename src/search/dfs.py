@@ -2,16 +2,31 @@
 
 from models import Truck, Car, Helicopter 
 from utils import calculate_vehicle_combination
+from search import kernels
+from search.searchStats import instrumented
 
 class DFS:
-    def __init__(self, graph):
+    def __init__(self, graph, compiled=None, max_depth=None, iterative=False, stats=None):
         """
         Inicializa a classe DFS com o grafo.
 
         :param graph: Grafo representando o mapa.
+        :param compiled: Grafo compilado (CSR); se indicado, a procura usa o kernel sobre arrays.
+        :param max_depth: Profundidade máxima (número de arestas) do caminho; None para não limitar.
+        :param iterative: Se True, usa a procura em profundidade iterativa (limites 0, 1, 2, ...
+                          até max_depth), que devolve o caminho com menos arestas.
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
         """
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("A profundidade máxima não pode ser negativa.")
+
         self.graph = graph
+        self.compiled = compiled
+        self.max_depth = max_depth
+        self.iterative = iterative
+        self.stats = stats
 
+    @instrumented
     def search(self, start, goal):
         """
         Realiza uma busca em profundidade (DFS) no grafo.
@@ -23,6 +38,32 @@ class DFS:
         if start not in self.graph.nodes or goal not in self.graph.nodes:
             raise ValueError(f"O nó {start} ou {goal} não está no grafo.")
 
+        if self.compiled is not None:
+            start_id, goal_id = self.compiled.index[start], self.compiled.index[goal]
+            if self.iterative:
+                path, cost = kernels.iterative_deepening_dfs(self.compiled, start_id, goal_id, self.max_depth, self.stats)
+            elif self.max_depth is not None:
+                path, cost, _ = kernels.depth_limited_dfs(self.compiled, start_id, goal_id, self.max_depth, self.stats)
+            else:
+                path, cost = kernels.dfs(self.compiled, start_id, goal_id, self.stats)
+            return kernels.build_search_result(self.graph, self.compiled, start, goal, path, cost, self.stats)
+
+        if self.iterative:
+            path = self.iterative_deepening_search(start, goal)
+        elif self.max_depth is not None:
+            path, _ = self.depth_limited_search(start, goal, self.max_depth)
+        else:
+            path = self.depth_first_search(start, goal)
+
+        if path is None:
+            return None, float("inf"), []  # Falha em encontrar o caminho
+
+        # Calcula o custo total do caminho
+        total_cost = sum(
+            self.graph.get_edge_data(path[i], path[i + 1]).get("weight", 1)
+            for i in range(len(path) - 1)
+        )
+
         # Obter a população do nó objetivo e os veículos disponíveis no nó inicial
         goal_population = self.graph.nodes[goal].get("population", 0)
         vehicles = self.graph.nodes[start].get("vehicles", [])
@@ -37,32 +78,98 @@ class DFS:
                     ]
                     vehicles = [v for v in vehicles if v is not None]
 
-        # Inicializar estruturas para DFS
-        visited = set()
-        stack = [[start]]
+        # Calcular a combinação ótima de veículos para atender à demanda
+        vehicle_combination = calculate_vehicle_combination(goal_population, vehicles)
+        return path, total_cost, vehicle_combination
+
+    def reconstruct_path(self, parent, node):
+        """
+        Reconstrói o caminho a partir dos pais até ao nó indicado.
+
+        :param parent: Dicionário {nó: pai} (o nó inicial tem pai None).
+        :param node: Último nó do caminho.
+        :return: Lista de nós desde o nó inicial.
+        """
+        path = []
+        while node is not None:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return path
+
+    def depth_first_search(self, start, goal):
+        """
+        Procura em profundidade com ponteiros para o pai: a pilha guarda apenas (nó, pai) e o
+        caminho só é reconstruído ao atingir o objetivo.
+
+        :return: Caminho ou None.
+        """
+        parent = {}
+        stack = [(start, None)]  # (nó, nó que o colocou na pilha)
 
         while stack:
-            path = stack.pop()
-            current_node = path[-1]
+            current_node, previous = stack.pop()
 
             # Verifica se atingiu o objetivo
             if current_node == goal:
-                # Calcula o custo total do caminho
-                total_cost = sum(
-                    self.graph.get_edge_data(path[i], path[i + 1]).get("weight", 1)
-                    for i in range(len(path) - 1)
-                )
-                # Calcular a combinação ótima de veículos para atender à demanda
-                vehicle_combination = calculate_vehicle_combination(goal_population, vehicles)
-                return path, total_cost, vehicle_combination
-
-            if current_node not in visited:
-                visited.add(current_node)
-                for neighbor in self.graph.neighbors(current_node):
-                    edge_data = self.graph.get_edge_data(current_node, neighbor)
+                parent[current_node] = previous
+                return self.reconstruct_path(parent, goal)
+
+            if current_node not in parent:
+                parent[current_node] = previous
+                for neighbor, edge_data in self.graph.adj[current_node].items():
                     if edge_data.get("closed", False):  # Ignorar estradas fechadas
                         continue
-                    new_path = path + [neighbor]
-                    stack.append(new_path)
+                    stack.append((neighbor, current_node))
+
+        return None
 
-        return None, float("inf"), []  # Falha em encontrar o caminho
+    def depth_limited_search(self, start, goal, limit):
+        """
+        Procura em profundidade limitada a `limit` arestas. Um nó é expandido de novo se for
+        alcançado a uma profundidade menor, para que todos os nós dentro do limite sejam encontrados.
+
+        :return: Tuplo (caminho ou None, cortado), em que cortado indica se algum nó ficou por
+                 expandir por causa do limite.
+        """
+        parent = {}
+        depths = {}
+        cutoff = False
+        stack = [(start, None, 0)]  # (nó, nó que o colocou na pilha, profundidade)
+
+        while stack:
+            current_node, previous, depth = stack.pop()
+
+            if current_node == goal:
+                parent[current_node] = previous
+                return self.reconstruct_path(parent, goal), cutoff
+
+            if depths.get(current_node, limit + 1) <= depth:
+                continue
+            parent[current_node] = previous
+            depths[current_node] = depth
+
+            if depth == limit:
+                cutoff = cutoff or len(self.graph.adj[current_node]) > 0
+                continue
+            for neighbor, edge_data in self.graph.adj[current_node].items():
+                if edge_data.get("closed", False):  # Ignorar estradas fechadas
+                    continue
+                stack.append((neighbor, current_node, depth + 1))
+
+        return None, cutoff
+
+    def iterative_deepening_search(self, start, goal):
+        """
+        Procura em profundidade iterativa: repete a procura limitada com limites 0, 1, 2, ...
+        até encontrar o objetivo, até atingir a profundidade máxima ou até nenhum nó ficar cortado.
+
+        :return: Caminho (com o menor número de arestas) ou None.
+        """
+        limit = 0
+        while self.max_depth is None or limit <= self.max_depth:
+            path, cutoff = self.depth_limited_search(start, goal, limit)
+            if path is not None or not cutoff:
+                return path
+            limit += 1
+        return None
@@ -0,0 +1,313 @@
+# search/dstarLite.py
+
+from map.compiledGraph import CompiledGraph
+from map.edgeUpdates import update_edge
+from utils import HeuristicTable
+from search import kernels
+from search.searchStats import instrumented
+from search.priorityQueue import IndexedHeap, CountingQueue
+
+from collections import OrderedDict
+
+INFINITY = float('inf')
+
+class GoalState:
+    def __init__(self, goal, stats=None):
+        """
+        Estado da procura incremental de um objetivo: a árvore de caminhos mais curtos até ao
+        objetivo (procura inversa), guardada entre consultas.
+
+        :param goal: Id do objetivo.
+        :param stats: SearchStats onde acumular as operações da fila (None para não contar).
+        """
+        self.goal = goal
+        self.g = {}  # Distância até ao objetivo (valor consolidado)
+        self.rhs = {goal: 0.0}  # Distância prevista a partir dos vizinhos (lookahead)
+        # Nós localmente inconsistentes (g != rhs)
+        self.queue = CountingQueue(IndexedHeap(), stats) if stats is not None else IndexedHeap()
+        self.km = 0.0  # Correção das chaves acumulada quando o início muda
+        self.start = None  # Início da última consulta
+        self.heuristic = None  # Estimativa de cada nó até ao início da última consulta
+
+
+class DStarLite:
+    def __init__(self, graph, heuristic_kernel="haversine", compiled=None, max_goals=64, stats=None):
+        """
+        Planeador incremental D* Lite (LPA* com início variável).
+
+        Para cada objetivo é mantida uma procura inversa (do objetivo para o início) que é
+        reutilizada pelas consultas seguintes, mesmo com inícios diferentes: só é expandido o
+        necessário para consolidar o novo início. Quando uma estrada fecha, reabre ou muda de
+        distância (update_edge), apenas a parte afetada de cada árvore é reparada.
+
+        As alterações das estradas devem ser feitas com update_edge do planeador. Se o grafo
+        compilado mudar por outra via, os estados guardados são descartados na consulta seguinte.
+
+        :param graph: Grafo representando o mapa.
+        :param heuristic_kernel: Cálculo da distância em linha reta ("haversine", "equirectangular"
+                                 ou "geodesic"). A heurística ALT não é suportada, porque as
+                                 distâncias dos landmarks deixam de ser válidas quando as estradas mudam.
+        :param compiled: Grafo compilado (CSR); se não for indicado, é compilado na primeira consulta.
+        :param max_goals: Número máximo de objetivos com estado guardado (LRU).
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
+        """
+        if heuristic_kernel == "alt":
+            raise ValueError("O planeador incremental não suporta a heurística ALT.")
+
+        self.graph = graph
+        self.compiled = compiled
+        self.heuristic_kernel = heuristic_kernel
+        self.heuristic_table = None
+        self.max_goals = max_goals
+        self.states = OrderedDict()  # Id do objetivo -> GoalState
+        self.version = None  # Versão do grafo compilado a que os estados correspondem
+        self.expanded_nodes = 0  # Nós expandidos na última consulta
+        self.stats = stats
+
+    @classmethod
+    def from_compiled(cls, compiled, heuristic_table, max_goals=64):
+        """
+        Cria um planeador apenas sobre o grafo compilado, sem o grafo networkx (ex.: nos processos
+        de planeamento em paralelo). Só permite consultas (query), não alterações das estradas.
+
+        :param compiled: Grafo compilado.
+        :param heuristic_table: HeuristicTable alinhada com os ids do grafo compilado.
+        :return: Instância de DStarLite.
+        """
+        planner = cls(None, heuristic_kernel=heuristic_table.kernel, compiled=compiled, max_goals=max_goals)
+        planner.heuristic_table = heuristic_table
+        return planner
+
+    def get_compiled(self):
+        """
+        Obtém o grafo compilado, compilando o grafo na primeira utilização.
+        """
+        if self.compiled is None:
+            self.compiled = CompiledGraph.from_graph(self.graph)
+        if self.heuristic_table is None:
+            self.heuristic_table = HeuristicTable(self.graph, kernel=self.heuristic_kernel, nodes=self.compiled.names)
+        if self.version != self.compiled.version:
+            self.states.clear()
+            self.version = self.compiled.version
+        return self.compiled
+
+    def heuristic_list(self, start):
+        """
+        Obtém a estimativa de todos os nós até ao início (lista alinhada com os ids, em cache LRU
+        na tabela de heurísticas).
+        """
+        return self.heuristic_table.goal_vector(self.compiled.names[start])
+
+    def get_state(self, goal):
+        """
+        Obtém o estado guardado de um objetivo (ou cria um novo).
+        """
+        state = self.states.get(goal)
+        if state is not None:
+            self.states.move_to_end(goal)
+            return state
+        state = GoalState(goal, self.stats)
+        self.states[goal] = state
+        if len(self.states) > self.max_goals:
+            self.states.popitem(last=False)
+        return state
+
+    def calculate_key(self, state, node):
+        if self.stats is not None:
+            self.stats.heuristic_evaluations += 1
+        value = min(state.g.get(node, INFINITY), state.rhs.get(node, INFINITY))
+        return (value + state.heuristic[node] + state.km, value)
+
+    def update_vertex(self, state, node):
+        """
+        Recoloca um nó na fila se estiver localmente inconsistente (g != rhs).
+        """
+        state.queue.remove(node)
+        if state.g.get(node, INFINITY) != state.rhs.get(node, INFINITY):
+            state.queue.push(node, self.calculate_key(state, node))
+
+    def lookahead(self, state, node):
+        """
+        Calcula o rhs de um nó: o melhor custo através de um vizinho (estradas fechadas ignoradas).
+        """
+        offsets, targets, weights, closed = self.compiled.adjacency()
+        if self.stats is not None:
+            self.stats.edges_relaxed += offsets[node + 1] - offsets[node]
+        g = state.g
+        best = INFINITY
+        for slot in range(offsets[node], offsets[node + 1]):
+            if closed[slot]:
+                continue
+            value = weights[slot] + g.get(targets[slot], INFINITY)
+            if value < best:
+                best = value
+        return best
+
+    def compute_shortest_path(self, state):
+        """
+        Expande os nós inconsistentes até o início ficar consolidado.
+        """
+        offsets, targets, weights, closed = self.compiled.adjacency()
+        g, rhs, queue = state.g, state.rhs, state.queue
+        start, goal = state.start, state.goal
+
+        while queue:
+            key, node = queue.peek()
+            start_value = min(g.get(start, INFINITY), rhs.get(start, INFINITY))
+            if key >= (start_value + state.km, start_value) and rhs.get(start, INFINITY) == g.get(start, INFINITY):
+                break
+            self.expanded_nodes += 1
+
+            # A chave foi calculada com um início anterior: recolocar com a chave atual
+            new_key = self.calculate_key(state, node)
+            if key < new_key:
+                queue.remove(node)
+                queue.push(node, new_key)
+                continue
+
+            queue.pop()
+            if self.stats is not None:
+                self.stats.edges_relaxed += offsets[node + 1] - offsets[node]
+            node_g = g.get(node, INFINITY)
+            node_rhs = rhs.get(node, INFINITY)
+            if node_g > node_rhs:
+                # Sobreconsistente: consolidar e propagar a diminuição aos vizinhos
+                g[node] = node_rhs
+                for slot in range(offsets[node], offsets[node + 1]):
+                    if closed[slot]:
+                        continue
+                    neighbor = targets[slot]
+                    if neighbor != goal and weights[slot] + node_rhs < rhs.get(neighbor, INFINITY):
+                        rhs[neighbor] = weights[slot] + node_rhs
+                        self.update_vertex(state, neighbor)
+            else:
+                # Subconsistente: invalidar e recalcular os vizinhos que dependiam do nó
+                g[node] = INFINITY
+                for slot in range(offsets[node], offsets[node + 1]):
+                    if closed[slot]:
+                        continue
+                    neighbor = targets[slot]
+                    if neighbor != goal and rhs.get(neighbor, INFINITY) == weights[slot] + node_g:
+                        rhs[neighbor] = self.lookahead(state, neighbor)
+                        self.update_vertex(state, neighbor)
+                if node != goal:
+                    rhs[node] = self.lookahead(state, node)
+                self.update_vertex(state, node)
+
+    def query(self, start, goal):
+        """
+        Calcula o caminho mais curto entre dois nós, reutilizando o estado do objetivo.
+
+        :param start: Id do nó inicial.
+        :param goal: Id do nó objetivo.
+        :return: Tuplo (caminho de ids ou None, custo).
+        """
+        compiled = self.get_compiled()
+        self.expanded_nodes = 0
+
+        state = self.get_state(goal)
+        heuristic = self.heuristic_list(start)
+        if state.start is None:
+            state.start, state.heuristic = start, heuristic
+            state.queue.push(goal, self.calculate_key(state, goal))
+        elif state.start != start:
+            # As chaves na fila continuam a ser limites inferiores se se somar h(início anterior, início)
+            state.km += heuristic[state.start]
+            state.start, state.heuristic = start, heuristic
+
+        self.compute_shortest_path(state)
+        if self.stats is not None:
+            self.stats.nodes_expanded += self.expanded_nodes
+        if state.g.get(start, INFINITY) == INFINITY:
+            return None, float('inf')
+
+        # Seguir, a partir do início, o vizinho com menor custo até ao objetivo
+        offsets, targets, weights, closed = compiled.adjacency()
+        g = state.g
+        path = [start]
+        node = start
+        while node != goal and len(path) <= compiled.node_count:
+            best_neighbor, best_value = None, INFINITY
+            for slot in range(offsets[node], offsets[node + 1]):
+                if closed[slot]:
+                    continue
+                value = weights[slot] + g.get(targets[slot], INFINITY)
+                if value < best_value:
+                    best_neighbor, best_value = targets[slot], value
+            if best_neighbor is None:
+                return None, float('inf')
+            path.append(best_neighbor)
+            node = best_neighbor
+
+        # O limite de comprimento travou um ciclo: o objetivo não foi alcançado
+        if node != goal:
+            return None, float('inf')
+        return path, kernels.path_cost(compiled, path)
+
+    @instrumented
+    def search(self, start, goal):
+        """
+        Realiza a procura incremental no grafo.
+
+        :param start: Nó inicial (zona de suporte).
+        :param goal: Nó objetivo (zona normal).
+        :return: Caminho, custo total e lista de veículos usados.
+        """
+        if start not in self.graph.nodes or goal not in self.graph.nodes:
+            raise ValueError(f"O nó {start} ou {goal} não está no grafo.")
+
+        compiled = self.get_compiled()
+        path, cost = self.query(compiled.index[start], compiled.index[goal])
+        return kernels.build_search_result(self.graph, compiled, start, goal, path, cost, self.stats)
+
+    def edge_cost(self, source, target):
+        """
+        Obtém o custo atual de uma aresta (infinito se estiver fechada).
+        """
+        _, _, weights, closed = self.compiled.adjacency()
+        slot = self.compiled.edge_slots(source, target)[0]
+        return INFINITY if closed[slot] else weights[slot]
+
+    def update_edge(self, u, v, **attributes):
+        """
+        Altera o estado de uma estrada entre consultas e repara os estados guardados.
+
+        A nova distância não pode ser menor do que a distância em linha reta entre os extremos:
+        a heurística deixaria de ser admissível e os caminhos deixariam de ser os mais curtos.
+
+        :param u: Zona de um extremo da estrada.
+        :param v: Zona do outro extremo.
+        :param attributes: Novos valores de "weight", "closed" e/ou "weather".
+        :return: Nova versão do grafo.
+        """
+        if self.graph is None:
+            raise ValueError("Um planeador criado só com o grafo compilado não permite alterar estradas.")
+
+        compiled = self.get_compiled()
+        source, target = compiled.index[u], compiled.index[v]
+        weight = attributes.get("weight")
+        if weight is not None:
+            straight_line = self.heuristic_table.goal_vector(v)[source]
+            if weight < straight_line:
+                raise ValueError(
+                    f"A distância da estrada {u} - {v} ({weight:.2f} km) é menor do que a distância em "
+                    f"linha reta ({straight_line:.2f} km)."
+                )
+        old_cost = self.edge_cost(source, target)
+        version = update_edge(self.graph, u, v, compiled, **attributes)
+        self.version = compiled.version
+        new_cost = self.edge_cost(source, target)
+        if new_cost == old_cost:
+            return version
+
+        # Só os extremos da estrada podem mudar de rhs; o resto é reparado na consulta seguinte
+        for state in self.states.values():
+            for node, neighbor in ((source, target), (target, source)):
+                if node == state.goal:
+                    continue
+                if new_cost < old_cost:
+                    state.rhs[node] = min(state.rhs.get(node, INFINITY), new_cost + state.g.get(neighbor, INFINITY))
+                elif state.rhs.get(node, INFINITY) == old_cost + state.g.get(neighbor, INFINITY):
+                    state.rhs[node] = self.lookahead(state, node)
+                self.update_vertex(state, node)
+        return version
@@ -2,23 +2,35 @@
 
 from models import Truck, Car, Helicopter
 from utils import calculate_vehicle_combination
-from utils import heuristic
+from search import kernels
+from search.searchStats import instrumented
+from search.priorityQueue import create_priority_queue
+from utils import HeuristicTable
 
 from itertools import combinations_with_replacement
-from geopy.distance import geodesic
 from datetime import datetime, timedelta
 
-import heapq
-
 class GreedyBestFirstSearch:
-    def __init__(self, graph):
+    def __init__(self, graph, heuristic_kernel="haversine", compiled=None, queue="heap", stats=None):
         """
         Inicializa a classe Greedy Best-First Search com o grafo.
 
         :param graph: Grafo representando o mapa.
+        :param heuristic_kernel: Cálculo da heurística ("haversine", "equirectangular" ou "geodesic").
+        :param compiled: Grafo compilado (CSR); se indicado, a procura usa o kernel sobre arrays.
+        :param queue: Fila de prioridade ("heap", "indexed" ou "bucket").
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
         """
         self.graph = graph
-
+        self.compiled = compiled
+        self.queue = queue
+        self.stats = stats
+        create_priority_queue(queue)  # Validar o tipo de fila
+        self.heuristic_table = HeuristicTable(
+            graph, kernel=heuristic_kernel, nodes=compiled.names if compiled is not None else None
+        )
+
+    @instrumented
     def search(self, start, goal):
         """
         Realiza a busca Greedy Best-First Search no grafo considerando apenas a heurística para explorar
@@ -31,6 +43,11 @@ class GreedyBestFirstSearch:
         if start not in self.graph.nodes or goal not in self.graph.nodes:
             raise ValueError(f"O nó {start} ou {goal} não está no grafo.")
 
+        if self.compiled is not None:
+            goal_estimates = self.heuristic_table.goal_vector(goal)
+            path, cost = kernels.greedy(self.compiled, self.compiled.index[start], self.compiled.index[goal], goal_estimates, self.queue, self.stats)
+            return kernels.build_search_result(self.graph, self.compiled, start, goal, path, cost, self.stats)
+
         # Obter a população da zona de ajuda
         goal_population = self.graph.nodes[goal].get('population', 0)
 
@@ -45,13 +62,17 @@ class GreedyBestFirstSearch:
             ]
             vehicles = [v for v in vehicles if v is not None]
 
+        # Estimativas de todos os nós até ao objetivo (pré-calculadas e reutilizadas entre procuras)
+        goal_estimates = self.heuristic_table.goal_vector(goal)
+        node_index = self.heuristic_table.index
+
         visited = set()
-        priority_queue = []  # Fila de prioridade (heurística, nó atual)
+        priority_queue = create_priority_queue(self.queue)  # Fila de prioridade (heurística, nó atual)
         parent = {start: None}  # Para reconstruir o caminho
-        heapq.heappush(priority_queue, (0, start))  # Inicializa com a heurística do nó inicial
+        priority_queue.push(start, 0)  # Inicializa com a heurística do nó inicial
 
         while priority_queue:
-            _, current_node = heapq.heappop(priority_queue)
+            _, current_node = priority_queue.pop()
 
             if current_node == goal:
                 # Reconstruir o caminho a partir dos pais
@@ -83,10 +104,10 @@ class GreedyBestFirstSearch:
                         continue
 
                     # Calcula apenas a heurística para o vizinho
-                    heuristic_value = heuristic(self.graph, neighbor, goal)
+                    heuristic_value = goal_estimates[node_index[neighbor]]
 
                     # Adiciona o vizinho na fila de prioridade baseado apenas na heurística
-                    heapq.heappush(priority_queue, (heuristic_value, neighbor))
+                    priority_queue.push(neighbor, heuristic_value)
                     parent[neighbor] = current_node
 
         return None, float('inf'), []  # Nenhum caminho encontrado
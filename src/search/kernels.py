@@ -0,0 +1,423 @@
+# search/kernels.py
+
+from models import Truck, Car, Helicopter
+from utils import calculate_vehicle_combination
+from search.priorityQueue import create_priority_queue
+
+from collections import deque
+
+import time
+
+# Kernels de procura sobre o grafo compilado (CSR). Trabalham com ids inteiros e devolvem
+# (caminho de ids, custo), com a mesma semântica das procuras sobre o grafo networkx.
+
+def reconstruct_path(parent, node):
+    """
+    Reconstrói o caminho a partir dos pais até ao nó indicado.
+
+    :param parent: Dicionário {nó: pai} (o nó inicial tem pai None).
+    :param node: Último nó do caminho.
+    :return: Lista de ids desde o nó inicial.
+    """
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parent[node]
+    path.reverse()
+    return path
+
+def record_frontier(stats, pops, remaining):
+    """
+    Acumula as operações de uma fronteira simples (fila ou pilha) da BFS e da DFS: cada nó
+    inserido foi removido ou ainda está na fronteira.
+
+    :param stats: Instância de SearchStats.
+    :param pops: Remoções feitas pela procura.
+    :param remaining: Nós que ficaram na fronteira.
+    """
+    stats.heap_pops += pops
+    stats.heap_pushes += pops + remaining
+
+def path_cost(compiled, path):
+    """
+    Calcula o custo total de um caminho de ids.
+
+    :param compiled: Grafo compilado.
+    :param path: Lista de ids.
+    :return: Soma das distâncias das arestas do caminho.
+    """
+    offsets, targets, weights, _ = compiled.adjacency()
+    total_cost = 0
+    for i in range(len(path) - 1):
+        for slot in range(offsets[path[i]], offsets[path[i] + 1]):
+            if targets[slot] == path[i + 1]:
+                total_cost += weights[slot]
+                break
+    return total_cost
+
+def bfs(compiled, start, goal, stats=None):
+    """
+    Procura em largura. Tal como a BFS sobre o networkx, não ignora estradas fechadas.
+
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    """
+    offsets, targets, _, _ = compiled.adjacency()
+    if start == goal:
+        return [start], 0
+
+    parent = {start: None}
+    queue = deque([start])
+    pops = 0
+    while queue:
+        node = queue.popleft()
+        if stats is not None:
+            pops += 1
+            stats.nodes_expanded += 1
+            stats.edges_relaxed += offsets[node + 1] - offsets[node]
+        for slot in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[slot]
+            if neighbor in parent:
+                continue
+            parent[neighbor] = node
+            if neighbor == goal:
+                if stats is not None:
+                    record_frontier(stats, pops, len(queue))
+                path = reconstruct_path(parent, goal)
+                return path, path_cost(compiled, path)
+            queue.append(neighbor)
+
+    if stats is not None:
+        record_frontier(stats, pops, 0)
+    return None, float('inf')
+
+def dfs(compiled, start, goal, stats=None):
+    """
+    Procura em profundidade, ignorando estradas fechadas.
+
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    """
+    offsets, targets, _, closed = compiled.adjacency()
+    parent = {}
+    stack = [(start, None)]  # (nó, nó que o colocou na pilha)
+    pops = 0
+    while stack:
+        node, previous = stack.pop()
+        if stats is not None:
+            pops += 1
+
+        if node == goal:
+            if stats is not None:
+                record_frontier(stats, pops, len(stack))
+            parent[node] = previous
+            path = reconstruct_path(parent, goal)
+            return path, path_cost(compiled, path)
+
+        if node not in parent:
+            parent[node] = previous
+            if stats is not None:
+                stats.nodes_expanded += 1
+                stats.edges_relaxed += offsets[node + 1] - offsets[node]
+            for slot in range(offsets[node], offsets[node + 1]):
+                if not closed[slot]:
+                    stack.append((targets[slot], node))
+        elif stats is not None:
+            stats.stale_pops += 1
+
+    if stats is not None:
+        record_frontier(stats, pops, 0)
+    return None, float('inf')
+
+def depth_limited_dfs(compiled, start, goal, limit, stats=None):
+    """
+    Procura em profundidade limitada, ignorando estradas fechadas. Um nó é expandido de novo se
+    for alcançado a uma profundidade menor, para que todos os nós a no máximo `limit` arestas
+    sejam encontrados.
+
+    :param limit: Profundidade máxima (número de arestas).
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    :return: Tuplo (caminho de ids, custo, cortado), em que cortado indica se algum nó ficou por
+             expandir por causa do limite.
+    """
+    offsets, targets, _, closed = compiled.adjacency()
+    parent = {}
+    depths = {}
+    cutoff = False
+    stack = [(start, None, 0)]  # (nó, nó que o colocou na pilha, profundidade)
+    pops = 0
+    while stack:
+        node, previous, depth = stack.pop()
+        if stats is not None:
+            pops += 1
+
+        if node == goal:
+            if stats is not None:
+                record_frontier(stats, pops, len(stack))
+            parent[node] = previous
+            path = reconstruct_path(parent, goal)
+            return path, path_cost(compiled, path), cutoff
+
+        if depths.get(node, limit + 1) <= depth:
+            if stats is not None:
+                stats.stale_pops += 1
+            continue
+        parent[node] = previous
+        depths[node] = depth
+
+        if depth == limit:
+            cutoff = cutoff or offsets[node] < offsets[node + 1]
+            continue
+        if stats is not None:
+            stats.nodes_expanded += 1
+            stats.edges_relaxed += offsets[node + 1] - offsets[node]
+        for slot in range(offsets[node], offsets[node + 1]):
+            if not closed[slot]:
+                stack.append((targets[slot], node, depth + 1))
+
+    if stats is not None:
+        record_frontier(stats, pops, 0)
+    return None, float('inf'), cutoff
+
+def iterative_deepening_dfs(compiled, start, goal, max_depth=None, stats=None):
+    """
+    Procura em profundidade iterativa: repete a procura limitada com limites 0, 1, 2, ... até
+    encontrar o objetivo, até atingir max_depth ou até nenhum nó ficar cortado pelo limite.
+    Devolve o caminho com menos arestas.
+
+    :param max_depth: Profundidade máxima (None para não limitar).
+    :param stats: SearchStats onde acumular os contadores de todas as iterações (None para não contar).
+    """
+    limit = 0
+    while max_depth is None or limit <= max_depth:
+        path, cost, cutoff = depth_limited_dfs(compiled, start, goal, limit, stats)
+        if path is not None or not cutoff:
+            return path, cost
+        limit += 1
+    return None, float('inf')
+
+def ucs(compiled, start, goal, queue="heap", stats=None):
+    """
+    Procura de custo uniforme, ignorando estradas fechadas.
+
+    :param queue: Tipo de fila de prioridade.
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    """
+    offsets, targets, weights, closed = compiled.adjacency()
+    visited = set()
+    costs = {start: 0}
+    parent = {start: None}
+    priority_queue = create_priority_queue(queue, stats)
+    priority_queue.push(start, 0)
+
+    while priority_queue:
+        cost, node = priority_queue.pop()
+
+        if node == goal:
+            return reconstruct_path(parent, goal), cost
+
+        if node not in visited:
+            visited.add(node)
+            if stats is not None:
+                stats.nodes_expanded += 1
+                stats.edges_relaxed += offsets[node + 1] - offsets[node]
+            for slot in range(offsets[node], offsets[node + 1]):
+                if closed[slot]:
+                    continue
+                neighbor = targets[slot]
+                new_cost = cost + weights[slot]
+                if neighbor not in costs or new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    priority_queue.push(neighbor, new_cost)
+                    parent[neighbor] = node
+
+    return None, float('inf')
+
+def greedy(compiled, start, goal, estimates, queue="heap", stats=None):
+    """
+    Procura gulosa (apenas a heurística), ignorando estradas fechadas.
+
+    :param estimates: Lista de estimativas até ao objetivo, alinhada com os ids.
+    :param queue: Tipo de fila de prioridade.
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    """
+    offsets, targets, _, closed = compiled.adjacency()
+    visited = set()
+    parent = {start: None}
+    priority_queue = create_priority_queue(queue, stats, heuristic=True)
+    priority_queue.push(start, 0)
+
+    while priority_queue:
+        _, node = priority_queue.pop()
+
+        if node == goal:
+            path = reconstruct_path(parent, goal)
+            return path, path_cost(compiled, path)
+
+        if node not in visited:
+            visited.add(node)
+            if stats is not None:
+                stats.nodes_expanded += 1
+                stats.edges_relaxed += offsets[node + 1] - offsets[node]
+            for slot in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[slot]
+                if neighbor in visited or closed[slot]:
+                    continue
+                priority_queue.push(neighbor, estimates[neighbor])
+                parent[neighbor] = node
+
+    return None, float('inf')
+
+def astar(compiled, start, goal, estimates, queue="heap", stats=None):
+    """
+    Procura A*, ignorando estradas fechadas.
+
+    :param estimates: Lista de estimativas até ao objetivo, alinhada com os ids.
+    :param queue: Tipo de fila de prioridade.
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    """
+    offsets, targets, weights, closed = compiled.adjacency()
+    g_score = {start: 0}
+    came_from = {start: None}
+    open_set = create_priority_queue(queue, stats, heuristic=True)
+    open_set.push(start, estimates[start])
+
+    while open_set:
+        _, node = open_set.pop()
+
+        if node == goal:
+            path = reconstruct_path(came_from, goal)
+            return path, path_cost(compiled, path)
+
+        if stats is not None:
+            stats.nodes_expanded += 1
+            stats.edges_relaxed += offsets[node + 1] - offsets[node]
+        for slot in range(offsets[node], offsets[node + 1]):
+            if closed[slot]:
+                continue
+            neighbor = targets[slot]
+            tentative_g_score = g_score[node] + weights[slot]
+
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = node
+                g_score[neighbor] = tentative_g_score
+                open_set.push(neighbor, tentative_g_score + estimates[neighbor])
+
+    return None, float('inf')
+
+def bidirectional(compiled, start, goal, potentials=None, queue="heap", stats=None):
+    """
+    Procura bidirecional (UCS ou A*), ignorando estradas fechadas: uma procura avança a partir
+    do início e outra a partir do objetivo (o grafo é não dirigido), expandindo alternadamente
+    a fronteira com menos nós. Termina quando a soma dos topos das duas filas atinge o custo do
+    melhor caminho já encontrado.
+
+    :param potentials: Potencial médio de cada nó, alinhado com os ids (None para UCS). A procura
+                       para a frente usa p(v) e a procura para trás usa -p(v).
+    :param queue: Tipo de fila de prioridade.
+    :param stats: SearchStats onde acumular os contadores (None para não contar).
+    :return: Tuplo (caminho de ids, custo, nós expandidos).
+    """
+    offsets, targets, weights, closed = compiled.adjacency()
+    if start == goal:
+        return [start], 0, 0
+
+    # Índice 0: procura a partir do início; índice 1: procura a partir do objetivo
+    signs = (1, -1)
+    scores = ({start: 0}, {goal: 0})
+    parents = ({start: None}, {goal: None})
+    settled = (set(), set())
+    heuristic = potentials is not None
+    open_sets = (create_priority_queue(queue, stats, heuristic), create_priority_queue(queue, stats, heuristic))
+    for side, node in ((0, start), (1, goal)):
+        potential = potentials[node] * signs[side] if potentials is not None else 0
+        open_sets[side].push(node, potential)
+
+    best_cost = float('inf')
+    meeting = None
+    expanded_nodes = 0
+    forward, backward = open_sets
+    while forward and backward:
+        if forward.peek()[0] + backward.peek()[0] >= best_cost:
+            break
+
+        side = 0 if len(forward) <= len(backward) else 1
+        open_set, side_scores, side_parents, side_settled = open_sets[side], scores[side], parents[side], settled[side]
+        other_scores = scores[1 - side]
+        sign = signs[side]
+
+        _, node = open_set.pop()
+        side_settled.add(node)
+        expanded_nodes += 1
+        if stats is not None:
+            stats.nodes_expanded += 1
+            stats.edges_relaxed += offsets[node + 1] - offsets[node]
+
+        node_score = side_scores[node]
+        for slot in range(offsets[node], offsets[node + 1]):
+            if closed[slot]:
+                continue
+            neighbor = targets[slot]
+            tentative_score = node_score + weights[slot]
+
+            # Caminho que passa pela aresta e encontra a outra procura
+            if neighbor in other_scores:
+                candidate = tentative_score + other_scores[neighbor]
+                if candidate < best_cost:
+                    best_cost = candidate
+                    meeting = (node, neighbor) if side == 0 else (neighbor, node)
+
+            if neighbor in side_settled:
+                continue
+            if tentative_score < side_scores.get(neighbor, float('inf')):
+                side_scores[neighbor] = tentative_score
+                side_parents[neighbor] = node
+                potential = potentials[neighbor] * sign if potentials is not None else 0
+                open_set.push(neighbor, tentative_score + potential)
+
+    if meeting is None:
+        return None, float('inf'), expanded_nodes
+
+    # Juntar o caminho do início até à aresta de encontro e o caminho inverso até ao objetivo
+    path = reconstruct_path(parents[0], meeting[0])
+    node = meeting[1]
+    while node is not None:
+        path.append(node)
+        node = parents[1][node]
+    return path, path_cost(compiled, path), expanded_nodes
+
+def build_search_result(graph, compiled, start, goal, path, cost, stats=None):
+    """
+    Converte o resultado de um kernel no formato devolvido pelas classes de procura.
+
+    :param graph: Grafo networkx (atributos das zonas).
+    :param compiled: Grafo compilado.
+    :param start: Nó inicial (nome).
+    :param goal: Nó objetivo (nome).
+    :param path: Caminho de ids devolvido pelo kernel (ou None).
+    :param cost: Custo devolvido pelo kernel.
+    :param stats: SearchStats onde acumular o tempo do cálculo dos veículos (None para não medir).
+    :return: Caminho (nomes), custo total e lista de veículos usados.
+    """
+    if path is None:
+        return None, float('inf'), []
+
+    # Obter a população da zona de ajuda
+    goal_population = graph.nodes[goal].get('population', 0)
+
+    # Obter a lista de veículos disponíveis na zona de suporte
+    vehicles = graph.nodes[start].get('vehicles', [])
+    if isinstance(vehicles, list) and vehicles and isinstance(vehicles[0], dict):
+        vehicles = [
+            Truck(v['id']) if v['type'] == 'truck' else
+            Car(v['id']) if v['type'] == 'car' else
+            Helicopter(v['id']) if v['type'] == 'helicopter' else None
+            for v in vehicles
+        ]
+        vehicles = [v for v in vehicles if v is not None]
+
+    if stats is None:
+        vehicle_combination = calculate_vehicle_combination(goal_population, vehicles)
+    else:
+        start_time = time.perf_counter()
+        vehicle_combination = calculate_vehicle_combination(goal_population, vehicles)
+        stats.vehicle_time_s += time.perf_counter() - start_time
+    return compiled.to_names(path), cost, vehicle_combination
@@ -0,0 +1,182 @@
+# search/multiSource.py
+
+from models import Truck, Car, Helicopter
+from utils import calculate_vehicle_combination
+from utils import HeuristicTable
+
+import heapq
+
+class MultiSourceSearch:
+    def __init__(self, graph, use_heuristic=False, heuristic_kernel="haversine"):
+        """
+        Inicializa a procura multi-fonte com o grafo.
+
+        Em vez de uma procura por cada par (zona de suporte, zona normal), todas as zonas
+        de suporte são tratadas como uma única super-fonte virtual com custo 0.
+
+        :param graph: Grafo representando o mapa.
+        :param use_heuristic: Se True, as procuras por zona normal usam A* (heurística da
+                              distância em linha reta até à zona de suporte mais próxima).
+        :param heuristic_kernel: Cálculo da heurística ("haversine", "equirectangular" ou "geodesic").
+        """
+        self.graph = graph
+        self.use_heuristic = use_heuristic
+        self.heuristic_table = HeuristicTable(graph, kernel=heuristic_kernel)
+
+    def get_vehicles(self, zone):
+        """
+        Obtém a lista de veículos disponíveis numa zona de suporte.
+
+        :param zone: Zona de suporte.
+        :return: Lista de instâncias de veículos.
+        """
+        vehicles = self.graph.nodes[zone].get('vehicles', [])
+        if isinstance(vehicles, list) and vehicles and isinstance(vehicles[0], dict):
+            vehicles = [
+                Truck(v['id']) if v['type'] == 'truck' else
+                Car(v['id']) if v['type'] == 'car' else
+                Helicopter(v['id']) if v['type'] == 'helicopter' else None
+                for v in vehicles
+            ]
+            vehicles = [v for v in vehicles if v is not None]
+        return vehicles
+
+    def build_result(self, path, cost, goal):
+        """
+        Constrói o resultado (caminho, custo, veículos) para um caminho zona de suporte -> zona normal.
+
+        :param path: Caminho a partir da zona de suporte.
+        :param cost: Custo total do caminho.
+        :param goal: Zona normal de destino.
+        :return: Caminho, custo total e lista de veículos usados.
+        """
+        goal_population = self.graph.nodes[goal].get('population', 0)
+        vehicles = self.get_vehicles(path[0])
+        vehicle_combination = calculate_vehicle_combination(goal_population, vehicles)
+        return path, cost, vehicle_combination
+
+    def search_all(self, sources, goals):
+        """
+        Realiza uma única procura de custo uniforme a partir de uma super-fonte ligada a todas
+        as zonas de suporte, obtendo para cada zona normal a zona de suporte mais próxima.
+
+        :param sources: Lista de zonas de suporte.
+        :param goals: Lista de zonas normais.
+        :return: Dicionário {zona normal: (caminho, custo total, lista de veículos usados)}.
+        """
+        for node in list(sources) + list(goals):
+            if node not in self.graph.nodes:
+                raise ValueError(f"O nó {node} não está no grafo.")
+
+        pending_goals = set(goals)
+        visited = set()
+        priority_queue = []  # (custo acumulado, ordem de inserção, nó atual)
+        costs = {}
+        parent = {}
+        counter = 0
+
+        # Ligar a super-fonte virtual a todas as zonas de suporte com custo 0
+        for source in sources:
+            if source not in costs:
+                costs[source] = 0
+                parent[source] = None
+                heapq.heappush(priority_queue, (0, counter, source))
+                counter += 1
+
+        results = {}
+        while priority_queue and pending_goals:
+            cost, _, current_node = heapq.heappop(priority_queue)
+
+            if current_node in visited:
+                continue
+            visited.add(current_node)
+
+            if current_node in pending_goals:
+                pending_goals.discard(current_node)
+
+                # Reconstruir o caminho a partir dos pais (termina na zona de suporte)
+                path = []
+                node = current_node
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+
+                results[current_node] = self.build_result(path, cost, current_node)
+
+            for neighbor in self.graph.neighbors(current_node):
+                edge_data = self.graph.get_edge_data(current_node, neighbor)
+                if edge_data.get('closed', False):  # Ignora estradas fechadas
+                    continue
+
+                new_cost = cost + edge_data.get('weight', 1)
+                if neighbor not in costs or new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    parent[neighbor] = current_node
+                    heapq.heappush(priority_queue, (new_cost, counter, neighbor))
+                    counter += 1
+
+        return results
+
+    def search(self, sources, goal):
+        """
+        Realiza uma procura inversa a partir da zona normal que termina na primeira zona
+        de suporte fechada (a mais próxima). O grafo é não dirigido, pelo que o caminho
+        inverso é também um caminho válido da zona de suporte até à zona normal.
+
+        :param sources: Lista de zonas de suporte.
+        :param goal: Zona normal.
+        :return: Caminho (a partir da zona de suporte), custo total e lista de veículos usados.
+        """
+        if goal not in self.graph.nodes:
+            raise ValueError(f"O nó {goal} não está no grafo.")
+
+        targets = [source for source in sources if source in self.graph.nodes]
+        target_set = set(targets)
+        if not target_set:
+            return None, float('inf'), []
+
+        # Heurística admissível: distância em linha reta até à zona de suporte mais próxima
+        if self.use_heuristic:
+            target_estimates = self.heuristic_table.nearest_goal_vector(targets)
+            node_index = self.heuristic_table.index
+
+        def estimate(node):
+            if not self.use_heuristic:
+                return 0
+            return target_estimates[node_index[node]]
+
+        visited = set()
+        priority_queue = [(estimate(goal), 0, goal)]  # (f, custo acumulado, nó atual)
+        costs = {goal: 0}
+        parent = {goal: None}
+
+        while priority_queue:
+            _, cost, current_node = heapq.heappop(priority_queue)
+
+            if current_node in visited:
+                continue
+            visited.add(current_node)
+
+            if current_node in target_set:
+                # O caminho inverso começa na zona de suporte e termina na zona normal
+                path = []
+                node = current_node
+                while node is not None:
+                    path.append(node)
+                    node = parent[node]
+
+                return self.build_result(path, cost, goal)
+
+            for neighbor in self.graph.neighbors(current_node):
+                edge_data = self.graph.get_edge_data(current_node, neighbor)
+                if edge_data.get('closed', False):  # Ignora estradas fechadas
+                    continue
+
+                new_cost = cost + edge_data.get('weight', 1)
+                if neighbor not in costs or new_cost < costs[neighbor]:
+                    costs[neighbor] = new_cost
+                    parent[neighbor] = current_node
+                    heapq.heappush(priority_queue, (new_cost + estimate(neighbor), new_cost, neighbor))
+
+        return None, float('inf'), []  # Nenhum caminho encontrado
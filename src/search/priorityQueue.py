@@ -0,0 +1,389 @@
+# search/priorityQueue.py
+
+from collections import deque
+
+import heapq
+import math
+
+# Filas de prioridade intercambiáveis usadas pelas procuras UCS, A* e Greedy.
+# Todas têm a mesma interface:
+#   push(item, priority) -> insere o item ou diminui a sua prioridade (ignora prioridades piores)
+#   pop()                -> remove e devolve (prioridade, item) com a menor prioridade
+#   peek()               -> devolve (prioridade, item) com a menor prioridade, sem o remover
+#   len(fila), item in fila, get_priority(item)
+#   stale_pops           -> número de entradas desatualizadas descartadas até ao momento
+# Os empates são resolvidos pelo próprio item, tal como numa heap de tuplos (prioridade, item).
+
+class LazyHeap:
+    def __init__(self):
+        """
+        Heap binária com remoção preguiçosa: uma diminuição de prioridade insere uma nova entrada
+        e as entradas desatualizadas são descartadas ao remover. O índice guarda a melhor
+        prioridade atual de cada item presente na fila.
+        """
+        self.heap = []
+        self.priorities = {}
+        self.stale_pops = 0  # Entradas desatualizadas descartadas
+
+    def push(self, item, priority):
+        """
+        Insere um item ou diminui a sua prioridade.
+
+        :return: True se a fila foi alterada.
+        """
+        current = self.priorities.get(item)
+        if current is not None and priority >= current:
+            return False
+        self.priorities[item] = priority
+        heapq.heappush(self.heap, (priority, item))
+        return True
+
+    def pop(self):
+        """
+        Remove o item com menor prioridade.
+
+        :return: Tuplo (prioridade, item).
+        """
+        while self.heap:
+            priority, item = heapq.heappop(self.heap)
+            if self.priorities.get(item) == priority:
+                del self.priorities[item]
+                return priority, item
+            self.stale_pops += 1
+        raise IndexError("pop de uma fila de prioridade vazia")
+
+    def peek(self):
+        """
+        Obtém o item com menor prioridade sem o remover (descarta entradas desatualizadas do topo).
+
+        :return: Tuplo (prioridade, item).
+        """
+        while self.heap:
+            priority, item = self.heap[0]
+            if self.priorities.get(item) == priority:
+                return priority, item
+            heapq.heappop(self.heap)
+            self.stale_pops += 1
+        raise IndexError("peek de uma fila de prioridade vazia")
+
+    def get_priority(self, item):
+        return self.priorities.get(item)
+
+    def __contains__(self, item):
+        return item in self.priorities
+
+    def __len__(self):
+        return len(self.priorities)
+
+
+class IndexedHeap:
+    def __init__(self):
+        """
+        Heap binária indexada com diminuição de prioridade (decrease-key) no próprio lugar.
+        Cada item aparece no máximo uma vez; o índice guarda a posição de cada item na heap.
+        """
+        self.heap = []  # Lista de [prioridade, item]
+        self.positions = {}
+        self.stale_pops = 0  # Sempre 0: as prioridades são alteradas no próprio lugar
+
+    def push(self, item, priority):
+        """
+        Insere um item ou diminui a sua prioridade.
+
+        :return: True se a fila foi alterada.
+        """
+        position = self.positions.get(item)
+        if position is None:
+            self.heap.append([priority, item])
+            self.positions[item] = len(self.heap) - 1
+            self.sift_up(len(self.heap) - 1)
+            return True
+        if priority >= self.heap[position][0]:
+            return False
+        self.heap[position][0] = priority
+        self.sift_up(position)
+        return True
+
+    def pop(self):
+        """
+        Remove o item com menor prioridade.
+
+        :return: Tuplo (prioridade, item).
+        """
+        if not self.heap:
+            raise IndexError("pop de uma fila de prioridade vazia")
+
+        priority, item = self.heap[0]
+        last = self.heap.pop()
+        del self.positions[item]
+        if self.heap:
+            self.heap[0] = last
+            self.positions[last[1]] = 0
+            self.sift_down(0)
+        return priority, item
+
+    def peek(self):
+        """
+        Obtém o item com menor prioridade sem o remover.
+
+        :return: Tuplo (prioridade, item).
+        """
+        if not self.heap:
+            raise IndexError("peek de uma fila de prioridade vazia")
+        return self.heap[0][0], self.heap[0][1]
+
+    def remove(self, item):
+        """
+        Remove um item da fila, esteja em que posição estiver (usado pelas procuras incrementais,
+        em que a prioridade de um item também pode aumentar: remove-se e volta a inserir-se).
+
+        :return: True se o item estava na fila.
+        """
+        position = self.positions.pop(item, None)
+        if position is None:
+            return False
+        last = self.heap.pop()
+        if position < len(self.heap):
+            self.heap[position] = last
+            self.positions[last[1]] = position
+            self.sift_up(position)
+            self.sift_down(self.positions[last[1]])
+        return True
+
+    def sift_up(self, position):
+        heap = self.heap
+        entry = heap[position]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if (entry[0], entry[1]) < (heap[parent][0], heap[parent][1]):
+                heap[position] = heap[parent]
+                self.positions[heap[position][1]] = position
+                position = parent
+            else:
+                break
+        heap[position] = entry
+        self.positions[entry[1]] = position
+
+    def sift_down(self, position):
+        heap = self.heap
+        size = len(heap)
+        entry = heap[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and (heap[child + 1][0], heap[child + 1][1]) < (heap[child][0], heap[child][1]):
+                child += 1
+            if (heap[child][0], heap[child][1]) < (entry[0], entry[1]):
+                heap[position] = heap[child]
+                self.positions[heap[position][1]] = position
+                position = child
+            else:
+                break
+        heap[position] = entry
+        self.positions[entry[1]] = position
+
+    def get_priority(self, item):
+        position = self.positions.get(item)
+        return self.heap[position][0] if position is not None else None
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class BucketQueue:
+    def __init__(self, scale=100):
+        """
+        Fila de baldes (algoritmo de Dial) para distâncias escaladas para inteiros: o balde de
+        uma prioridade p é int(p * scale). Os itens do mesmo balde saem por ordem de chegada,
+        pelo que a ordem só é exata a menos de 1 / scale (por omissão, 10 metros para distâncias
+        em quilómetros). Prioridades infinitas ficam num balde à parte, no fim da fila.
+
+        :param scale: Número de baldes por unidade de distância.
+        """
+        self.scale = scale
+        self.buckets = {}
+        self.infinite = deque()
+        self.priorities = {}
+        self.cursor = 0
+        self.max_key = -1
+        self.stale_pops = 0  # Entradas desatualizadas descartadas
+
+    def push(self, item, priority):
+        """
+        Insere um item ou diminui a sua prioridade (a entrada antiga fica desatualizada no seu balde).
+
+        :return: True se a fila foi alterada.
+        """
+        current = self.priorities.get(item)
+        if current is not None and priority >= current:
+            return False
+        self.priorities[item] = priority
+
+        if math.isinf(priority):
+            self.infinite.append((priority, item))
+            return True
+
+        key = int(priority * self.scale)
+
+        # Com a fila vazia o cursor salta para o novo balde; prioridades abaixo do cursor
+        # (ex.: Greedy, cuja prioridade não é monótona) fazem-no recuar
+        if not self.buckets:
+            self.cursor = self.max_key = key
+        elif key < self.cursor:
+            self.cursor = key
+        elif key > self.max_key:
+            self.max_key = key
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = deque()
+        bucket.append((priority, item))
+        return True
+
+    def pop(self):
+        """
+        Remove um item do primeiro balde não vazio.
+
+        :return: Tuplo (prioridade, item).
+        """
+        while self.buckets and self.cursor <= self.max_key:
+            bucket = self.buckets.get(self.cursor)
+            if not bucket:
+                self.buckets.pop(self.cursor, None)
+                self.cursor += 1
+                continue
+
+            priority, item = bucket.popleft()
+            if not bucket:
+                del self.buckets[self.cursor]
+            if self.priorities.get(item) == priority:
+                del self.priorities[item]
+                return priority, item
+            self.stale_pops += 1
+
+        while self.infinite:
+            priority, item = self.infinite.popleft()
+            if self.priorities.get(item) == priority:
+                del self.priorities[item]
+                return priority, item
+            self.stale_pops += 1
+
+        raise IndexError("pop de uma fila de prioridade vazia")
+
+    def peek(self):
+        """
+        Obtém o próximo item a sair sem o remover (descarta entradas desatualizadas à frente).
+
+        :return: Tuplo (prioridade, item).
+        """
+        while self.buckets and self.cursor <= self.max_key:
+            bucket = self.buckets.get(self.cursor)
+            if not bucket:
+                self.buckets.pop(self.cursor, None)
+                self.cursor += 1
+                continue
+
+            priority, item = bucket[0]
+            if self.priorities.get(item) == priority:
+                return priority, item
+            bucket.popleft()
+            self.stale_pops += 1
+            if not bucket:
+                del self.buckets[self.cursor]
+
+        while self.infinite:
+            priority, item = self.infinite[0]
+            if self.priorities.get(item) == priority:
+                return priority, item
+            self.infinite.popleft()
+            self.stale_pops += 1
+
+        raise IndexError("peek de uma fila de prioridade vazia")
+
+    def get_priority(self, item):
+        return self.priorities.get(item)
+
+    def __contains__(self, item):
+        return item in self.priorities
+
+    def __len__(self):
+        return len(self.priorities)
+
+
+class CountingQueue:
+    def __init__(self, queue, stats, heuristic=False):
+        """
+        Envolve uma fila de prioridade e acumula as inserções, remoções e entradas desatualizadas
+        num SearchStats. Só é usada quando a procura recolhe contadores.
+
+        :param queue: Fila de prioridade envolvida.
+        :param stats: Instância de SearchStats.
+        :param heuristic: Se True, cada inserção consulta uma estimativa da heurística e é
+                          contada como avaliação da heurística.
+        """
+        self.queue = queue
+        self.stats = stats
+        self.heuristic = heuristic
+
+    def push(self, item, priority):
+        if self.heuristic:
+            self.stats.heuristic_evaluations += 1
+        changed = self.queue.push(item, priority)
+        if changed:
+            self.stats.heap_pushes += 1
+        return changed
+
+    def pop(self):
+        stale_pops = self.queue.stale_pops
+        try:
+            return self.queue.pop()
+        finally:
+            self.stats.heap_pops += 1
+            self.stats.stale_pops += self.queue.stale_pops - stale_pops
+
+    def peek(self):
+        stale_pops = self.queue.stale_pops
+        try:
+            return self.queue.peek()
+        finally:
+            self.stats.stale_pops += self.queue.stale_pops - stale_pops
+
+    def remove(self, item):
+        return self.queue.remove(item)
+
+    def get_priority(self, item):
+        return self.queue.get_priority(item)
+
+    def __contains__(self, item):
+        return item in self.queue
+
+    def __len__(self):
+        return len(self.queue)
+
+
+QUEUE_TYPES = {
+    "heap": LazyHeap,
+    "indexed": IndexedHeap,
+    "bucket": BucketQueue
+}
+
+def create_priority_queue(queue_type="heap", stats=None, heuristic=False):
+    """
+    Cria uma fila de prioridade do tipo indicado.
+
+    :param queue_type: "heap" (heap com remoção preguiçosa), "indexed" (heap indexada com
+                       decrease-key) ou "bucket" (fila de baldes de Dial).
+    :param stats: SearchStats onde acumular as operações da fila; None para não contar.
+    :param heuristic: Se True, cada inserção conta como uma avaliação da heurística (com stats).
+    :return: Fila de prioridade vazia.
+    """
+    if queue_type not in QUEUE_TYPES:
+        raise ValueError(f"Fila de prioridade desconhecida: {queue_type}. Opções: {', '.join(QUEUE_TYPES)}.")
+    queue = QUEUE_TYPES[queue_type]()
+    if stats is not None:
+        return CountingQueue(queue, stats, heuristic)
+    return queue
@@ -0,0 +1,90 @@
+# search/searchStats.py
+
+from utils import tracer, span
+
+from functools import wraps
+
+import time
+
+# Contadores de trabalho das procuras. Uma procura só recolhe contadores quando recebe uma
+# instância de SearchStats (parâmetro stats das classes de procura); sem ela, os kernels apenas
+# testam "stats is not None" uma vez por nó expandido e as filas de prioridade não são envolvidas,
+# pelo que o custo fica perto de zero. Os contadores de nós, arestas, filas e heurísticas são
+# recolhidos pelos kernels sobre o grafo compilado; as procuras sobre o grafo networkx registam
+# apenas o número de procuras e os tempos.
+
+COUNTERS = (
+    "searches",  # Procuras realizadas
+    "nodes_expanded",  # Nós expandidos (retirados da fronteira e com os vizinhos examinados)
+    "edges_relaxed",  # Arestas examinadas a partir dos nós expandidos
+    "heap_pushes",  # Inserções (ou diminuições de prioridade) aceites pela fronteira
+    "heap_pops",  # Remoções da fronteira
+    "stale_pops",  # Entradas desatualizadas descartadas (já expandidas ou com prioridade antiga)
+    "heuristic_evaluations",  # Estimativas da heurística consultadas
+    "vehicle_time_s",  # Tempo no cálculo da combinação de veículos (s)
+    "wall_time_s"  # Tempo total das procuras (s)
+)
+
+class SearchStats:
+    __slots__ = COUNTERS
+
+    def __init__(self):
+        """
+        Contadores acumulados de uma ou mais procuras.
+        """
+        self.reset()
+
+    def reset(self):
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    def merge(self, other):
+        """
+        Soma os contadores de outra instância a esta.
+
+        :param other: Instância de SearchStats.
+        :return: Esta instância.
+        """
+        for counter in COUNTERS:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+        return self
+
+    def as_dict(self):
+        """
+        Converte os contadores num dicionário (com as médias por procura), para escrita em JSON.
+
+        :return: Dicionário {contador: valor}.
+        """
+        values = {counter: getattr(self, counter) for counter in COUNTERS}
+        if self.searches:
+            values["nodes_expanded_per_search"] = self.nodes_expanded / self.searches
+            values["wall_time_per_search_s"] = self.wall_time_s / self.searches
+        return values
+
+
+# Nome do span de cada classe de procura (criado uma vez, para não ser alocado em cada procura)
+_span_names = {}
+
+def instrumented(search):
+    """
+    Decorador do método search das classes de procura: com self.stats definido, conta a procura
+    e mede o seu tempo total; com o traçado ligado, envolve a procura num span "search.<classe>".
+    Sem nenhum dos dois, chama o método diretamente.
+    """
+    @wraps(search)
+    def wrapper(self, start, goal):
+        stats = self.stats
+        if stats is None and not tracer.enabled:
+            return search(self, start, goal)
+        start_time = time.perf_counter()
+        try:
+            name = _span_names.get(type(self))
+            if name is None:
+                name = _span_names[type(self)] = f"search.{type(self).__name__}"
+            with span(name, start=start, goal=goal):
+                return search(self, start, goal)
+        finally:
+            if stats is not None:
+                stats.searches += 1
+                stats.wall_time_s += time.perf_counter() - start_time
+    return wrapper
@@ -2,21 +2,30 @@
 
 from models import Truck, Car, Helicopter 
 from utils import calculate_vehicle_combination
+from search import kernels
+from search.searchStats import instrumented
+from search.priorityQueue import create_priority_queue
 
 from itertools import combinations
 from itertools import combinations_with_replacement
 
-import heapq
-
 class UCS:
-    def __init__(self, graph):
+    def __init__(self, graph, compiled=None, queue="heap", stats=None):
         """
         Inicializa a classe UCS com o grafo.
 
         :param graph: Grafo representando o mapa.
+        :param compiled: Grafo compilado (CSR); se indicado, a procura usa o kernel sobre arrays.
+        :param queue: Fila de prioridade ("heap", "indexed" ou "bucket").
+        :param stats: SearchStats onde acumular os contadores das procuras (None para não recolher).
         """
         self.graph = graph
+        self.compiled = compiled
+        self.queue = queue
+        self.stats = stats
+        create_priority_queue(queue)  # Validar o tipo de fila
 
+    @instrumented
     def search(self, start, goal):
         """
         Realiza a busca UCS no grafo considerando os veículos disponíveis.
@@ -28,6 +37,10 @@ class UCS:
         if start not in self.graph.nodes or goal not in self.graph.nodes:
             raise ValueError(f"O nó {start} ou {goal} não está no grafo.")
 
+        if self.compiled is not None:
+            path, cost = kernels.ucs(self.compiled, self.compiled.index[start], self.compiled.index[goal], self.queue, self.stats)
+            return kernels.build_search_result(self.graph, self.compiled, start, goal, path, cost, self.stats)
+
         # Obter a população da zona de ajuda
         goal_population = self.graph.nodes[goal].get('population', 0)
 
@@ -43,13 +56,13 @@ class UCS:
             vehicles = [v for v in vehicles if v is not None]
 
         visited = set()
-        priority_queue = []  # (custo acumulado, nó atual)
+        priority_queue = create_priority_queue(self.queue)  # (custo acumulado, nó atual)
         costs = {start: 0}  # Armazena o menor custo para alcançar cada nó
         parent = {start: None}  # Para reconstruir o caminho
-        heapq.heappush(priority_queue, (0, start))
+        priority_queue.push(start, 0)
 
         while priority_queue:
-            cost, current_node = heapq.heappop(priority_queue)
+            cost, current_node = priority_queue.pop()
 
             if current_node == goal:
                 # Reconstruir o caminho a partir dos pais
@@ -77,7 +90,7 @@ class UCS:
                     # Atualiza somente se o novo custo for menor ou o nó não tiver sido processado
                     if neighbor not in costs or new_cost < costs[neighbor]:
                         costs[neighbor] = new_cost
-                        heapq.heappush(priority_queue, (new_cost, neighbor))
+                        priority_queue.push(neighbor, new_cost)
                         parent[neighbor] = current_node
 
         return None, float('inf'), []  # Nenhum caminho encontrado
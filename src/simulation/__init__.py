@@ -1,2 +1,5 @@
 from .simulation import Simulation
-from .simWithLimits import SimulationWithLimits
\ No newline at end of file
+from .simWithLimits import SimulationWithLimits
+from .fleetInventory import FleetInventory
+from .eventScheduler import EventScheduler
+from .monteCarlo import run_monte_carlo, write_monte_carlo_report, print_monte_carlo_report
@@ -0,0 +1,43 @@
+# simulation/eventScheduler.py
+
+import heapq
+import itertools
+
+# Tipos de evento da simulação com limites
+DEPART = "depart"   # Os veículos saem da zona de suporte
+ARRIVE = "arrive"   # Os veículos chegam à zona normal (entrega)
+RETURN = "return"   # Um grupo de veículos do mesmo tipo regressa à zona de suporte
+REFUEL = "refuel"   # O grupo termina o reabastecimento e volta a estar disponível
+
+class EventScheduler:
+    def __init__(self):
+        """
+        Fila de eventos com data/hora, ordenada cronologicamente. Eventos com a mesma data/hora
+        são processados pela ordem em que foram agendados.
+        """
+        self.events = []
+        self.sequence = itertools.count()
+        self.processed = 0  # Número de eventos já processados
+
+    def schedule(self, time, kind, data):
+        """
+        Agenda um evento.
+
+        :param time: Data/hora do evento.
+        :param kind: Tipo de evento (DEPART, ARRIVE, RETURN ou REFUEL).
+        :param data: Dicionário com os dados do evento.
+        """
+        heapq.heappush(self.events, (time, next(self.sequence), kind, data))
+
+    def pop(self):
+        """
+        Remove o próximo evento da fila.
+
+        :return: Tuplo (data/hora, tipo de evento, dados).
+        """
+        time, _, kind, data = heapq.heappop(self.events)
+        self.processed += 1
+        return time, kind, data
+
+    def __len__(self):
+        return len(self.events)
@@ -0,0 +1,131 @@
+# simulation/fleetInventory.py
+
+from array import array
+
+# Inventário compacto das frotas das zonas de suporte: em vez de um objeto por veículo, cada
+# zona guarda um contador por tipo de veículo. Os contadores de todas as zonas ficam num único
+# array (linha da zona x coluna do tipo), pelo que reservar e libertar veículos custa O(1) por
+# tipo e repor o stock inicial é uma única cópia do array, qualquer que seja o tamanho das frotas.
+
+VEHICLE_TYPES = ("truck", "car", "helicopter")
+
+class FleetInventory:
+    def __init__(self, graph, support_zones):
+        """
+        Inicializa o inventário com o stock inicial de cada zona de suporte.
+
+        :param graph: Grafo representando o mapa.
+        :param support_zones: Lista de zonas de suporte.
+        """
+        self.type_ids = []  # Ids dos tipos de veículo (colunas), pela ordem em que aparecem
+        self.type_index = {}
+        self.zone_index = {zone: row for row, zone in enumerate(support_zones)}
+
+        zone_counts = []
+        for zone in support_zones:
+            counts = {}
+            for vehicle_data in self.graph_vehicles(graph, zone):
+                vehicle_id = vehicle_data['id']
+                if vehicle_id not in self.type_index:
+                    self.type_index[vehicle_id] = len(self.type_ids)
+                    self.type_ids.append(vehicle_id)
+                counts[vehicle_id] = counts.get(vehicle_id, 0) + vehicle_data['available']
+            zone_counts.append(counts)
+
+        self.type_count = len(self.type_ids)
+        self.initial = array('q', [0]) * (len(support_zones) * self.type_count)
+        for row, counts in enumerate(zone_counts):
+            for vehicle_id, count in counts.items():
+                self.initial[row * self.type_count + self.type_index[vehicle_id]] = count
+        self.available = array('q', self.initial)
+
+        # Unidades disponíveis por zona, para saber em O(1) se uma zona ainda tem veículos
+        self.initial_totals = array('q', (sum(counts.values()) for counts in zone_counts))
+        self.totals = array('q', self.initial_totals)
+
+    @staticmethod
+    def graph_vehicles(graph, zone):
+        """
+        Obtém os dados dos veículos de uma zona de suporte (apenas os tipos conhecidos).
+
+        :param graph: Grafo representando o mapa.
+        :param zone: Zona de suporte.
+        :return: Lista de dicionários {id, type, available}.
+        """
+        return [
+            vehicle_data for vehicle_data in graph.nodes[zone].get('vehicles', []) or []
+            if vehicle_data['type'] in VEHICLE_TYPES
+        ]
+
+    def has_vehicles(self, zone):
+        """
+        Verifica se uma zona de suporte tem pelo menos um veículo disponível.
+
+        :param zone: Zona de suporte.
+        :return: True se houver veículos disponíveis.
+        """
+        return self.totals[self.zone_index[zone]] > 0
+
+    def counts(self, zone):
+        """
+        Obtém as unidades disponíveis de cada tipo de veículo numa zona de suporte.
+
+        :param zone: Zona de suporte.
+        :return: Dicionário {id do tipo de veículo: unidades disponíveis}.
+        """
+        start = self.zone_index[zone] * self.type_count
+        return {
+            vehicle_id: count
+            for vehicle_id, count in zip(self.type_ids, self.available[start:start + self.type_count])
+            if count > 0
+        }
+
+    def reserve(self, zone, vehicles):
+        """
+        Reserva veículos de uma zona de suporte. A reserva é atómica: se algum tipo não tiver
+        unidades suficientes, o stock não é alterado.
+
+        :param zone: Zona de suporte.
+        :param vehicles: Lista de veículos (tipo e quantidade).
+        :return: True se a reserva foi feita, False se os veículos forem insuficientes.
+        """
+        row = self.zone_index[zone]
+        start = row * self.type_count
+        slots = []
+        for vehicle in vehicles:
+            column = self.type_index.get(vehicle['id'])
+            quantity = vehicle.get('quantity', 1)
+            if column is None or self.available[start + column] < quantity:
+                return False
+            slots.append((start + column, quantity))
+
+        for slot, quantity in slots:
+            self.available[slot] -= quantity
+            self.totals[row] -= quantity
+        return True
+
+    def release(self, zone, vehicles):
+        """
+        Devolve veículos reservados a uma zona de suporte.
+
+        :param zone: Zona de suporte.
+        :param vehicles: Lista de veículos (tipo e quantidade).
+        """
+        row = self.zone_index[zone]
+        start = row * self.type_count
+        for vehicle in vehicles:
+            column = self.type_index.get(vehicle['id'])
+            if column is None:
+                raise ValueError(f"Tipo de veículo desconhecido: {vehicle['id']}.")
+            quantity = vehicle.get('quantity', 1)
+            if self.available[start + column] + quantity > self.initial[start + column]:
+                raise ValueError(f"A zona {zone} não tem {quantity} veículos {vehicle['id']} reservados.")
+            self.available[start + column] += quantity
+            self.totals[row] += quantity
+
+    def replenish(self):
+        """
+        Repõe o stock inicial de todas as zonas de suporte.
+        """
+        self.available[:] = self.initial
+        self.totals[:] = self.initial_totals
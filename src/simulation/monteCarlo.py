@@ -0,0 +1,391 @@
+# simulation/monteCarlo.py
+
+from map import CompiledGraph
+from map.compiledGraph import WEATHER_CONDITIONS
+from map.mapGenerator import WEATHER_PROBABILITIES, CLOSURE_PROBABILITY
+from map.edgeUpdates import bump_version
+from simulation import Simulation, SimulationWithLimits
+from utils import TravelTimeTable, build_result
+from utils import traced
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import io
+import json
+import os
+import time
+import numpy as np
+
+# Estudos Monte Carlo sobre uma topologia fixa: as zonas, as estradas e as distâncias são as do
+# mapa carregado, e em cada cenário o estado das estradas (tempo e estradas fechadas) é sorteado
+# de novo, com as mesmas probabilidades do MapGenerator. Os sorteios de um cenário são vetorizados
+# (um array por estrada) e dependem apenas da seed e do índice do cenário, pelo que os resultados
+# não mudam com o número de processos nem com o tamanho dos lotes. Cada processo recebe o grafo
+# uma única vez e executa a simulação escolhida em cada cenário do seu lote, devolvendo apenas o
+# tempo de chegada de cada zona normal.
+
+SIMULATION_TYPES = ("normal", "limits")
+
+# Estado de cada processo (preenchido por init_worker)
+_worker = {}
+
+def sample_scenarios(edge_count, indices, seed):
+    """
+    Sorteia o estado das estradas de vários cenários.
+
+    :param edge_count: Número de estradas (não dirigidas, pela ordem de graph.edges).
+    :param indices: Índices dos cenários.
+    :param seed: Seed do estudo.
+    :return: Tuplo (array booleano de estradas fechadas, array de códigos meteorológicos
+             (ver WEATHER_CONDITIONS)), ambos com uma linha por cenário e uma coluna por estrada.
+    """
+    cumulative = np.cumsum([WEATHER_PROBABILITIES[condition] for condition in WEATHER_CONDITIONS])
+    cumulative[-1] = 1.0  # Evitar que um arredondamento deixe sorteios fora da última condição
+
+    closed = np.empty((len(indices), edge_count), dtype=bool)
+    weather = np.empty((len(indices), edge_count), dtype=np.int8)
+    for row, index in enumerate(indices):
+        generator = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(int(index),)))
+        draws = generator.random((2, edge_count))
+        closed[row] = draws[0] < CLOSURE_PROBABILITY
+        weather[row] = np.searchsorted(cumulative, draws[1], side="right")
+    return closed, weather
+
+def init_worker(graph, simulation_type, algorithm_type, seed, reference_time, multi_source=False):
+    """
+    Inicializa um processo: guarda uma cópia do grafo e compila a topologia uma única vez.
+
+    :param graph: Grafo networkx do mapa (alterado em cada cenário, apenas neste processo).
+    :param simulation_type: "normal" (Simulation) ou "limits" (SimulationWithLimits).
+    :param algorithm_type: Algoritmo a usar.
+    :param seed: Seed do estudo.
+    :param reference_time: Relógio de referência comum a todos os cenários.
+    :param multi_source: Se True, a simulação normal usa o planeamento multi-fonte.
+    """
+    compiled = CompiledGraph.from_graph(graph)
+    compiled.adjacency()  # As listas da topologia são partilhadas por todos os cenários
+
+    normal_zones = sorted(
+        (node for node, attrs in graph.nodes(data=True) if attrs.get('zone_type') == "normal"), key=str
+    )
+
+    _worker.clear()
+    _worker.update({
+        "graph": graph,
+        "compiled": compiled,
+        "edges": [edge_data for _, _, edge_data in graph.edges(data=True)],
+        "zone_index": {zone: position for position, zone in enumerate(normal_zones)},
+        "simulation_type": simulation_type,
+        "algorithm_type": algorithm_type,
+        "seed": seed,
+        "reference_time": reference_time,
+        "multi_source": multi_source
+    })
+
+def apply_scenario(closed, weather):
+    """
+    Aplica o estado das estradas de um cenário ao grafo do processo.
+
+    :param closed: Array booleano de estradas fechadas (pela ordem de graph.edges).
+    :param weather: Array de códigos meteorológicos (pela ordem de graph.edges).
+    :return: Grafo compilado do cenário.
+    """
+    graph = _worker["graph"]
+    for edge_data, edge_closed, edge_weather in zip(_worker["edges"], closed.tolist(), weather.tolist()):
+        edge_data["closed"] = edge_closed
+        edge_data["weather"] = WEATHER_CONDITIONS[edge_weather]
+    bump_version(graph)
+
+    compiled = _worker["compiled"]
+    return compiled.with_edge_state(closed[compiled.edge_ids], weather[compiled.edge_ids])
+
+def simulate_scenario(compiled):
+    """
+    Executa a simulação escolhida sobre o estado atual do grafo do processo.
+
+    :param compiled: Grafo compilado do cenário.
+    :return: Dicionário {zona normal: caminho, custo e veículos usados} das zonas servidas.
+    """
+    graph = _worker["graph"]
+    algorithm_type = _worker["algorithm_type"]
+
+    # As simulações escrevem avisos para cada zona sem caminho; num estudo só interessam os totais
+    with redirect_stdout(io.StringIO()):
+        if _worker["simulation_type"] == "normal":
+            simulation = Simulation(graph, algorithm_type, multi_source=_worker["multi_source"], compiled_graph=compiled)
+        else:
+            simulation = SimulationWithLimits(graph, algorithm_type, compiled_graph=compiled)
+            simulation.current_time = _worker["reference_time"]
+        simulation.start_time = _worker["reference_time"]
+        simulation.initialize_zones()
+        return simulation.calculate_best_paths()
+
+def run_scenarios(indices):
+    """
+    Simula, num processo, um lote de cenários.
+
+    :param indices: Índices dos cenários do lote.
+    :return: Tuplo (índices, tempos de chegada em horas desde o relógio de referência (cenário x
+             zona normal, NaN se a zona não foi servida ou não tem veículos), zonas servidas
+             (cenário x zona normal), fração de estradas fechadas de cada cenário).
+    """
+    graph = _worker["graph"]
+    zone_index = _worker["zone_index"]
+    reference_time = _worker["reference_time"]
+
+    closed_rows, weather_rows = sample_scenarios(_worker["compiled"].edge_count, indices, _worker["seed"])
+    arrivals = np.full((len(indices), len(zone_index)), np.nan)
+    served = np.zeros((len(indices), len(zone_index)), dtype=bool)
+
+    for row, (closed, weather) in enumerate(zip(closed_rows, weather_rows)):
+        best_paths = simulate_scenario(apply_scenario(closed, weather))
+
+        # Tempo de chegada de cada zona tal como aparece nos resultados (o veículo mais lento),
+        # contado a partir da partida de cada entrega (na simulação com limites, uma zona replaneada
+        # depois do regresso dos veículos ou servida em várias entregas parte mais tarde)
+        travel_times = TravelTimeTable.for_graph(graph)
+        for normal_zone, path_data in best_paths.items():
+            column = zone_index[normal_zone]
+            served[row, column] = True
+            delivery_arrivals = []
+            for delivery in path_data.get("deliveries", [path_data]):
+                departure_time = delivery.get("departure_time", reference_time)
+                record = build_result(normal_zone, delivery, graph, travel_times, departure_time)
+                if record['vehicles']:
+                    delivery_arrivals.append((departure_time - reference_time).total_seconds() / 3600 + max(
+                        vehicle['total_travel_time'] for vehicle in record['vehicles']
+                    ))
+            if delivery_arrivals:
+                arrivals[row, column] = max(delivery_arrivals)
+
+    return indices, arrivals, served, closed_rows.mean(axis=1)
+
+def distribution(values):
+    """
+    Resume uma amostra (média, desvio padrão, percentis 5/50/95, mínimo e máximo), ignorando NaN.
+
+    :param values: Array de valores.
+    :return: Dicionário com o resumo (None nos campos de uma amostra vazia).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"count": 0, "mean": None, "std": None, "p5": None, "p50": None, "p95": None, "min": None, "max": None}
+
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "p5": float(p5),
+        "p50": float(p50),
+        "p95": float(p95),
+        "min": float(values.min()),
+        "max": float(values.max())
+    }
+
+def zone_deadlines(graph, zones, reference_time):
+    """
+    Calcula o prazo de cada zona normal (horas entre o relógio de referência e o tempo crítico).
+
+    :return: Array de prazos (infinito para as zonas sem tempo crítico).
+    """
+    deadlines = np.full(len(zones), np.inf)
+    for position, zone in enumerate(zones):
+        critical_time = graph.nodes[zone].get('critical_time')
+        if critical_time and critical_time != "0":
+            critical_time = datetime.strptime(critical_time, "%Y-%m-%d %H:%M:%S")
+            deadlines[position] = (critical_time - reference_time).total_seconds() / 3600
+    return deadlines
+
+def summarize_scenarios(graph, zones, arrivals, served, closed_fraction, reference_time, histogram_bins=20):
+    """
+    Agrega os resultados dos cenários: cobertura, distribuição dos tempos de chegada e
+    probabilidade de falha de cada zona normal.
+
+    Uma zona falha num cenário se não for servida ou se chegar depois do tempo crítico.
+
+    :param graph: Grafo do mapa.
+    :param zones: Zonas normais (ordem das colunas).
+    :param arrivals: Tempos de chegada em horas (cenário x zona).
+    :param served: Zonas servidas (cenário x zona).
+    :param closed_fraction: Fração de estradas fechadas de cada cenário.
+    :param reference_time: Relógio de referência.
+    :param histogram_bins: Número de classes do histograma dos tempos de chegada.
+    :return: Dicionário com os resultados agregados.
+    """
+    populations = np.array([graph.nodes[zone].get('population', 0) for zone in zones], dtype=np.float64)
+    deadlines = zone_deadlines(graph, zones, reference_time)
+
+    # Uma zona servida sem veículos (sem procura) chega no início
+    arrivals = np.where(served & np.isnan(arrivals), 0.0, arrivals)
+    late = served & (arrivals > deadlines[None, :])
+    failed = ~served | late
+
+    zone_count = max(len(zones), 1)
+    total_population = populations.sum()
+    coverage = {
+        "zones": distribution(served.sum(axis=1) / zone_count),
+        "population": distribution(
+            (served * populations[None, :]).sum(axis=1) / total_population if total_population > 0
+            else served.sum(axis=1) / zone_count
+        ),
+        "on_time": distribution((served & ~late).sum(axis=1) / zone_count)
+    }
+
+    served_arrivals = arrivals[served]
+    histogram = {"edges": [], "counts": []}
+    if served_arrivals.size:
+        counts, edges = np.histogram(served_arrivals, bins=histogram_bins)
+        histogram = {"edges": edges.tolist(), "counts": counts.tolist()}
+
+    zone_results = []
+    for position, zone in enumerate(zones):
+        zone_results.append({
+            "zone": zone,
+            "population": int(populations[position]),
+            "deadline_hours": float(deadlines[position]) if np.isfinite(deadlines[position]) else None,
+            "unserved_probability": float(1 - served[:, position].mean()) if len(served) else None,
+            "late_probability": float(late[:, position].mean()) if len(late) else None,
+            "failure_probability": float(failed[:, position].mean()) if len(failed) else None,
+            "arrival_hours": distribution(arrivals[served[:, position], position])
+        })
+    zone_results.sort(key=lambda result: (-(result["failure_probability"] or 0), str(result["zone"])))
+
+    return {
+        "closed_fraction": distribution(closed_fraction),
+        "coverage": coverage,
+        "arrival_hours": dict(distribution(served_arrivals), histogram=histogram),
+        "zones": zone_results
+    }
+
+@traced()
+def run_monte_carlo(graph, algorithm_type, scenarios, seed=0, simulation_type="normal", multi_source=False, workers=None, batch_size=None):
+    """
+    Executa um estudo Monte Carlo: simula cada cenário (estado das estradas sorteado) sobre a
+    topologia do grafo e agrega os resultados.
+
+    O custo de cada cenário é o de uma execução da simulação; com o planeamento multi-fonte
+    (apenas na simulação normal com UCS) cada cenário faz uma única procura, em vez de uma por
+    cada par (zona de suporte, zona normal). O A* usa a distância em linha reta: os landmarks
+    da heurística ALT dependem das estradas fechadas do mapa em que foram calculados.
+
+    :param graph: Grafo do mapa (não é alterado).
+    :param algorithm_type: Algoritmo a usar.
+    :param scenarios: Número de cenários.
+    :param seed: Seed do estudo.
+    :param simulation_type: "normal" (Simulation) ou "limits" (SimulationWithLimits).
+    :param multi_source: Se True, a simulação normal usa o planeamento multi-fonte (UCS e AStar).
+    :param workers: Número de processos (por omissão, o número de CPUs; 1 para executar no processo atual).
+    :param batch_size: Número de cenários por tarefa (por omissão, cerca de 4 lotes por processo).
+    :return: Dicionário com o relatório do estudo (ver summarize_scenarios).
+    """
+    if simulation_type not in SIMULATION_TYPES:
+        raise ValueError(f"Tipo de simulação inválido: {simulation_type}. Opções: {', '.join(SIMULATION_TYPES)}.")
+    if multi_source and (simulation_type != "normal" or algorithm_type not in ("UCS", "AStar")):
+        raise ValueError("O planeamento multi-fonte só está disponível na simulação normal, com UCS e AStar.")
+    if scenarios < 1:
+        raise ValueError("O número de cenários tem de ser positivo.")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, scenarios))
+    if batch_size is None:
+        batch_size = max(1, -(-scenarios // (workers * 4)))
+    batches = [list(range(start, min(start + batch_size, scenarios))) for start in range(0, scenarios, batch_size)]
+
+    # Mesmo relógio de referência em todos os cenários (ordem de urgência e prazos)
+    reference_time = datetime.now().replace(microsecond=0)
+    initargs = (graph, simulation_type, algorithm_type, seed, reference_time, multi_source)
+
+    start = time.perf_counter()
+    if workers == 1:
+        # O processo atual trabalha sobre uma cópia, para não alterar o grafo do mapa
+        init_worker(graph.copy(), *initargs[1:])
+        results = list(map(run_scenarios, batches))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as executor:
+            results = list(executor.map(run_scenarios, batches))
+    _worker.clear()
+
+    zones = sorted(
+        (node for node, attrs in graph.nodes(data=True) if attrs.get('zone_type') == "normal"), key=str
+    )
+    arrivals = np.full((scenarios, len(zones)), np.nan)
+    served = np.zeros((scenarios, len(zones)), dtype=bool)
+    closed_fraction = np.zeros(scenarios)
+    for indices, batch_arrivals, batch_served, batch_closed in results:
+        arrivals[indices] = batch_arrivals
+        served[indices] = batch_served
+        closed_fraction[indices] = batch_closed
+
+    report = {
+        "simulation": simulation_type,
+        "algorithm": algorithm_type,
+        "multi_source": multi_source,
+        "scenarios": scenarios,
+        "seed": seed,
+        "workers": workers,
+        "elapsed_s": time.perf_counter() - start,
+        "reference_time": reference_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "closure_probability": CLOSURE_PROBABILITY,
+        "weather_probabilities": WEATHER_PROBABILITIES
+    }
+    report.update(summarize_scenarios(graph, zones, arrivals, served, closed_fraction, reference_time))
+    return report
+
+def write_monte_carlo_report(report, output_dir="results"):
+    """
+    Escreve o relatório de um estudo Monte Carlo em <output_dir>/monteCarlo/.
+
+    :param report: Relatório devolvido por run_monte_carlo.
+    :param output_dir: Pasta base dos resultados.
+    :return: Caminho do ficheiro escrito.
+    """
+    directory = os.path.join(output_dir, "monteCarlo")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"monte_carlo_{report['simulation']}_{report['algorithm'].lower()}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+    return path
+
+def print_monte_carlo_report(report, top=10):
+    """
+    Mostra o resumo de um estudo Monte Carlo: cobertura, tempos de chegada e as zonas com
+    maior probabilidade de falha.
+
+    :param report: Relatório devolvido por run_monte_carlo.
+    :param top: Número de zonas mostradas.
+    """
+    def percent(value):
+        return f"{value * 100:6.1f}%" if value is not None else "    N/A"
+
+    def hours(value):
+        return f"{value:8.2f}" if value is not None else "     N/A"
+
+    print(f"\nEstudo Monte Carlo: {report['algorithm']} ({report['simulation']}), {report['scenarios']} cenários, "
+          f"seed {report['seed']}, {report['workers']} processo(s), {report['elapsed_s']:.1f} s")
+    print(f"Estradas fechadas por cenário: {percent(report['closed_fraction']['mean']).strip()} em média")
+
+    print(f"\n{'Cobertura':<20} {'Média':>8} {'P5':>8} {'P50':>8} {'P95':>8}")
+    print("=" * 56)
+    for name, label in (("zones", "Zonas servidas"), ("population", "População servida"), ("on_time", "Zonas a tempo")):
+        values = report["coverage"][name]
+        print(f"{label:<20} {percent(values['mean']):>8} {percent(values['p5']):>8} "
+              f"{percent(values['p50']):>8} {percent(values['p95']):>8}")
+
+    arrival = report["arrival_hours"]
+    print(f"\nTempo de chegada (h): média {hours(arrival['mean']).strip()}, P5 {hours(arrival['p5']).strip()}, "
+          f"P50 {hours(arrival['p50']).strip()}, P95 {hours(arrival['p95']).strip()}, máx. {hours(arrival['max']).strip()}")
+
+    zones = report["zones"][:top]
+    if not zones:
+        return
+    width = max(len("Zona"), max(len(str(zone["zone"])) for zone in zones))
+    header = f"{'Zona':<{width}} {'Falha':>8} {'Sem rota':>9} {'Atraso':>8} {'P50 (h)':>8} {'P95 (h)':>8}"
+    print(f"\n{header}")
+    print("=" * len(header))
+    for zone in zones:
+        print(f"{str(zone['zone']):<{width}} {percent(zone['failure_probability']):>8} "
+              f"{percent(zone['unserved_probability']):>9} {percent(zone['late_probability']):>8} "
+              f"{hours(zone['arrival_hours']['p50']):>8} {hours(zone['arrival_hours']['p95']):>8}")
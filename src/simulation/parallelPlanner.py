@@ -0,0 +1,164 @@
+# simulation/parallelPlanner.py
+
+from map import CompiledGraph
+from search import kernels
+from search import DStarLite
+from utils import HeuristicTable, Landmarks
+
+from concurrent.futures import ProcessPoolExecutor
+
+import os
+
+# Planeamento em paralelo das zonas normais: cada processo liga-se ao grafo compilado em
+# memória partilhada (sem serializar o grafo networkx) e calcula, para um lote de zonas normais,
+# o melhor caminho a partir das zonas de suporte, pela mesma ordem e com o mesmo critério da
+# simulação sequencial.
+
+PARALLEL_ALGORITHMS = ("BFS", "DFS", "IDDFS", "UCS", "Greedy", "AStar", "BidirectionalUCS", "BidirectionalAStar", "DStarLite")
+
+# Estado de cada processo (preenchido por init_worker)
+_worker = {}
+
+def init_worker(descriptor, algorithm_type, landmark_nodes):
+    """
+    Inicializa um processo: liga-se ao grafo compilado em memória partilhada e prepara as heurísticas.
+
+    :param descriptor: Descritor devolvido por CompiledGraph.to_shared_memory.
+    :param algorithm_type: Algoritmo a usar.
+    :param landmark_nodes: Landmarks da heurística ALT (o array de distâncias está na memória
+                           partilhada) ou None.
+    """
+    compiled, block, arrays = CompiledGraph.from_shared_memory(descriptor)
+
+    landmarks = None
+    if landmark_nodes is not None:
+        landmarks = Landmarks.from_distances(compiled.names, landmark_nodes, arrays["landmark_distances"])
+
+    heuristic_table = HeuristicTable.from_compiled(
+        compiled,
+        # A Greedy e o D* Lite usam sempre a distância em linha reta; o A* usa a ALT se houver landmarks
+        kernel="alt" if landmarks is not None and algorithm_type not in ("Greedy", "DStarLite") else "haversine",
+        landmarks=landmarks
+    )
+
+    _worker.clear()
+    _worker.update({
+        "compiled": compiled,
+        "block": block,
+        "algorithm_type": algorithm_type,
+        "heuristic_table": heuristic_table,
+        # O planeador incremental reutiliza a procura de cada zona normal entre as zonas de suporte
+        "planner": DStarLite.from_compiled(compiled, heuristic_table) if algorithm_type == "DStarLite" else None
+    })
+
+def run_kernel(algorithm_type, compiled, heuristic_table, start, goal, planner=None):
+    """
+    Executa o kernel de procura correspondente ao algoritmo.
+
+    :param planner: Planeador DStarLite do processo (usado pelo algoritmo "DStarLite").
+    :return: Tuplo (caminho de ids ou None, custo).
+    """
+    if algorithm_type == "BFS":
+        return kernels.bfs(compiled, start, goal)
+    if algorithm_type == "DFS":
+        return kernels.dfs(compiled, start, goal)
+    if algorithm_type == "IDDFS":
+        return kernels.iterative_deepening_dfs(compiled, start, goal)
+    if algorithm_type == "UCS":
+        return kernels.ucs(compiled, start, goal)
+    if algorithm_type == "Greedy":
+        return kernels.greedy(compiled, start, goal, heuristic_table.goal_vector(compiled.names[goal]))
+    if algorithm_type == "AStar":
+        return kernels.astar(compiled, start, goal, heuristic_table.goal_vector(compiled.names[goal]))
+    if algorithm_type == "BidirectionalUCS":
+        path, cost, _ = kernels.bidirectional(compiled, start, goal)
+        return path, cost
+    if algorithm_type == "BidirectionalAStar":
+        potentials = heuristic_table.potential_vector(compiled.names[start], compiled.names[goal])
+        path, cost, _ = kernels.bidirectional(compiled, start, goal, potentials)
+        return path, cost
+    if algorithm_type == "DStarLite":
+        return planner.query(start, goal)
+    raise ValueError("Algoritmo inválido ou não implementado.")
+
+def plan_zones(support_ids, normal_ids):
+    """
+    Calcula, num processo, o melhor caminho de cada zona normal de um lote.
+
+    :param support_ids: Ids das zonas de suporte (pela ordem da simulação).
+    :param normal_ids: Ids das zonas normais do lote (por ordem de urgência).
+    :return: Lista de tuplos (id da zona normal, caminho de ids ou None, custo arredondado,
+             mensagens de erro), pela ordem do lote.
+    """
+    compiled = _worker["compiled"]
+    algorithm_type = _worker["algorithm_type"]
+    heuristic_table = _worker["heuristic_table"]
+    planner = _worker["planner"]
+
+    results = []
+    for normal_id in normal_ids:
+        best_path = None
+        best_cost = float('inf')
+        errors = []
+        for support_id in support_ids:
+            try:
+                path, cost = run_kernel(algorithm_type, compiled, heuristic_table, support_id, normal_id, planner)
+                cost = round(cost, 2)
+                if cost < best_cost:
+                    best_path = path
+                    best_cost = cost
+            except Exception as e:
+                errors.append(
+                    f"Erro ao calcular caminho de {compiled.names[support_id]} para {compiled.names[normal_id]}: {e}"
+                )
+        results.append((normal_id, best_path, best_cost, errors))
+    return results
+
+def plan_in_parallel(compiled, algorithm_type, support_zones, normal_zones, workers=None, landmarks=None, batch_size=None):
+    """
+    Calcula o melhor caminho de cada zona normal, distribuindo as zonas normais por vários processos.
+
+    :param compiled: Grafo compilado.
+    :param algorithm_type: Algoritmo a usar.
+    :param support_zones: Lista de zonas de suporte.
+    :param normal_zones: Lista de zonas normais (por ordem de urgência).
+    :param workers: Número de processos (por omissão, o número de CPUs).
+    :param landmarks: Landmarks da heurística ALT (usados pelo A*) ou None.
+    :param batch_size: Número de zonas normais por tarefa (por omissão, cerca de 4 lotes por processo).
+    :return: Lista de tuplos (zona normal, caminho de ids ou None, custo, mensagens de erro),
+             pela ordem de normal_zones.
+    """
+    if algorithm_type not in PARALLEL_ALGORITHMS:
+        raise ValueError("Algoritmo inválido ou não implementado.")
+
+    workers = workers or os.cpu_count() or 1
+    support_ids = [compiled.index[zone] for zone in support_zones]
+    normal_ids = [compiled.index[zone] for zone in normal_zones]
+    if batch_size is None:
+        batch_size = max(1, -(-len(normal_ids) // (workers * 4)))
+    batches = [normal_ids[i:i + batch_size] for i in range(0, len(normal_ids), batch_size)]
+
+    # As distâncias dos landmarks também vão para a memória partilhada, alinhadas com os ids
+    extra_arrays = {}
+    landmark_nodes = None
+    if landmarks is not None and algorithm_type in ("AStar", "BidirectionalAStar"):
+        columns = [landmarks.index[name] for name in compiled.names]
+        extra_arrays["landmark_distances"] = landmarks.distances[:, columns]
+        landmark_nodes = list(landmarks.landmarks)
+
+    block, descriptor = compiled.to_shared_memory(extra_arrays)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=init_worker,
+            initargs=(descriptor, algorithm_type, landmark_nodes)
+        ) as executor:
+            # executor.map devolve os lotes pela ordem de submissão (ordem de urgência)
+            batch_results = executor.map(plan_zones, [support_ids] * len(batches), batches)
+            return [
+                (compiled.names[normal_id], path, cost, errors)
+                for results in batch_results
+                for normal_id, path, cost, errors in results
+            ]
+    finally:
+        block.close()
+        block.unlink()
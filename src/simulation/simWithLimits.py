@@ -3,28 +3,48 @@
 from search import UCS
 from search import GreedyBestFirstSearch
 from search import AStar
+from search import BidirectionalUCS
+from search import BidirectionalAStar
+from search import DStarLite
 from search import DFS
 from search import BFS
+from search import SearchStats
 from models import Helicopter, Truck, Car, Vehicle
-from utils import writeToJson
+from utils import ResultsSink, TravelTimeTable
+from utils import build_result, finish_results, results_dir
+from utils import calculate_bounded_vehicle_combination
+from utils import RouteCache
+from utils import span, traced
+from map import graph_version
 
 from datetime import datetime, timedelta
 from collections import defaultdict
 from simulation import Simulation
+from simulation.fleetInventory import FleetInventory
+from simulation.eventScheduler import EventScheduler, DEPART, ARRIVE, RETURN, REFUEL
 
 import json
 
 class SimulationWithLimits:
-    def __init__(self, graph, algorithm_type):
+    def __init__(self, graph, algorithm_type, landmarks=None, compiled_graph=None, output_dir="results", route_cache=None, collect_stats=False):
         self.graph = graph
         self.algorithm_type = algorithm_type
+        self.landmarks = landmarks  # Se indicados, o AStar usa a heurística ALT
+        self.compiled_graph = compiled_graph  # Se indicado, as procuras usam os kernels CSR
+        self.output_dir = output_dir  # Pasta base onde são escritos os resultados
         self.support_zones = []
         self.normal_zones = []
         self.start_time = datetime.now()
         self.current_time = self.start_time  # Tempo atual simulado
         self.vehicle_refill_time = timedelta(hours=2)  # Tempo para reabastecer veículos
-        self.vehicle_availability = defaultdict(list)
-
+        self.fleet_inventory = None  # Stock de veículos de cada zona de suporte (FleetInventory)
+        self.scheduler = None  # Fila de eventos da última simulação (EventScheduler)
+        # Rotas já calculadas (podem ser partilhadas entre simulações sobre o mesmo grafo)
+        self.route_cache = route_cache if route_cache is not None else RouteCache()
+        # Contadores de trabalho das procuras (apenas com collect_stats; as rotas em cache não contam)
+        self.search_stats = SearchStats() if collect_stats else None
+
+    @traced()
     def initialize_zones(self):
         """
         Inicializa as zonas de suporte e normais e popula os veículos disponíveis.
@@ -39,22 +59,9 @@ class SimulationWithLimits:
         ]
         self.organize_zones_by_urgency()
         
-        for zone in self.support_zones:
-            vehicles_data = self.graph.nodes[zone].get('vehicles', [])
-            for vehicle_data in vehicles_data:
-                for _ in range(vehicle_data['available']):
-                    if vehicle_data['type'] == 'truck':
-                        vehicle = Truck(vehicle_data['id'])
-                    elif vehicle_data['type'] == 'car':
-                        vehicle = Car(vehicle_data['id'])
-                    elif vehicle_data['type'] == 'helicopter':
-                        vehicle = Helicopter(vehicle_data['id'])
-                    else:
-                        continue
-                    # Adicionar atributo de disponibilidade inicial
-                    vehicle.initial_available = vehicle_data['available']
-                    self.vehicle_availability[zone].append(vehicle)
+        self.fleet_inventory = FleetInventory(self.graph, self.support_zones)
 
+    @traced()
     def organize_zones_by_urgency(self):
         """
         Organiza as zonas normais por ordem de urgência, considerando prioridade e tempo crítico.
@@ -84,181 +91,276 @@ class SimulationWithLimits:
         # Ordenar as zonas normais pela urgência (decrescente)
         self.normal_zones.sort(key=calculate_urgency, reverse=True)
 
-    
-    
-    def replenish_vehicles(self):
+    def get_available_counts(self, support_zone):
         """
-        Reabastece os veículos e restaura a disponibilidade inicial em todas as zonas de suporte.
+        Conta as unidades disponíveis de cada tipo de veículo numa zona de suporte.
+
+        :param support_zone: Zona de suporte.
+        :return: Dicionário {id do tipo de veículo: unidades disponíveis}.
         """
-        for zone, vehicles in self.vehicle_availability.items():
-            initial_counts = defaultdict(int)
-
-            # Contar veículos disponíveis atualmente
-            for vehicle in vehicles:
-                initial_counts[vehicle.id] += 1
-
-            # Restaurar combustível e garantir que o número inicial esteja presente
-            for vehicle in vehicles:
-                vehicle.current_fuel = vehicle.fuel_capacity  # Reabastece o tanque
-
-            # Garantir que os valores iniciais sejam repostos
-            zone_data = self.graph.nodes[zone].get('vehicles', [])
-            for vehicle_data in zone_data:
-                vehicle_type = vehicle_data['id']
-                initial_available = vehicle_data['available']
-                while initial_counts[vehicle_type] < initial_available:
-                    if vehicle_data['type'] == 'truck':
-                        new_vehicle = Truck(vehicle_type)
-                    elif vehicle_data['type'] == 'car':
-                        new_vehicle = Car(vehicle_type)
-                    elif vehicle_data['type'] == 'helicopter':
-                        new_vehicle = Helicopter(vehicle_type)
-                    else:
-                        continue
-                    new_vehicle.current_fuel = new_vehicle.fuel_capacity
-                    vehicles.append(new_vehicle)
-                    initial_counts[vehicle_type] += 1
+        return self.fleet_inventory.counts(support_zone)
+
+    def get_fleet_types(self, support_zone):
+        """
+        Obtém um veículo de cada tipo da frota de uma zona de suporte, pela ordem dos dados do mapa.
+
+        :param support_zone: Zona de suporte.
+        :return: Lista de instâncias de veículos (uma por tipo).
+        """
+        vehicle_mapping = {
+            'truck': Truck,
+            'car': Car,
+            'helicopter': Helicopter
+        }
+
+        return [
+            vehicle_mapping[vehicle_data['type']](vehicle_data['id'])
+            for vehicle_data in self.graph.nodes[support_zone].get('vehicles', []) or []
+            if vehicle_data['type'] in vehicle_mapping
+        ]
+
+    def get_fleet_capacity(self, support_zone):
+        """
+        Calcula a capacidade total da frota completa (stock inicial) de uma zona de suporte.
+
+        :param support_zone: Zona de suporte.
+        :return: Capacidade total da frota.
+        """
+        vehicles_data = self.graph.nodes[support_zone].get('vehicles', []) or []
+        available = {vehicle_data['id']: vehicle_data['available'] for vehicle_data in vehicles_data}
+        return sum(vehicle.capacity * available[vehicle.id] for vehicle in self.get_fleet_types(support_zone))
 
-    def calculate_best_paths(self):
+    @traced()
+    def calculate_best_paths(self, results_sink=None):
         """
         Calcula os melhores caminhos de cada zona de suporte para as zonas normais.
+
+        A simulação é guiada por eventos: cada envio agenda a partida, a chegada à zona normal,
+        o regresso de cada tipo de veículo à zona de suporte (à sua velocidade) e o fim do
+        reabastecimento, momento em que esses veículos voltam ao stock. Só as zonas à espera de
+        veículos da zona de suporte que os recebeu são replaneadas.
+
+        A combinação de veículos é escolhida já limitada ao stock atual de cada zona de suporte.
+        Uma zona cuja procura excede a frota completa de todas as zonas de suporte com caminho até
+        ela é servida com entregas parciais à medida que os veículos ficam disponíveis.
+
+        :param results_sink: ResultsSink onde o registo de cada zona é escrito assim que a zona fica
+                             servida (e, no fim, o das zonas servidas só em parte); None para não escrever.
+        :return: Dicionário {zona normal: caminho, custo, veículos usados e data/hora de partida
+                 (departure_time) da primeira entrega, e lista de todas as entregas (deliveries)}.
         """
         algorithms = {
-            "DFS": DFS(self.graph),
-            "BFS": BFS(self.graph),
-            "UCS": UCS(self.graph),
-            "Greedy": GreedyBestFirstSearch(self.graph),
-            "AStar": AStar(self.graph)
+            "DFS": DFS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "IDDFS": DFS(self.graph, compiled=self.compiled_graph, iterative=True, stats=self.search_stats),
+            "BFS": BFS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "UCS": UCS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "Greedy": GreedyBestFirstSearch(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "AStar": AStar(
+                self.graph, heuristic_kernel="alt" if self.landmarks else "haversine",
+                landmarks=self.landmarks, compiled=self.compiled_graph, stats=self.search_stats
+            ),
+            "BidirectionalUCS": BidirectionalUCS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "BidirectionalAStar": BidirectionalAStar(
+                self.graph, heuristic_kernel="alt" if self.landmarks else "haversine",
+                landmarks=self.landmarks, compiled=self.compiled_graph, stats=self.search_stats
+            ),
+            "DStarLite": DStarLite(self.graph, compiled=self.compiled_graph, stats=self.search_stats)
         }
         algorithm = algorithms[self.algorithm_type]
 
-        completed_zones = []
         best_paths = {}
+        remaining_population = {
+            zone: self.graph.nodes[zone].get('population', 0) for zone in self.normal_zones
+        }
+        fleet_capacity = {zone: self.get_fleet_capacity(zone) for zone in self.support_zones}
+        reachable_capacity = {}  # Zona normal -> maior frota completa das zonas de suporte com caminho
+        fleet_types = {zone: self.get_fleet_types(zone) for zone in self.support_zones}
+        vehicle_speeds = {
+            vehicle.id: vehicle.speed for vehicles in fleet_types.values() for vehicle in vehicles
+        }
+        urgency_rank = {zone: rank for rank, zone in enumerate(self.normal_zones)}
+        # Zonas ainda por servir (uma zona sem população também recebe uma entrega)
+        pending = set(self.normal_zones)
+        travel_times = TravelTimeTable.for_graph(self.graph)
+
+        def emit(normal_zone):
+            if results_sink is not None:
+                results_sink.write(build_result(
+                    normal_zone, best_paths[normal_zone], self.graph, travel_times, self.start_time
+                ))
+
+        # Zonas normais por servir à espera de veículos de cada zona de suporte
+        waiting = defaultdict(set)
+        waiting_on = {}  # Zona normal -> zonas de suporte de que está à espera
+        self.scheduler = EventScheduler()
+
+        def get_reachable_capacity(normal_zone):
+            """
+            Obtém a maior frota completa entre as zonas de suporte com caminho até a zona normal
+            (o grafo não muda durante a simulação, pelo que é calculada uma única vez por zona).
+            """
+            capacity = reachable_capacity.get(normal_zone)
+            if capacity is None:
+                capacity = max((
+                    fleet_capacity[support_zone] for support_zone in self.support_zones
+                    if self.route_cache.search(
+                        self.algorithm_type, algorithm, support_zone, normal_zone, graph_version(self.graph)
+                    )[0] is not None
+                ), default=0)
+                reachable_capacity[normal_zone] = capacity
+            return capacity
+
+        def dispatch(normal_zone):
+            with span("SimulationWithLimits.plan_zone", zone=normal_zone, time=self.current_time):
+                plan_zone(normal_zone)
+
+        def plan_zone(normal_zone):
+            """
+            Envia veículos para uma zona normal enquanto houver stock que cubra (parte d)a procura.
+            Se a procura não ficar coberta, a zona fica à espera das zonas de suporte com caminho.
+            """
+            for support_zone in waiting_on.pop(normal_zone, ()):
+                waiting[support_zone].discard(normal_zone)
 
-        while len(completed_zones) < len(self.normal_zones):
-            max_delivery_time = timedelta(0)  # Armazena o maior tempo de entrega deste ciclo
-
-            for normal_zone in self.normal_zones:
-                if normal_zone in completed_zones:
-                    continue
+            while normal_zone in pending:
+                demand = remaining_population[normal_zone]
+                # Entregas parciais só quando nenhuma frota completa com caminho cobre a procura
+                allow_partial = demand > get_reachable_capacity(normal_zone)
 
                 best_path = None
                 best_cost = float('inf')
                 best_vehicles = []
+                best_support = None
+                best_covered = 0
+                candidates = []  # Zonas de suporte que ainda podem vir a servir a zona
 
                 for support_zone in self.support_zones:
-                    vehicles = self.vehicle_availability[support_zone]
-                    if not vehicles:
+                    if not self.fleet_inventory.has_vehicles(support_zone):
+                        candidates.append(support_zone)
                         continue
 
-                    path, cost, vehicles_used = algorithm.search(support_zone, normal_zone)
-                    if cost < best_cost and self.check_vehicle_availability(vehicles, vehicles_used):
+                    path, cost, _ = self.route_cache.search(
+                        self.algorithm_type, algorithm, support_zone, normal_zone, graph_version(self.graph)
+                    )
+                    if path is None:
+                        continue  # Sem caminho (o grafo não muda durante a simulação)
+                    candidates.append(support_zone)
+                    if cost >= best_cost:
+                        continue
+
+                    # Melhor combinação viável com o stock atual da zona de suporte
+                    vehicles_used, covered = calculate_bounded_vehicle_combination(
+                        demand, fleet_types[support_zone], self.get_available_counts(support_zone),
+                        allow_partial=allow_partial
+                    )
+                    if vehicles_used:
                         best_path = path
                         best_cost = cost
                         best_vehicles = vehicles_used
-
-                if best_path:
-                    # Atualizar disponibilidade e verificar sucesso
-                    if not self.update_vehicle_availability(support_zone, best_vehicles):
-                        continue  # Se veículos insuficientes, passa para a próxima iteração
-                    delivery_time = self.calculate_delivery_time(best_cost, best_vehicles)
-                    max_delivery_time = max(max_delivery_time, delivery_time - self.current_time)
-
-                    best_paths[normal_zone] = {
-                        "path": best_path,
-                        "cost": best_cost,
-                        "vehicles": best_vehicles
-                    }
-                    completed_zones.append(normal_zone)
-
-            # Incrementar o tempo atual com o maior tempo de entrega do ciclo
-            self.current_time += max_delivery_time
-            self.replenish_vehicles()
+                        best_support = support_zone
+                        best_covered = covered
+
+                if not best_path or not self.update_vehicle_availability(best_support, best_vehicles):
+                    waiting_on[normal_zone] = candidates
+                    for support_zone in candidates:
+                        waiting[support_zone].add(normal_zone)
+                    return
+
+                # Cada entrega guarda o seu caminho, veículos e partida: a chegada é contada a partir
+                # da partida da entrega, não do início
+                delivery = {
+                    "support": best_support,
+                    "path": best_path,
+                    "cost": best_cost,
+                    "vehicles": best_vehicles,
+                    "departure_time": self.current_time
+                }
+                if normal_zone in best_paths:
+                    best_paths[normal_zone]["deliveries"].append(delivery)
+                else:
+                    best_paths[normal_zone] = {**delivery, "deliveries": [delivery]}
+                remaining_population[normal_zone] = demand - best_covered
+                if remaining_population[normal_zone] <= 0:
+                    pending.discard(normal_zone)
+                    emit(normal_zone)
+
+                self.scheduler.schedule(self.current_time, DEPART, {
+                    "support": best_support, "zone": normal_zone, "cost": best_cost, "vehicles": best_vehicles
+                })
+
+        # Planeamento inicial de todas as zonas, por ordem de urgência
+        with span("SimulationWithLimits.initial_plan"):
+            for normal_zone in self.normal_zones:
+                dispatch(normal_zone)
+
+        while self.scheduler:
+            self.current_time, kind, event = self.scheduler.pop()
+
+            if kind == DEPART:
+                # O grupo viaja à velocidade do veículo mais lento
+                arrival_time = self.calculate_delivery_time(event["cost"], event["vehicles"], vehicle_speeds)
+                self.scheduler.schedule(arrival_time, ARRIVE, event)
+            elif kind == ARRIVE:
+                # Cada tipo de veículo regressa à sua velocidade
+                for vehicle in event["vehicles"]:
+                    return_time = self.current_time + timedelta(hours=event["cost"] / vehicle_speeds[vehicle["id"]])
+                    self.scheduler.schedule(return_time, RETURN, {"support": event["support"], "vehicles": [vehicle]})
+            elif kind == RETURN:
+                self.scheduler.schedule(self.current_time + self.vehicle_refill_time, REFUEL, event)
+            elif kind == REFUEL:
+                # Ciclo de replaneamento: os veículos voltam ao stock e as zonas à espera são replaneadas
+                support_zone = event["support"]
+                with span("SimulationWithLimits.refuel_cycle", support=support_zone, time=self.current_time):
+                    self.fleet_inventory.release(support_zone, event["vehicles"])
+                    for normal_zone in sorted(waiting[support_zone], key=urgency_rank.get):
+                        dispatch(normal_zone)
+
+        # Sem eventos pendentes, as zonas por servir nunca terão veículos suficientes
+        for normal_zone in self.normal_zones:
+            if normal_zone in pending:
+                print(f"Aviso: A zona {normal_zone} não pode ser servida por nenhuma zona de suporte.")
+                if normal_zone in best_paths:
+                    emit(normal_zone)  # Entregas parciais já feitas
 
         return best_paths
     
-    def calculate_delivery_time(self, distance, vehicles):
+    def calculate_delivery_time(self, distance, vehicles, vehicle_speeds):
         """
         Calcula o tempo estimado de entrega com base na velocidade do veículo mais lento.
-        """
-        vehicle_mapping = {
-            'truck': Truck,
-            'car': Car,
-            'helicopter': Helicopter
-        }
-
-        # Lista para armazenar velocidades de veículos após a criação das instâncias
-        vehicle_speeds = []
-
-        for vehicle_data in vehicles:
-            vehicle_type = vehicle_data['id']
-            quantity = vehicle_data.get('quantity', 1)  # Quantidade de veículos
 
-            # Criar instâncias dos veículos
-            if vehicle_type in vehicle_mapping:
-                for _ in range(quantity):
-                    vehicle_instance = vehicle_mapping[vehicle_type](vehicle_type)
-                    vehicle_speeds.append(vehicle_instance.speed)
-
-        if not vehicle_speeds:
+        :param distance: Distância do caminho (km).
+        :param vehicles: Veículos enviados (lista de {id, quantity}).
+        :param vehicle_speeds: Dicionário {id do tipo de veículo: velocidade (km/h)}.
+        :return: Data/hora de chegada.
+        """
+        speeds = [vehicle_speeds[vehicle['id']] for vehicle in vehicles if vehicle['id'] in vehicle_speeds]
+        if not speeds:
             raise ValueError("Nenhum veículo válido fornecido para cálculo do tempo de entrega.")
 
-        # Encontrar a menor velocidade entre os veículos
-        slowest_speed = min(vehicle_speeds)
-
-        # Calcular o tempo de viagem com base na menor velocidade
-        travel_time_hours = distance / slowest_speed
-        travel_time = timedelta(hours=travel_time_hours)
-
-        # Retornar o tempo estimado de entrega
-        return self.current_time + travel_time
-    
-    def check_vehicle_availability(self, available_vehicles, required_vehicles):
-        """
-        Verifica se os veículos necessários estão disponíveis na zona de suporte.
-        """
-        available_counts = defaultdict(int)
-        for vehicle in available_vehicles:
-            # Suporta tanto dicionários quanto instâncias de Vehicle
-            vehicle_id = vehicle.id if isinstance(vehicle, Vehicle) else vehicle['id']
-            available_counts[vehicle_id] += vehicle.get('available', 0) if isinstance(vehicle, dict) else vehicle.available
-
-        for vehicle in required_vehicles:
-            # Suporta tanto dicionários quanto instâncias de Vehicle
-            vehicle_id = vehicle.id if isinstance(vehicle, Vehicle) else vehicle['id']
-            required_quantity = vehicle.get('quantity', 1) if isinstance(vehicle, dict) else 1
-            if available_counts[vehicle_id] < required_quantity:
-                return False
-            
-        return True
+        # O grupo viaja à velocidade do veículo mais lento
+        return self.current_time + timedelta(hours=distance / min(speeds))
     
     def update_vehicle_availability(self, support_zone, used_vehicles):
         """
         Atualiza a disponibilidade dos veículos após um envio.
         Retorna False se os veículos forem insuficientes, True caso contrário.
         """
-        for used_vehicle in used_vehicles:
-            vehicle_id = used_vehicle.id if isinstance(used_vehicle, Vehicle) else used_vehicle.get('id')
-            required_quantity = used_vehicle.get('quantity', 1) if isinstance(used_vehicle, dict) else 1
-            used_count = 0
-
-            # Verificar veículos disponíveis na zona de suporte
-            for vehicle in list(self.vehicle_availability[support_zone]):
-                if vehicle.id == vehicle_id:
-                    self.vehicle_availability[support_zone].remove(vehicle)
-                    used_count += 1
-                    if used_count == required_quantity:
-                        break
-
-            # Se não conseguir encontrar veículos suficientes
-            if used_count < required_quantity:
-                return False
-        return True
+        used_vehicles = [
+            {'id': vehicle.id, 'quantity': 1} if isinstance(vehicle, Vehicle) else vehicle
+            for vehicle in used_vehicles
+        ]
+        return self.fleet_inventory.reserve(support_zone, used_vehicles)
 
+    @traced()
     def start_simulation(self):
         """
         Inicia a simulação.
         """
         self.initialize_zones()
-        results = self.calculate_best_paths()
-        writeToJson(results, self.graph, self.algorithm_type, 1)
+        # Os resultados são escritos à medida que as zonas ficam servidas
+        with ResultsSink(results_dir(self.output_dir, 1), self.algorithm_type) as results_sink:
+            self.calculate_best_paths(results_sink)
+            stats = {"route_cache": self.route_cache.stats()}
+            if self.search_stats is not None:
+                stats["search"] = self.search_stats.as_dict()
+            finish_results(results_sink, stats=stats)
@@ -5,31 +5,57 @@ from search import BFS
 from search import UCS
 from search import GreedyBestFirstSearch
 from search import AStar
+from search import BidirectionalUCS
+from search import BidirectionalAStar
+from search import DStarLite
+from search import MultiSourceSearch
+from search import kernels
+from search import SearchStats
+from map import CompiledGraph
+from simulation.parallelPlanner import plan_in_parallel
 from models import Truck, Car, Helicopter
 from utils import writeToJson
+from utils import span, traced
 
 from datetime import datetime, timedelta
 
 import json
 
 class Simulation:
-    def __init__(self, graph, algorithm_type):
+    def __init__(self, graph, algorithm_type, multi_source=False, landmarks=None, compiled_graph=None, output_dir="results", workers=None, collect_stats=False):
         """
         Inicializa a simulação.
 
         :param graph: Grafo gerado a partir dos dados JSON.
         :param algorithm_type: String indicando o tipo de algoritmo escolhido.
+        :param multi_source: Se True, usa o planeamento multi-fonte (apenas UCS e AStar),
+                             em vez de uma procura por cada par (zona de suporte, zona normal).
+        :param landmarks: Landmarks pré-calculados; se indicados, o AStar usa a heurística ALT.
+        :param compiled_graph: Grafo compilado (CSR); se indicado, as procuras usam os kernels sobre arrays.
+        :param output_dir: Pasta base onde são escritos os resultados.
+        :param workers: Número de processos para planear as zonas normais em paralelo
+                        (None ou 1 para o planeamento sequencial).
+        :param collect_stats: Se True, as procuras recolhem contadores de trabalho (search_stats),
+                              escritos em stats_<algoritmo>.json junto dos resultados (apenas no
+                              planeamento sequencial por pares).
         """
         self.graph = graph
         self.algorithm_type = algorithm_type
+        self.multi_source = multi_source
+        self.landmarks = landmarks
+        self.compiled_graph = compiled_graph
+        self.output_dir = output_dir
+        self.workers = workers
+        self.search_stats = SearchStats() if collect_stats else None
         self.support_zones= []
         self.supply_zones = []
         self.normal_zones = []
         self.start_time = datetime.now()
 
-    def start(self):
+    @traced()
+    def initialize_zones(self):
         """
-        Executa a lógica principal da simulação.
+        Inicializa as zonas de suporte e normais (estas ordenadas por urgência).
         """
 
         # Obter support zones
@@ -46,26 +72,50 @@ class Simulation:
 
         self.organize_zones_by_urgency()
 
+    @traced()
+    def start(self):
+        """
+        Executa a lógica principal da simulação.
+        """
+        self.initialize_zones()
 
         # Calcular o melhor caminho para cada zona normal
         best_paths = self.calculate_best_paths()
 
-        writeToJson(best_paths, self.graph, self.algorithm_type, 0)
+        stats = {"search": self.search_stats.as_dict()} if self.search_stats is not None else None
+        writeToJson(best_paths, self.graph, self.algorithm_type, 0, self.output_dir, stats=stats, reference_time=self.start_time)
 
 
 
+    @traced()
     def calculate_best_paths(self):
         """
         Calcula o melhor caminho de cada zona normal para uma zona de suporte.
 
         :return: Dicionário com os melhores caminhos, custos associados e veículos utilizados para cada zona normal.
         """
+        if self.multi_source:
+            return self.calculate_best_paths_multi_source()
+
+        if self.workers is not None and self.workers > 1:
+            return self.calculate_best_paths_parallel()
+
         algorithms = {
-            "BFS": BFS(self.graph),
-            "DFS": DFS(self.graph),
-            "UCS": UCS(self.graph),
-            "Greedy": GreedyBestFirstSearch(self.graph),
-            "AStar": AStar(self.graph)
+            "BFS": BFS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "DFS": DFS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "IDDFS": DFS(self.graph, compiled=self.compiled_graph, iterative=True, stats=self.search_stats),
+            "UCS": UCS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "Greedy": GreedyBestFirstSearch(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "AStar": AStar(
+                self.graph, heuristic_kernel="alt" if self.landmarks else "haversine",
+                landmarks=self.landmarks, compiled=self.compiled_graph, stats=self.search_stats
+            ),
+            "BidirectionalUCS": BidirectionalUCS(self.graph, compiled=self.compiled_graph, stats=self.search_stats),
+            "BidirectionalAStar": BidirectionalAStar(
+                self.graph, heuristic_kernel="alt" if self.landmarks else "haversine",
+                landmarks=self.landmarks, compiled=self.compiled_graph, stats=self.search_stats
+            ),
+            "DStarLite": DStarLite(self.graph, compiled=self.compiled_graph, stats=self.search_stats)
         }
 
         if self.algorithm_type not in algorithms or algorithms[self.algorithm_type] is None:
@@ -76,45 +126,152 @@ class Simulation:
         best_paths = {}
 
         for normal_zone in self.normal_zones:
-            best_path = None
-            best_cost = float('inf')
-            best_vehicles = []
+            with span("Simulation.plan_zone", zone=normal_zone):
+                best_path = self.plan_zone(algorithm, normal_zone)
+            if best_path is not None:
+                best_paths[normal_zone] = best_path
+
+        return best_paths
+
+    def plan_zone(self, algorithm, normal_zone):
+        """
+        Calcula o melhor caminho de uma zona normal, procurando a partir de cada zona de suporte.
+
+        :param algorithm: Instância do algoritmo de procura.
+        :param normal_zone: Zona normal.
+        :return: Dicionário com o caminho, o custo e os veículos usados, ou None se não houver caminho.
+        """
+        best_path = None
+        best_cost = float('inf')
+        best_vehicles = []
+
+        # Obter o nó do grafo correspondente à zona normal
+        normal_node = self.graph.nodes.get(normal_zone)
+        if not normal_node:
+            print(f"Erro: A zona normal {normal_zone} não foi encontrada no grafo.")
+            return None
+
+        for support_zone in self.support_zones:
+            # Obter o nó do grafo correspondente à zona de suporte
+            support_node = self.graph.nodes.get(support_zone)
+            if not support_node:
+                print(f"Erro: A zona de suporte {support_zone} não foi encontrada no grafo.")
+                continue
+
+            try:
+                path, cost, vehicles = algorithm.search(support_zone, normal_zone)
+                cost = round(cost, 2)
+                if cost < best_cost:
+                    best_path = path
+                    best_cost = cost
+                    best_vehicles = vehicles
+            except Exception as e:
+                print(f"Erro ao calcular caminho de {support_zone} para {normal_zone}: {e}")
+
+        if best_path is None:
+            return None
+        return {
+            "path": best_path,
+            "cost": best_cost,
+            "vehicles": [{"id": v["id"], "quantity": v["quantity"]} for v in best_vehicles]
+        }
+
+    @traced()
+    def calculate_best_paths_parallel(self):
+        """
+        Calcula o melhor caminho de cada zona normal distribuindo as zonas normais por vários
+        processos, que usam o grafo compilado em memória partilhada. Os resultados são juntados
+        por ordem de urgência, pelo que coincidem com os do planeamento sequencial.
+
+        :return: Dicionário no mesmo formato de calculate_best_paths.
+        """
+        if self.compiled_graph is None:
+            self.compiled_graph = CompiledGraph.from_graph(self.graph)
 
-            # Obter o nó do grafo correspondente à zona normal
-            normal_node = self.graph.nodes.get(normal_zone)
-            if not normal_node:
+        results = plan_in_parallel(
+            self.compiled_graph, self.algorithm_type, self.support_zones, self.normal_zones,
+            workers=self.workers, landmarks=self.landmarks
+        )
+
+        best_paths = {}
+        for normal_zone, path, cost, errors in results:
+            for error in errors:
+                print(error)
+            if path is None:
+                continue
+
+            # A combinação de veículos depende apenas da zona de suporte e da população da zona normal
+            path, _, vehicles = kernels.build_search_result(
+                self.graph, self.compiled_graph, self.compiled_graph.names[path[0]], normal_zone, path, cost
+            )
+            best_paths[normal_zone] = {
+                "path": path,
+                "cost": cost,
+                "vehicles": [{"id": v["id"], "quantity": v["quantity"]} for v in vehicles]
+            }
+
+        return best_paths
+
+    @traced()
+    def calculate_best_paths_multi_source(self):
+        """
+        Calcula o melhor caminho de cada zona normal para a zona de suporte mais próxima,
+        ligando todas as zonas de suporte a uma super-fonte virtual.
+
+        Com UCS é feita uma única procura para todas as zonas normais; com AStar é feita uma
+        procura inversa por zona normal que termina na primeira zona de suporte alcançada.
+
+        :return: Dicionário no mesmo formato de calculate_best_paths.
+        """
+        if self.algorithm_type not in ("UCS", "AStar"):
+            raise ValueError("O planeamento multi-fonte só está disponível para UCS e AStar.")
+
+        normal_zones = []
+        for normal_zone in self.normal_zones:
+            if not self.graph.nodes.get(normal_zone):
                 print(f"Erro: A zona normal {normal_zone} não foi encontrada no grafo.")
                 continue
+            normal_zones.append(normal_zone)
+
+        support_zones = []
+        for support_zone in self.support_zones:
+            if not self.graph.nodes.get(support_zone):
+                print(f"Erro: A zona de suporte {support_zone} não foi encontrada no grafo.")
+                continue
+            support_zones.append(support_zone)
 
-            for support_zone in self.support_zones:
-                # Obter o nó do grafo correspondente à zona de suporte
-                support_node = self.graph.nodes.get(support_zone)
-                if not support_node:
-                    print(f"Erro: A zona de suporte {support_zone} não foi encontrada no grafo.")
-                    continue
+        algorithm = MultiSourceSearch(self.graph, use_heuristic=(self.algorithm_type == "AStar"))
 
+        if self.algorithm_type == "UCS":
+            results = algorithm.search_all(support_zones, normal_zones)
+        else:
+            results = {}
+            for normal_zone in normal_zones:
                 try:
-                    path, cost, vehicles = algorithm.search(support_zone, normal_zone)
-                    cost = round(cost, 2)
-                    if cost < best_cost:
-                        best_path = path
-                        best_cost = cost
-                        best_vehicles = vehicles
+                    results[normal_zone] = algorithm.search(support_zones, normal_zone)
                 except Exception as e:
-                    print(f"Erro ao calcular caminho de {support_zone} para {normal_zone}: {e}")
+                    print(f"Erro ao calcular caminho para {normal_zone}: {e}")
 
-            if best_path is not None:
-                best_paths[normal_zone] = {
-                    "path": best_path,
-                    "cost": best_cost,
-                    "vehicles": [{"id": v["id"], "quantity": v["quantity"]} for v in best_vehicles]
-                }
+        best_paths = {}
 
+        # Manter a ordem de urgência das zonas normais
+        for normal_zone in normal_zones:
+            if normal_zone not in results:
+                continue
 
-        return best_paths
+            path, cost, vehicles = results[normal_zone]
+            if path is None:
+                continue
 
+            best_paths[normal_zone] = {
+                "path": path,
+                "cost": round(cost, 2),
+                "vehicles": [{"id": v["id"], "quantity": v["quantity"]} for v in vehicles]
+            }
+
+        return best_paths
 
-    
+    @traced()
     def organize_zones_by_urgency(self):
         """
         Organiza as zonas normais por ordem de urgência, considerando prioridade e tempo crítico.
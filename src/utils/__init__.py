@@ -1,3 +1,8 @@
-from .vehicles import calculate_vehicle_combination
-from .heuristics import straight_line_distance, heuristic
-from .writeToJson import writeToJson
\ No newline at end of file
+from .vehicles import calculate_vehicle_combination, calculate_bounded_vehicle_combination
+from .heuristics import straight_line_distance, heuristic, HeuristicTable
+from .writeToJson import writeToJson, build_result, finish_results, results_dir
+from .landmarks import Landmarks, landmarks_path, expansion_report
+from .routeCache import RouteCache
+from .travelTimes import TravelTimeTable
+from .resultsSink import ResultsSink, ResultsReader
+from .tracing import Tracer, tracer, span, traced
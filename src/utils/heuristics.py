@@ -1,6 +1,8 @@
 # utils/heuristics.py
 
-from geopy.distance import geodesic
+from collections import OrderedDict
+
+import numpy as np
 
 def straight_line_distance(graph, node, goal):
     """
@@ -13,6 +15,7 @@ def straight_line_distance(graph, node, goal):
     """
     node_coords = (graph.nodes[node]['latitude'], graph.nodes[node]['longitude'])
     goal_coords = (graph.nodes[goal]['latitude'], graph.nodes[goal]['longitude'])
+    from geopy.distance import geodesic  # Importado apenas quando é usado
     return geodesic(node_coords, goal_coords).kilometers
     
 def heuristic(graph, node, goal):
@@ -25,4 +28,196 @@ def heuristic(graph, node, goal):
     """
     node_coords = (graph.nodes[node]['latitude'], graph.nodes[node]['longitude'])
     goal_coords = (graph.nodes[goal]['latitude'], graph.nodes[goal]['longitude'])
-    return geodesic(node_coords, goal_coords).kilometers
\ No newline at end of file
+    from geopy.distance import geodesic  # Importado apenas quando é usado
+    return geodesic(node_coords, goal_coords).kilometers
+
+# Menor raio de curvatura do elipsoide WGS-84 (raio meridional no equador, a * (1 - e^2)).
+# Uma esfera com este raio nunca sobrestima a distância geodésica, pelo que o A* continua admissível.
+MIN_EARTH_RADIUS_KM = 6378.137 * (1 - 0.00669437999014)
+
+class HeuristicTable:
+    KERNELS = ("haversine", "equirectangular", "geodesic", "alt")
+
+    def __init__(self, graph, kernel="haversine", cache_size=64, landmarks=None, nodes=None):
+        """
+        Tabela de heurísticas pré-calculadas: guarda as coordenadas dos nós em arrays NumPy e
+        calcula, numa única passagem vetorizada, a estimativa de todos os nós até um objetivo.
+        Os vetores dos objetivos mais recentes são reutilizados (LRU).
+
+        :param graph: Grafo contendo os nós.
+        :param kernel: Cálculo da distância em linha reta ("haversine", "equirectangular" ou "geodesic"),
+                       ou "alt" para usar também os limites dos landmarks.
+        :param cache_size: Número máximo de vetores de objetivos guardados.
+        :param landmarks: Instância de Landmarks (obrigatória com o kernel "alt").
+        :param nodes: Ordem dos nós nos vetores (por omissão, a ordem do grafo).
+        """
+        if kernel not in self.KERNELS:
+            raise ValueError(f"Heurística desconhecida: {kernel}. Opções: {', '.join(self.KERNELS)}.")
+        if kernel == "alt" and landmarks is None:
+            raise ValueError("A heurística ALT precisa de landmarks pré-calculados.")
+
+        self.graph = graph
+        self.kernel = kernel
+        self.cache_size = cache_size
+        self.landmarks = landmarks
+        self.nodes = nodes
+        self.cache = OrderedDict()
+        self.index = {}
+        self.latitudes = None
+        self.longitudes = None
+
+    @classmethod
+    def from_compiled(cls, compiled, kernel="haversine", cache_size=64, landmarks=None):
+        """
+        Cria uma tabela a partir das coordenadas de um grafo compilado, sem o grafo networkx
+        (ex.: nos processos de planeamento em paralelo).
+
+        :param compiled: Grafo compilado.
+        :return: Instância de HeuristicTable alinhada com os ids do grafo compilado.
+        """
+        table = cls(None, kernel=kernel, cache_size=cache_size, landmarks=landmarks, nodes=compiled.names)
+        table.index = dict(compiled.index)
+        table.latitudes = np.asarray(compiled.latitudes, dtype=np.float64)
+        table.longitudes = np.asarray(compiled.longitudes, dtype=np.float64)
+        return table
+
+    def index_is_stale(self):
+        """
+        Verifica se o índice deixou de corresponder aos nós do grafo (ou ainda não foi construído).
+        """
+        if self.graph is None:
+            return False
+        return len(self.index) != self.graph.number_of_nodes()
+
+    def build_index(self):
+        """
+        Constrói o índice nó -> posição e os arrays de coordenadas (em graus).
+        """
+        nodes = list(self.nodes) if self.nodes is not None else list(self.graph.nodes)
+        self.index = {node: position for position, node in enumerate(nodes)}
+        self.latitudes = np.array([self.graph.nodes[node]['latitude'] for node in nodes], dtype=np.float64)
+        self.longitudes = np.array([self.graph.nodes[node]['longitude'] for node in nodes], dtype=np.float64)
+        self.cache.clear()
+
+    def compute_vector(self, goal):
+        """
+        Calcula a estimativa (em quilómetros) de todos os nós até ao objetivo.
+
+        :param goal: Nó objetivo.
+        :return: Array NumPy alinhado com o índice dos nós.
+        """
+        if self.graph is not None:
+            goal_latitude = self.graph.nodes[goal]['latitude']
+            goal_longitude = self.graph.nodes[goal]['longitude']
+        else:
+            goal_latitude = float(self.latitudes[self.index[goal]])
+            goal_longitude = float(self.longitudes[self.index[goal]])
+
+        if self.kernel == "geodesic":
+            from geopy.distance import geodesic  # Importado apenas quando é usado
+            return np.array([
+                geodesic((latitude, longitude), (goal_latitude, goal_longitude)).kilometers
+                for latitude, longitude in zip(self.latitudes, self.longitudes)
+            ], dtype=np.float64)
+
+        latitudes = np.radians(self.latitudes)
+        delta_latitude = latitudes - np.radians(goal_latitude)
+        # Diferença de longitude reduzida a [-π, π[ (o caminho mais curto pode cruzar o antimeridiano)
+        delta_longitude = (np.radians(self.longitudes - goal_longitude) + np.pi) % (2 * np.pi) - np.pi
+
+        a = (np.sin(delta_latitude / 2) ** 2
+             + np.cos(latitudes) * np.cos(np.radians(goal_latitude)) * np.sin(delta_longitude / 2) ** 2)
+        haversine = 2 * MIN_EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+        if self.kernel == "alt":
+            # Máximo entre os limites dos landmarks e a distância em linha reta (ambos admissíveis)
+            alt_bounds = self.landmarks.lower_bounds(goal)
+            alt_bounds = alt_bounds[[self.landmarks.index[node] for node in self.index]]
+            return np.maximum(alt_bounds, haversine)
+
+        if self.kernel == "haversine":
+            return haversine
+
+        # Equiretangular com o cosseno da latitude mais afastada do equador. Em grandes extensões
+        # o arco ao longo do paralelo pode exceder o círculo máximo, por isso o valor é limitado
+        # pela distância haversine para nunca sobrestimar
+        max_latitude = np.maximum(np.abs(latitudes), abs(np.radians(goal_latitude)))
+        equirectangular = MIN_EARTH_RADIUS_KM * np.hypot(delta_latitude, np.cos(max_latitude) * delta_longitude)
+        return np.minimum(equirectangular, haversine)
+
+    def goal_vector(self, goal):
+        """
+        Obtém as estimativas de todos os nós até ao objetivo, usando a cache LRU.
+
+        :param goal: Nó objetivo.
+        :return: Lista de estimativas alinhada com self.index.
+        """
+        if self.index_is_stale():
+            self.build_index()
+
+        if goal in self.cache:
+            self.cache.move_to_end(goal)
+            return self.cache[goal]
+
+        values = self.compute_vector(goal).tolist()
+        self.cache[goal] = values
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return values
+
+    def estimate(self, node, goal):
+        """
+        Calcula a estimativa entre um nó e o objetivo.
+
+        :param node: Nó atual.
+        :param goal: Nó objetivo.
+        :return: Distância estimada em quilómetros.
+        """
+        return self.goal_vector(goal)[self.index[node]]
+
+    def nearest_goal_vector(self, goals):
+        """
+        Obtém, para cada nó, a estimativa até ao objetivo mais próximo de um conjunto de objetivos.
+
+        :param goals: Lista de nós objetivo.
+        :return: Lista de estimativas alinhada com self.index.
+        """
+        key = tuple(goals)
+        if self.index_is_stale():
+            self.build_index()
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        values = np.min([self.compute_vector(goal) for goal in goals], axis=0).tolist()
+        self.cache[key] = values
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return values
+
+    def potential_vector(self, start, goal):
+        """
+        Obtém o potencial médio de cada nó para o A* bidirecional:
+        p(v) = (h(v, objetivo) - h(v, início)) / 2.
+        Nós com estimativa infinita (noutra componente, com a heurística ALT) ficam com potencial 0.
+
+        :param start: Nó inicial.
+        :param goal: Nó objetivo.
+        :return: Lista de potenciais alinhada com self.index.
+        """
+        key = ("potential", start, goal)
+        if self.index_is_stale():
+            self.build_index()
+
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        with np.errstate(invalid="ignore"):
+            values = (self.compute_vector(goal) - self.compute_vector(start)) / 2
+        values = np.where(np.isfinite(values), values, 0.0).tolist()
+        self.cache[key] = values
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return values
@@ -0,0 +1,245 @@
+# utils/landmarks.py
+
+import hashlib
+import heapq
+import os
+
+import numpy as np
+
+def landmarks_path(json_path):
+    """
+    Obtém o caminho do ficheiro de landmarks guardado ao lado do ficheiro JSON do mapa.
+
+    :param json_path: Caminho para o ficheiro JSON do mapa.
+    :return: Caminho para o ficheiro de landmarks.
+    """
+    return os.path.splitext(json_path)[0] + ".landmarks.npz"
+
+def road_signature(graph):
+    """
+    Calcula uma assinatura do estado das estradas (distâncias e estradas fechadas).
+    As distâncias aos landmarks só são válidas para o estado com que foram calculadas.
+
+    :param graph: Grafo representando o mapa.
+    :return: Hash hexadecimal.
+    """
+    digest = hashlib.sha1()
+    for u, v, data in graph.edges(data=True):
+        digest.update(f"{u}|{v}|{data.get('weight', 1):.6f}|{data.get('closed', False)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+class Landmarks:
+    def __init__(self, graph, count=4):
+        """
+        Landmarks para a heurística ALT (A*, landmarks e desigualdade triangular).
+
+        :param graph: Grafo representando o mapa.
+        :param count: Número de landmarks a escolher.
+        """
+        self.graph = graph
+        self.count = count
+        self.nodes = list(graph.nodes)
+        self.index = {node: position for position, node in enumerate(self.nodes)}
+        self.landmarks = []
+        self.distances = np.empty((0, len(self.nodes)))
+        self.signature = None
+
+    @classmethod
+    def from_distances(cls, nodes, landmarks, distances, signature=None):
+        """
+        Cria landmarks a partir de distâncias já calculadas, sem o grafo (ex.: nos processos de
+        planeamento em paralelo). Apenas lower_bounds pode ser usado.
+
+        :param nodes: Lista de nós (ordem das colunas de distances).
+        :param landmarks: Lista de landmarks (ordem das linhas de distances).
+        :param distances: Array NumPy (landmarks x nós).
+        :param signature: Assinatura das estradas com que as distâncias foram calculadas.
+        :return: Instância de Landmarks.
+        """
+        instance = cls.__new__(cls)
+        instance.graph = None
+        instance.count = len(landmarks)
+        instance.nodes = list(nodes)
+        instance.index = {node: position for position, node in enumerate(instance.nodes)}
+        instance.landmarks = list(landmarks)
+        instance.distances = distances
+        instance.signature = signature
+        return instance
+
+    def shortest_distances(self, source):
+        """
+        Calcula a distância (pelas estradas abertas) de um nó a todos os outros.
+
+        :param source: Nó de origem.
+        :return: Array NumPy alinhado com self.nodes (inf para nós inalcançáveis).
+        """
+        distances = np.full(len(self.nodes), np.inf)
+        distances[self.index[source]] = 0
+        settled = set()
+        priority_queue = [(0, source)]
+
+        while priority_queue:
+            cost, current_node = heapq.heappop(priority_queue)
+            if current_node in settled:
+                continue
+            settled.add(current_node)
+
+            for neighbor, edge_data in self.graph.adj[current_node].items():
+                if edge_data.get('closed', False):  # Ignora estradas fechadas
+                    continue
+                new_cost = cost + edge_data.get('weight', 1)
+                if new_cost < distances[self.index[neighbor]]:
+                    distances[self.index[neighbor]] = new_cost
+                    heapq.heappush(priority_queue, (new_cost, neighbor))
+
+        return distances
+
+    def compute(self):
+        """
+        Escolhe os landmarks (seleção do nó mais afastado) e calcula as distâncias a partir de cada um.
+        O grafo é não dirigido, pelo que as distâncias de e para cada landmark coincidem.
+
+        :return: A própria instância.
+        """
+        self.landmarks = []
+        rows = []
+        if not self.nodes:
+            self.distances = np.empty((0, 0))
+            self.signature = road_signature(self.graph)
+            return self
+
+        # Começar pelo nó mais afastado de um nó arbitrário
+        start_distances = self.shortest_distances(self.nodes[0])
+        candidate_score = np.where(np.isfinite(start_distances), start_distances, -1.0)
+
+        while len(self.landmarks) < min(self.count, len(self.nodes)):
+            candidate = self.nodes[int(np.argmax(candidate_score))]
+            if candidate in self.landmarks:
+                break
+
+            distances = self.shortest_distances(candidate)
+            self.landmarks.append(candidate)
+            rows.append(distances)
+
+            # O próximo landmark é o nó mais afastado de todos os landmarks já escolhidos
+            # (nós de outras componentes ficam com distância infinita e são escolhidos primeiro)
+            nearest = np.min(rows, axis=0)
+            candidate_score = np.where(np.isfinite(nearest), nearest, np.finfo(np.float64).max)
+            for landmark in self.landmarks:
+                candidate_score[self.index[landmark]] = -1.0
+
+        self.distances = np.array(rows)
+        self.signature = road_signature(self.graph)
+        return self
+
+    def lower_bounds(self, goal):
+        """
+        Calcula o limite inferior ALT da distância de todos os nós até ao objetivo:
+        max sobre os landmarks de |d(L, objetivo) - d(L, nó)|.
+
+        :param goal: Nó objetivo.
+        :return: Array NumPy alinhado com self.nodes.
+        """
+        if not self.landmarks:
+            return np.zeros(len(self.nodes))
+
+        goal_distances = self.distances[:, self.index[goal]][:, np.newaxis]
+        node_finite = np.isfinite(self.distances)
+        goal_finite = np.isfinite(goal_distances)
+
+        with np.errstate(invalid="ignore"):
+            bounds = np.abs(goal_distances - self.distances)
+
+        # Ambos inalcançáveis a partir do landmark: sem informação.
+        # Apenas um inalcançável: estão em componentes diferentes (limite infinito).
+        bounds = np.where(~node_finite & ~goal_finite, 0.0, bounds)
+        bounds = np.where(node_finite != goal_finite, np.inf, bounds)
+        return bounds.max(axis=0)
+
+    def save(self, path):
+        """
+        Guarda os landmarks e as distâncias num ficheiro.
+
+        :param path: Caminho para o ficheiro (.npz).
+        """
+        np.savez(
+            path,
+            nodes=np.array(self.nodes, dtype=str),
+            landmarks=np.array(self.landmarks, dtype=str),
+            distances=self.distances,
+            signature=np.array(self.signature)
+        )
+
+    @classmethod
+    def load(cls, graph, path):
+        """
+        Carrega landmarks de um ficheiro, se forem válidos para o estado atual das estradas.
+
+        :param graph: Grafo representando o mapa.
+        :param path: Caminho para o ficheiro (.npz).
+        :return: Instância de Landmarks ou None se o ficheiro não existir ou estiver desatualizado.
+        """
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path) as data:
+            landmarks = cls(graph, count=len(data["landmarks"]))
+            if list(data["nodes"]) != landmarks.nodes or str(data["signature"]) != road_signature(graph):
+                return None
+            landmarks.landmarks = [str(landmark) for landmark in data["landmarks"]]
+            landmarks.distances = data["distances"]
+            landmarks.signature = str(data["signature"])
+        return landmarks
+
+    @classmethod
+    def load_or_compute(cls, graph, path, count=4):
+        """
+        Carrega os landmarks guardados ao lado do mapa ou calcula-os e guarda-os.
+
+        :param graph: Grafo representando o mapa.
+        :param path: Caminho para o ficheiro (.npz).
+        :param count: Número de landmarks a escolher se for necessário calculá-los.
+        :return: Instância de Landmarks.
+        """
+        landmarks = cls.load(graph, path)
+        if landmarks is None or len(landmarks.landmarks) != min(count, len(landmarks.nodes)):
+            landmarks = cls(graph, count=count).compute()
+            landmarks.save(path)
+        return landmarks
+
+def expansion_report(graph, landmarks, pairs):
+    """
+    Compara o número de nós expandidos pelo A* com a heurística geodésica e com a heurística ALT.
+
+    :param graph: Grafo representando o mapa.
+    :param landmarks: Instância de Landmarks.
+    :param pairs: Lista de pares (zona de suporte, zona normal).
+    :return: Dicionário com os totais de nós expandidos e a redução percentual.
+    """
+    from search import AStar
+
+    geodesic_search = AStar(graph, heuristic_kernel="geodesic")
+    alt_search = AStar(graph, heuristic_kernel="alt", landmarks=landmarks)
+
+    rows = []
+    for start, goal in pairs:
+        geodesic_search.search(start, goal)
+        alt_search.search(start, goal)
+        rows.append({
+            "start": start,
+            "goal": goal,
+            "geodesic_expanded": geodesic_search.expanded_nodes,
+            "alt_expanded": alt_search.expanded_nodes
+        })
+
+    geodesic_total = sum(row["geodesic_expanded"] for row in rows)
+    alt_total = sum(row["alt_expanded"] for row in rows)
+    reduction = (1 - alt_total / geodesic_total) * 100 if geodesic_total else 0.0
+
+    return {
+        "landmarks": list(landmarks.landmarks),
+        "pairs": rows,
+        "geodesic_expanded": geodesic_total,
+        "alt_expanded": alt_total,
+        "reduction_percent": round(reduction, 2)
+    }
@@ -0,0 +1,161 @@
+# utils/resultsSink.py
+
+from array import array
+
+import json
+import os
+import struct
+
+# Resultados em streaming: cada registo é acrescentado a um ficheiro JSON Lines assim que fica
+# fechado, e a posição (em bytes) de cada linha é acrescentada a um índice compacto (uint64
+# little-endian, 8 bytes por registo). Um leitor obtém o registo N lendo 8 bytes do índice e uma
+# única linha do ficheiro de dados, sem carregar o ficheiro inteiro. O JSON indentado original
+# continua disponível como exportação (export_json).
+
+INDEX_ENTRY = struct.Struct("<Q")
+
+def index_path(path):
+    """
+    Obtém o caminho do índice de um ficheiro de resultados JSON Lines.
+
+    :param path: Caminho para o ficheiro .jsonl.
+    :return: Caminho para o ficheiro .idx.
+    """
+    return os.path.splitext(path)[0] + ".idx"
+
+class ResultsSink:
+    def __init__(self, output_dir, algorithm_name):
+        """
+        Abre os ficheiros de resultados de um algoritmo (results_<algoritmo>.jsonl e .idx).
+
+        :param output_dir: Pasta dos resultados (ex.: results/limitSim).
+        :param algorithm_name: Nome do algoritmo.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.output_dir = output_dir
+        self.algorithm_name = algorithm_name.lower()
+        self.path = os.path.join(output_dir, f"results_{self.algorithm_name}.jsonl")
+        self.index_path = index_path(self.path)
+        self.file = open(self.path, "wb")
+        self.index_file = open(self.index_path, "wb")
+        self.offset = 0
+        self.count = 0
+
+    def write(self, record):
+        """
+        Acrescenta um registo. A linha é escrita antes da entrada do índice, pelo que um leitor
+        nunca encontra no índice um registo incompleto.
+
+        :param record: Dicionário do registo.
+        """
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self.file.write(line)
+        self.file.flush()
+        self.index_file.write(INDEX_ENTRY.pack(self.offset))
+        self.index_file.flush()
+        self.offset += len(line)
+        self.count += 1
+
+    def export_json(self, json_path=None):
+        """
+        Exporta os registos escritos para o JSON indentado (formato results_<algoritmo>.json).
+
+        :param json_path: Caminho do ficheiro exportado (por omissão, ao lado do .jsonl).
+        :return: Caminho do ficheiro exportado.
+        """
+        if json_path is None:
+            json_path = os.path.join(self.output_dir, f"results_{self.algorithm_name}.json")
+        with ResultsReader(self.path) as reader:
+            reader.export_json(json_path)
+        return json_path
+
+    def close(self):
+        self.file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ResultsReader:
+    def __init__(self, path):
+        """
+        Abre um ficheiro de resultados JSON Lines para leitura por posição. Se o índice não
+        existir ou estiver incompleto, é reconstruído percorrendo o ficheiro uma vez.
+
+        :param path: Caminho para o ficheiro .jsonl.
+        """
+        self.path = path
+        self.index_path = index_path(path)
+        self.file = open(path, "rb")
+        if not os.path.exists(self.index_path) or os.path.getsize(self.index_path) % INDEX_ENTRY.size:
+            self.build_index()
+        self.index_file = open(self.index_path, "rb")
+
+    def build_index(self):
+        """
+        Reconstrói o índice a partir do ficheiro de dados.
+        """
+        offsets = array('Q')
+        offset = 0
+        self.file.seek(0)
+        for line in self.file:
+            if line.endswith(b"\n"):  # Uma última linha sem fim de linha ainda está a ser escrita
+                offsets.append(offset)
+            offset += len(line)
+        with open(self.index_path, "wb") as index_file:
+            index_file.write(b"".join(INDEX_ENTRY.pack(value) for value in offsets))
+
+    def __len__(self):
+        # Lido em cada chamada, para acompanhar uma simulação que ainda está a escrever
+        return os.fstat(self.index_file.fileno()).st_size // INDEX_ENTRY.size
+
+    def __getitem__(self, position):
+        """
+        Lê o registo numa posição (são aceites posições negativas).
+
+        :param position: Posição do registo.
+        :return: Dicionário do registo.
+        """
+        count = len(self)
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            raise IndexError("Posição de resultado fora do intervalo.")
+
+        self.index_file.seek(position * INDEX_ENTRY.size)
+        offset, = INDEX_ENTRY.unpack(self.index_file.read(INDEX_ENTRY.size))
+        self.file.seek(offset)
+        return json.loads(self.file.readline().decode("utf-8"))
+
+    def __iter__(self):
+        self.file.seek(0)
+        for _ in range(len(self)):
+            yield json.loads(self.file.readline().decode("utf-8"))
+
+    def export_json(self, json_path):
+        """
+        Exporta os registos para um JSON indentado, registo a registo (o resultado é igual ao de
+        json.dump da lista de registos com indent=4).
+
+        :param json_path: Caminho do ficheiro exportado.
+        """
+        with open(json_path, "w", encoding="utf-8") as file:
+            file.write("[")
+            for position, record in enumerate(self):
+                file.write(",\n    " if position else "\n    ")
+                file.write(json.dumps(record, ensure_ascii=False, indent=4).replace("\n", "\n    "))
+            file.write("\n]" if len(self) else "]")
+
+    def close(self):
+        self.file.close()
+        self.index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
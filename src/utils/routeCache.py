@@ -0,0 +1,55 @@
+# utils/routeCache.py
+
+class RouteCache:
+    def __init__(self):
+        """
+        Cache de rotas calculadas, indexada por (algoritmo, início, objetivo, versão do grafo).
+
+        Enquanto o grafo não muda, a mesma procura devolve sempre o mesmo resultado, pelo que as
+        simulações podem reutilizá-lo. Quando a versão do grafo muda (ver map.edgeUpdates), as
+        entradas das versões anteriores deixam de poder ser usadas e são descartadas.
+        """
+        self.routes = {}
+        self.version = None  # Versão do grafo das entradas guardadas
+        self.hits = 0
+        self.misses = 0
+
+    def search(self, algorithm_name, algorithm, start, goal, version):
+        """
+        Obtém o resultado de uma procura, consultando a cache antes de a executar.
+
+        :param algorithm_name: Nome do algoritmo (parte da chave).
+        :param algorithm: Instância do algoritmo (com o método search).
+        :param start: Nó inicial.
+        :param goal: Nó objetivo.
+        :param version: Versão atual do grafo.
+        :return: Resultado de algorithm.search(start, goal) (caminho, custo, veículos).
+        """
+        if version != self.version:
+            self.routes.clear()
+            self.version = version
+
+        key = (algorithm_name, start, goal, version)
+        result = self.routes.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = algorithm.search(start, goal)
+        self.routes[key] = result
+        return result
+
+    def stats(self):
+        """
+        Obtém as estatísticas de utilização da cache.
+
+        :return: Dicionário com os acertos, as falhas, a taxa de acerto e o número de entradas.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.routes)
+        }
@@ -0,0 +1,330 @@
+# utils/tracing.py
+
+from contextlib import nullcontext
+from functools import wraps
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Traçado das etapas de uma execução (carregamento do mapa, ordenação por urgência, planeamento de
+# cada zona, procuras, combinação de veículos, escrita dos resultados). Cada etapa é um span
+# (with span("nome"): ...); os spans abertos dentro de outro ficam aninhados nele. O traçado está
+# desligado por omissão: span devolve então um contexto vazio partilhado, sem medir nada.
+#
+# O traçado pode ser exportado no formato Chrome trace-event (JSON), que abre offline no Perfetto
+# (ui.perfetto.dev) ou em chrome://tracing, e resumido numa tabela por nome de span (chamadas,
+# tempo total, tempo próprio sem os spans filhos, média e máximo).
+#
+# No modo de memória (enable(memory=True)) cada span regista também, com o tracemalloc, o pico de
+# memória alocada durante o span (acima da memória no início) e a memória que ficou retida no fim;
+# nos spans indicados em snapshot_spans são comparados snapshots do início e do fim, com os locais
+# do código que mais memória alocaram durante o span e ainda a retêm. O tracemalloc torna a execução bem mais lenta: os tempos deste modo não servem
+# para comparar com execuções sem ele.
+
+NULL_SPAN = nullcontext()
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start", "children", "memory_start", "memory_peak", "start_snapshot")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+        self.children = 0  # Tempo (ns) passado em spans filhos
+        self.memory_start = 0  # Memória alocada no início (bytes, modo de memória)
+        self.memory_peak = 0  # Maior pico observado até ao último reset_peak (bytes)
+        self.start_snapshot = None  # Snapshot do tracemalloc no início (spans em snapshot_spans)
+
+    def __enter__(self):
+        tracer = self.tracer
+        if tracer.memory:
+            if self.name in tracer.snapshot_spans:
+                self.start_snapshot = tracer.take_snapshot()
+            # O pico do pai até aqui fica guardado antes de o reiniciar para este span
+            current, peak = tracemalloc.get_traced_memory()
+            if tracer.stack:
+                parent = tracer.stack[-1]
+                parent.memory_peak = max(parent.memory_peak, peak)
+            tracemalloc.reset_peak()
+            self.memory_start = self.memory_peak = current
+        tracer.stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        tracer = self.tracer
+        tracer.stack.pop()
+        memory = None
+        if tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(self.memory_peak, peak)
+            if tracer.stack:
+                parent = tracer.stack[-1]
+                parent.memory_peak = max(parent.memory_peak, peak)
+            memory = (peak - self.memory_start, current - self.memory_start, current)
+            if self.start_snapshot is not None:
+                tracer.snapshot(self)
+            tracemalloc.reset_peak()
+        tracer.record(self, end - self.start, memory)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        """
+        Recolhe os spans de uma execução (um único fio de execução: os processos de planeamento
+        em paralelo não são traçados).
+        """
+        self.enabled = False
+        self.memory = False  # Modo de memória (tracemalloc)
+        self.started_tracemalloc = False
+        self.snapshot_spans = ()
+        self.top_sites = 10
+        self.reset()
+
+    def enable(self, memory=False, snapshot_spans=(), top_sites=10):
+        """
+        Liga o traçado, descartando os spans recolhidos anteriormente.
+
+        :param memory: Se True, regista também o pico e a memória retida de cada span (tracemalloc).
+        :param snapshot_spans: Nomes dos spans em cujo fim é tirado um snapshot dos locais de alocação
+                               (modo de memória).
+        :param top_sites: Número de locais de alocação guardados por snapshot.
+        """
+        self.reset()
+        self.enabled = True
+        self.memory = memory
+        self.snapshot_spans = frozenset(snapshot_spans)
+        self.top_sites = top_sites
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def disable(self):
+        self.enabled = False
+        self.memory = False
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def reset(self):
+        self.events = []
+        self.totals = {}
+        self.memory_totals = {}  # Nome -> [pico máximo (bytes), soma da memória retida (bytes)]
+        self.snapshots = []
+        self.stack = []
+        self.origin = time.perf_counter_ns()
+
+    def span(self, name, **args):
+        """
+        Cria um span para usar num bloco with.
+
+        :param name: Nome da etapa (ex.: "Simulation.plan_zone"); o prefixo antes do primeiro
+                     ponto é usado como categoria.
+        :param args: Atributos do span (ex.: zone="Braga"), guardados no evento.
+        :return: Contexto do span (um contexto vazio se o traçado estiver desligado).
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def record(self, span, duration, memory=None):
+        """
+        Regista um span terminado e desconta a sua duração ao tempo próprio do span pai.
+
+        :param memory: Tuplo (pico, retida, alocada no fim) em bytes, no modo de memória.
+        """
+        if self.stack:
+            self.stack[-1].children += duration
+
+        args = {key: str(value) for key, value in span.args.items()}
+        if memory is not None:
+            peak, retained, current = memory
+            args["peak_kib"] = round(peak / 1024, 1)
+            args["retained_kib"] = round(retained / 1024, 1)
+            memory_total = self.memory_totals.get(span.name)
+            if memory_total is None:
+                memory_total = self.memory_totals[span.name] = [0, 0]
+            memory_total[0] = max(memory_total[0], peak)
+            memory_total[1] += retained
+
+            # Contador de memória alocada, mostrado como gráfico no Perfetto
+            self.events.append({
+                "name": "memory",
+                "ph": "C",
+                "ts": (span.start - self.origin + duration) / 1000,
+                "pid": os.getpid(),
+                "args": {"allocated_kib": round(current / 1024, 1)}
+            })
+
+        self.events.append({
+            "name": span.name,
+            "cat": span.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (span.start - self.origin) / 1000,  # Microssegundos
+            "dur": duration / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args
+        })
+
+        total = self.totals.get(span.name)
+        if total is None:
+            total = self.totals[span.name] = [0, 0, 0, 0]
+        total[0] += 1
+        total[1] += duration
+        total[2] += duration - span.children
+        total[3] = max(total[3], duration)
+
+    def export_chrome_trace(self, path):
+        """
+        Escreve os spans no formato Chrome trace-event.
+
+        :param path: Caminho do ficheiro JSON.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Por início e, com o mesmo início, o span pai (mais longo) antes dos filhos
+        events = sorted(self.events, key=lambda event: (event["ts"], -event.get("dur", 0)))
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file, ensure_ascii=False)
+
+    def summary(self):
+        """
+        Resume os spans por nome, por ordem decrescente de tempo total.
+
+        :return: Lista de dicionários (name, calls, total_s, self_s, mean_s, max_s e, no modo de
+                 memória, peak_kib (pico máximo) e retained_kib (memória retida média)).
+        """
+        rows = []
+        for name, (calls, total, own, longest) in self.totals.items():
+            row = {
+                "name": name,
+                "calls": calls,
+                "total_s": total / 1e9,
+                "self_s": own / 1e9,
+                "mean_s": total / calls / 1e9,
+                "max_s": longest / 1e9
+            }
+            if name in self.memory_totals:
+                peak, retained = self.memory_totals[name]
+                row["peak_kib"] = peak / 1024
+                row["retained_kib"] = retained / calls / 1024
+            rows.append(row)
+        rows.sort(key=lambda row: row["total_s"], reverse=True)
+        return rows
+
+    @staticmethod
+    def take_snapshot():
+        """
+        Tira um snapshot do tracemalloc sem as alocações do próprio traçador.
+        """
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ))
+
+    def snapshot(self, span):
+        """
+        Guarda os locais do código que mais memória alocaram durante um span e ainda a retêm no
+        fim (diferença para o snapshot do início do span).
+        """
+        differences = self.take_snapshot().compare_to(span.start_snapshot, "lineno")
+        span.start_snapshot = None
+        self.snapshots.append({
+            "span": span.name,
+            "args": {key: str(value) for key, value in span.args.items()},
+            "sites": [
+                {
+                    "site": f"{difference.traceback[0].filename}:{difference.traceback[0].lineno}",
+                    "size_kib": round(difference.size_diff / 1024, 1),
+                    "count": difference.count_diff
+                }
+                for difference in differences[:self.top_sites]
+                if difference.size_diff > 0
+            ]
+        })
+
+    def memory_report(self):
+        """
+        Obtém o relatório de memória: resumo dos spans (com pico e memória retida) e os snapshots.
+
+        :return: Dicionário serializável em JSON.
+        """
+        return {"spans": self.summary(), "snapshots": self.snapshots}
+
+    def export_memory_report(self, path):
+        """
+        Escreve o relatório de memória num ficheiro JSON.
+
+        :param path: Caminho do ficheiro.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.memory_report(), file, ensure_ascii=False, indent=4)
+
+    def print_summary(self):
+        """
+        Mostra a tabela resumo dos spans.
+        """
+        rows = self.summary()
+        if not rows:
+            print("Nenhum span registado.")
+            return
+
+        width = max(len("Etapa"), max(len(row["name"]) for row in rows))
+        header = f"{'Etapa':<{width}} {'Chamadas':>9} {'Total (s)':>11} {'Próprio (s)':>12} {'Média (ms)':>11} {'Máx. (ms)':>10}"
+        if self.memory_totals:
+            header += f" {'Pico (KiB)':>11} {'Retida (KiB)':>13}"
+        print(f"\n{header}")
+        print("=" * len(header))
+        for row in rows:
+            line = (f"{row['name']:<{width}} {row['calls']:>9} {row['total_s']:>11.4f} {row['self_s']:>12.4f} "
+                    f"{row['mean_s'] * 1000:>11.3f} {row['max_s'] * 1000:>10.3f}")
+            if "peak_kib" in row:
+                line += f" {row['peak_kib']:>11.1f} {row['retained_kib']:>13.1f}"
+            print(line)
+
+        for snapshot in self.snapshots:
+            details = ", ".join(f"{key}={value}" for key, value in snapshot["args"].items())
+            print(f"\nMemória alocada e retida por {snapshot['span']}" + (f" ({details})" if details else "") + ":")
+            for site in snapshot["sites"]:
+                print(f"  {site['size_kib']:>10.1f} KiB {site['count']:>8} blocos  {site['site']}")
+
+
+# Traçador partilhado por todos os módulos
+tracer = Tracer()
+
+def span(name, **args):
+    """
+    Cria um span no traçador partilhado (ver Tracer.span).
+    """
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, args)
+
+def traced(name=None):
+    """
+    Decorador que envolve cada chamada de uma função num span do traçador partilhado.
+
+    :param name: Nome do span (por omissão, o nome qualificado da função, ex.: "Simulation.start").
+    """
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,92 @@
+# utils/travelTimes.py
+
+from models import Truck, Car, Helicopter
+
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+# Impacto das condições meteorológicas na velocidade dos veículos
+WEATHER_IMPACT = {
+    "Sol": 1.0,
+    "Chuva": 0.85,
+    "Nevoeiro": 0.7,
+    "Neve/Gelo": 0.5
+}
+
+VEHICLE_CLASSES = {
+    'truck': Truck,
+    'car': Car,
+    'helicopter': Helicopter
+}
+
+# Tabelas já construídas, por grafo (descartadas quando o grafo deixa de existir)
+_tables = WeakKeyDictionary()
+
+class TravelTimeTable:
+    def __init__(self, graph):
+        """
+        Tabela de tempos de viagem por (estrada, tipo de veículo), calculada uma única vez por grafo.
+
+        Os multiplicadores meteorológicos, as velocidades ajustadas e os tempos de viagem de todas
+        as estradas são calculados de forma vetorizada (NumPy) e guardados em listas, indexadas pelo
+        índice da estrada, para consultas rápidas ao escrever os resultados.
+
+        :param graph: Grafo representando o mapa.
+        """
+        self.version = graph.graph.get("version", 0)
+        self.edge_index = {}
+        distances = []
+        weather = []
+        for position, (u, v, edge_data) in enumerate(graph.edges(data=True)):
+            self.edge_index[(u, v)] = position
+            self.edge_index[(v, u)] = position
+            distances.append(edge_data.get('weight', float('inf')))
+            weather.append(edge_data.get('weather', "Sol"))
+
+        unknown = set(weather) - set(WEATHER_IMPACT)
+        if unknown:
+            raise ValueError(f"Condições meteorológicas desconhecidas: {', '.join(sorted(unknown))}.")
+
+        # Multiplicador de cada estrada a partir do código da sua condição meteorológica
+        weather_codes = {condition: code for code, condition in enumerate(WEATHER_IMPACT)}
+        multipliers = np.array(list(WEATHER_IMPACT.values()), dtype=np.float64)[
+            np.array([weather_codes[condition] for condition in weather], dtype=np.int64)
+        ]
+        distance_array = np.array(distances, dtype=np.float64)
+
+        # Uma linha por tipo de veículo, uma coluna por estrada
+        self.vehicle_types = list(VEHICLE_CLASSES)
+        self.vehicles = {vehicle_type: VEHICLE_CLASSES[vehicle_type](vehicle_type) for vehicle_type in self.vehicle_types}
+        speeds = np.array([self.vehicles[vehicle_type].speed for vehicle_type in self.vehicle_types], dtype=np.float64)
+        adjusted_speeds = speeds[:, None] * multipliers[None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            travel_hours = distance_array[None, :] / adjusted_speeds
+
+        self.distances = distances
+        self.weather = weather
+        self.adjusted_speeds = dict(zip(self.vehicle_types, adjusted_speeds.tolist()))
+        self.travel_hours = dict(zip(self.vehicle_types, travel_hours.tolist()))
+
+    @classmethod
+    def for_graph(cls, graph):
+        """
+        Obtém a tabela de um grafo, construindo-a na primeira utilização ou quando as estradas
+        do grafo mudaram (versão do grafo).
+
+        :param graph: Grafo representando o mapa.
+        :return: Instância de TravelTimeTable.
+        """
+        table = _tables.get(graph)
+        if table is None or table.version != graph.graph.get("version", 0):
+            table = cls(graph)
+            _tables[graph] = table
+        return table
+
+    def edge(self, u, v):
+        """
+        Obtém o índice de uma estrada.
+
+        :return: Índice da estrada ou None se não existir.
+        """
+        return self.edge_index.get((u, v))
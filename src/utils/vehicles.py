@@ -1,44 +1,206 @@
 # utils/vehicles.py
 
-from itertools import combinations_with_replacement
+from collections import deque
+from functools import lru_cache
+from math import gcd, ceil
 
+from utils.tracing import traced
+
+def fleet_signature(vehicles):
+    """
+    Calcula a assinatura de uma frota (tipos de veículos e capacidades), sem repetições.
+
+    :param vehicles: Lista de veículos disponíveis na zona de suporte.
+    :return: Tuplo de pares (id, capacidade) pela ordem em que aparecem na frota.
+    """
+    signature = []
+    seen = set()
+    for vehicle in vehicles:
+        key = (vehicle.id, int(vehicle.capacity))
+        if key not in seen:
+            seen.add(key)
+            signature.append(key)
+    return tuple(signature)
+
+@lru_cache(maxsize=4096)
+def _solve_vehicle_combination(population, signature):
+    """
+    Resolve o problema da mochila ilimitada (troco de moedas) sobre as capacidades da frota.
+
+    As capacidades são reduzidas pelo seu máximo divisor comum, pelo que o tempo de execução é
+    proporcional a procura / granularidade das capacidades e não ao número de combinações.
+
+    :param population: Mantimentos necessários.
+    :param signature: Assinatura da frota (ver fleet_signature).
+    :return: Tuplo de pares (id, quantidade) da melhor combinação.
+    """
+    capacities = [capacity for _, capacity in signature if capacity > 0]
+    if not capacities:
+        return ()
+
+    granularity = 0
+    for capacity in capacities:
+        granularity = gcd(granularity, capacity)
+
+    units = [capacity // granularity if capacity > 0 else 0 for _, capacity in signature]
+    smallest_unit = min(unit for unit in units if unit > 0)
+
+    # Menor capacidade total (em unidades) que cobre a procura, com pelo menos um veículo
+    target = max(ceil(population / granularity), 1)
+
+    # Usando apenas o veículo mais pequeno atinge-se um total em [target, target + smallest_unit - 1]
+    limit = target + smallest_unit - 1
+
+    # min_count[t] = menor número de veículos com capacidade total exatamente t
+    infinity = float('inf')
+    min_count = [infinity] * (limit + 1)
+    min_count[0] = 0
+    for total in range(1, limit + 1):
+        best = infinity
+        for unit in units:
+            if 0 < unit <= total and min_count[total - unit] + 1 < best:
+                best = min_count[total - unit] + 1
+        min_count[total] = best
+
+    # Menor excesso de capacidade primeiro; o número de veículos é o mínimo para esse total
+    best_total = next(total for total in range(target, limit + 1) if min_count[total] != infinity)
+
+    # Reconstruir a combinação, dando preferência aos veículos que aparecem primeiro na frota
+    quantities = [0] * len(signature)
+    total = best_total
+    while total > 0:
+        for index, unit in enumerate(units):
+            if 0 < unit <= total and min_count[total - unit] == min_count[total] - 1:
+                quantities[index] += 1
+                total -= unit
+                break
+
+    return tuple(
+        (vehicle_id, quantity)
+        for (vehicle_id, _), quantity in zip(signature, quantities)
+        if quantity > 0
+    )
+
+@traced()
 def calculate_vehicle_combination(population, vehicles):
     """
     Calcula a combinação mais eficiente de veículos para transportar a quantidade necessária de mantimentos.
 
+    Prioriza a combinação com menor excesso de capacidade e, em caso de empate, a que usa menos veículos.
+    Os resultados são memorizados por (população, assinatura da frota).
+
     :param population: População da zona de ajuda (mantimentos necessários).
     :param vehicles: Lista de veículos disponíveis na zona de suporte.
     :return: Lista de veículos otimizados (tipo e quantidade).
     """
-    best_combination = None
-    min_excess_capacity = float('inf')
-    min_vehicle_count = float('inf')
-
-    # Gerar todas as combinações possíveis de veículos (com repetição)
-    for r in range(1, len(vehicles) * 10):  # Multiplicador para permitir mais combinações
-        for combo in combinations_with_replacement(vehicles, r):
-            total_capacity = sum(vehicle.capacity for vehicle in combo)
-
-            # Verificar se a capacidade atende à necessidade
-            if total_capacity >= population:
-                excess_capacity = total_capacity - population
-                vehicle_count = len(combo)
-
-                # Priorizar combinações com menor excesso e menor número de veículos
-                if excess_capacity < min_excess_capacity or (
-                    excess_capacity == min_excess_capacity and vehicle_count < min_vehicle_count
-                ):
-                    min_excess_capacity = excess_capacity
-                    min_vehicle_count = vehicle_count
-                    best_combination = combo
-
-    # Contar os veículos usados na melhor combinação
-    vehicle_count = {}
-    if best_combination:
-        for vehicle in best_combination:
-            if vehicle.id in vehicle_count:
-                vehicle_count[vehicle.id]['quantity'] += 1
-            else:
-                vehicle_count[vehicle.id] = {'id': vehicle.id, 'quantity': 1}
-
-    return list(vehicle_count.values())
+    if not vehicles:
+        return []
+
+    combination = _solve_vehicle_combination(population, fleet_signature(vehicles))
+    return [{'id': vehicle_id, 'quantity': quantity} for vehicle_id, quantity in combination]
+
+@lru_cache(maxsize=4096)
+def _solve_bounded_vehicle_combination(population, signature, counts):
+    """
+    Resolve o problema da mochila limitada sobre as capacidades da frota, respeitando o número
+    de unidades disponíveis de cada tipo de veículo.
+
+    :param population: Mantimentos necessários.
+    :param signature: Assinatura da frota (ver fleet_signature).
+    :param counts: Tuplo com o número de unidades disponíveis de cada tipo, alinhado com a assinatura.
+    :return: Tuplo (pares (id, quantidade) da melhor combinação, capacidade total da combinação).
+    """
+    types = [
+        (vehicle_id, capacity, count)
+        for (vehicle_id, capacity), count in zip(signature, counts)
+        if capacity > 0 and count > 0
+    ]
+    if not types:
+        return (), 0
+
+    granularity = 0
+    for _, capacity, _ in types:
+        granularity = gcd(granularity, capacity)
+
+    units = [capacity // granularity for _, capacity, _ in types]
+    available_units = sum(unit * count for unit, (_, _, count) in zip(units, types))
+    target = max(ceil(population / granularity), 1)
+
+    # Frota insuficiente: o melhor plano (parcial) usa todos os veículos disponíveis
+    if available_units < target:
+        combination = tuple((vehicle_id, count) for vehicle_id, _, count in types)
+        return combination, available_units * granularity
+
+    # Removendo veículos um a um a partir da frota completa chega-se sempre a um total
+    # em [target, target + maior unidade - 1]
+    limit = min(available_units, target + max(units) - 1)
+
+    # suffix[i][t] = menor número de veículos dos tipos i..n-1 com capacidade total exatamente t
+    infinity = float('inf')
+    suffix = [None] * (len(types) + 1)
+    suffix[len(types)] = [0] + [infinity] * limit
+    for index in range(len(types) - 1, -1, -1):
+        unit = units[index]
+        count = types[index][2]
+        previous = suffix[index + 1]
+        current = [infinity] * (limit + 1)
+
+        # Mínimo em janela deslizante por classe de resíduo: current[r + j*u] = min_{j-count <= m <= j} previous[r + m*u] + (j - m)
+        for residue in range(min(unit, limit + 1)):
+            window = deque()  # (m, previous[r + m*u] - m)
+            for j, total in enumerate(range(residue, limit + 1, unit)):
+                value = previous[total] - j
+                while window and window[-1][1] >= value:
+                    window.pop()
+                window.append((j, value))
+                if window[0][0] < j - count:
+                    window.popleft()
+                current[total] = window[0][1] + j
+        suffix[index] = current
+
+    best_total = next((total for total in range(target, limit + 1) if suffix[0][total] != infinity), None)
+    if best_total is None:
+        return (), 0
+
+    # Reconstruir a combinação, usando o máximo possível dos veículos que aparecem primeiro
+    combination = []
+    total = best_total
+    for index, (vehicle_id, _, count) in enumerate(types):
+        unit = units[index]
+        for quantity in range(min(count, total // unit), -1, -1):
+            if suffix[index + 1][total - quantity * unit] + quantity == suffix[index][total]:
+                break
+        if quantity > 0:
+            combination.append((vehicle_id, quantity))
+        total -= quantity * unit
+
+    return tuple(combination), best_total * granularity
+
+@traced()
+def calculate_bounded_vehicle_combination(population, vehicles, available, allow_partial=False):
+    """
+    Calcula a combinação mais eficiente de veículos limitada ao stock atual da zona de suporte.
+
+    Usa o mesmo critério de calculate_vehicle_combination (menor excesso de capacidade e depois
+    menos veículos), mas nunca usa mais unidades de um tipo do que as disponíveis.
+
+    :param population: População da zona de ajuda (mantimentos necessários).
+    :param vehicles: Lista de veículos da zona de suporte (define os tipos e as capacidades).
+    :param available: Dicionário {id do tipo de veículo: unidades disponíveis}.
+    :param allow_partial: Se True e o stock não cobrir a procura, devolve um plano de entrega parcial
+                          com todos os veículos disponíveis.
+    :return: Tuplo (lista de veículos otimizados (tipo e quantidade), mantimentos cobertos pelo plano).
+             A lista é vazia se não houver plano viável.
+    """
+    if not vehicles:
+        return [], 0
+
+    signature = fleet_signature(vehicles)
+    counts = tuple(max(0, int(available.get(vehicle_id, 0))) for vehicle_id, _ in signature)
+
+    combination, capacity = _solve_bounded_vehicle_combination(population, signature, counts)
+    covered = min(capacity, max(population, 0))
+    if capacity < population and not allow_partial:
+        return [], 0
+
+    return [{'id': vehicle_id, 'quantity': quantity} for vehicle_id, quantity in combination], covered
@@ -1,125 +1,198 @@
 # utils/writeToJson.py
 
-from models import Truck, Car, Helicopter
+from utils.travelTimes import TravelTimeTable
+from utils.resultsSink import ResultsSink
+from utils.tracing import traced
 
 from datetime import datetime, timedelta
 import os
 import json
 import math
 
-def writeToJson(best_paths, graph, algorithm_name, type):
+def results_dir(output_dir, type):
     """
-    Escreve os resultados dos melhores caminhos num ficheiro JSON com base no algoritmo escolhido.
+    Obtém a pasta dos resultados de um tipo de simulação.
 
-    :param best_paths: Dicionário contendo os melhores caminhos calculados.
-    :param graph: Grafo representando o mapa.
-    :param algorithm_name: Nome do algoritmo utilizado.
+    :param output_dir: Pasta base dos resultados.
     :param type: Define o tipo de simulação. 0 para normalSim, 1 para limitSim.
+    :return: Caminho da pasta.
     """
-    results = []
-
-    for end_node, path_data in best_paths.items():
-        start_node = path_data['path'][0]
-        path = path_data['path']
-        population = graph.nodes[end_node].get('population', 0)
-        unTruncDistance = path_data['cost']
-        distance = math.trunc(unTruncDistance * 100) / 100
-        vehicles = path_data.get('vehicles', [])
-        critical_time = graph.nodes[end_node].get('critical_time', "N/A")
-
-        vehicle_details = []
-        arrival_times = []
-
-        for vehicle_data in vehicles:
-            vehicle_type = vehicle_data['id']
-            quantity = vehicle_data['quantity']
-
-            # Obter atributos do veículo
-            if vehicle_type == 'truck':
-                vehicle = Truck(vehicle_type)
-            elif vehicle_type == 'car':
-                vehicle = Car(vehicle_type)
-            elif vehicle_type == 'helicopter':
-                vehicle = Helicopter(vehicle_type)
-            else:
-                continue
-
-            refuels = []
-            current_range = vehicle.range
-            travel_details = []
-
-            for i in range(len(path) - 1):
-                current_node = path[i]
-                next_node = path[i + 1]
-
-                edge_data = graph.get_edge_data(current_node, next_node, default={})
-                edge_distance = edge_data.get('weight', float('inf'))
-                weather = edge_data.get('weather', "Sol")
-                weather_impact = {
-                    "Sol": 1.0,
-                    "Chuva": 0.85,
-                    "Nevoeiro": 0.7,
-                    "Neve/Gelo": 0.5
-                }
-
-                adjusted_speed = vehicle.speed * weather_impact[weather]
-                travel_time = edge_distance / adjusted_speed
+    return os.path.join(output_dir, "normalSim" if type == 0 else "limitSim")
+
+def build_delivery(path_data, travel_times, departure_time):
+    """
+    Calcula os detalhes de uma entrega: os veículos percorrem todos o mesmo caminho.
 
-                travel_details.append({
-                    'from': current_node,
-                    'to': next_node,
-                    'weather': weather,
-                    'distance': edge_distance,
-                    'adjusted_speed': round(adjusted_speed, 2),
-                    'travel_time_hours': round(travel_time, 2)
-                })
-
-                if current_range < edge_distance:
-                    refuels.append(current_node)
-                    current_range = vehicle.range
-
-                current_range -= edge_distance
-
-            travel_time_total = sum(detail['travel_time_hours'] for detail in travel_details)
-            arrival_time = datetime.now() + timedelta(hours=travel_time_total)
-            arrival_times.append(arrival_time)
-
-            vehicle_details.append({
-                'type': vehicle_type,
-                'quantity': quantity,
-                'refuels': refuels,
-                'travel_details': travel_details,
-                'total_travel_time': round(travel_time_total, 2),
-                'arrival_time': arrival_time.strftime("%Y-%m-%d %H:%M:%S")
+    :param path_data: Dicionário com o caminho, o custo e os veículos usados na entrega.
+    :param travel_times: TravelTimeTable do grafo.
+    :param departure_time: Data/hora de partida dos veículos.
+    :return: Tuplo (detalhes dos veículos, data/hora de chegada do último veículo ou None).
+    """
+    path = path_data['path']
+    vehicles = path_data.get('vehicles', [])
+
+    vehicle_details = []
+    arrival_times = []
+
+    for vehicle_data in vehicles:
+        vehicle_type = vehicle_data['id']
+        quantity = vehicle_data['quantity']
+
+        # Obter atributos do veículo
+        if vehicle_type not in travel_times.vehicles:
+            continue
+        vehicle = travel_times.vehicles[vehicle_type]
+        adjusted_speeds = travel_times.adjusted_speeds[vehicle_type]
+        travel_hours = travel_times.travel_hours[vehicle_type]
+
+        refuels = []
+        current_range = vehicle.range
+        travel_details = []
+
+        for i in range(len(path) - 1):
+            current_node = path[i]
+            next_node = path[i + 1]
+
+            edge = travel_times.edge(current_node, next_node)
+            if edge is None:
+                edge_distance, weather = float('inf'), "Sol"
+                adjusted_speed = vehicle.speed
+                travel_time = edge_distance / adjusted_speed
+            else:
+                edge_distance, weather = travel_times.distances[edge], travel_times.weather[edge]
+                adjusted_speed = adjusted_speeds[edge]
+                travel_time = travel_hours[edge]
+
+            travel_details.append({
+                'from': current_node,
+                'to': next_node,
+                'weather': weather,
+                'distance': edge_distance,
+                'adjusted_speed': round(adjusted_speed, 2),
+                'travel_time_hours': round(travel_time, 2)
             })
 
-        # Determinar o tempo final de chegada (o maior tempo entre os veículos)
-        final_arrival_time = max(arrival_times) if arrival_times else None
+            if current_range < edge_distance:
+                refuels.append(current_node)
+                current_range = vehicle.range
+
+            current_range -= edge_distance
+
+        travel_time_total = sum(detail['travel_time_hours'] for detail in travel_details)
+        arrival_time = departure_time + timedelta(hours=travel_time_total)
+        arrival_times.append(arrival_time)
+
+        vehicle_details.append({
+            'type': vehicle_type,
+            'quantity': quantity,
+            'refuels': refuels,
+            'travel_details': travel_details,
+            'total_travel_time': round(travel_time_total, 2),
+            'arrival_time': arrival_time.strftime("%Y-%m-%d %H:%M:%S")
+        })
 
-        # Converter o caminho para o formato "A -> B -> C"
-        formatted_path = " -> ".join(path)
+    # Determinar o tempo final de chegada (o maior tempo entre os veículos)
+    return vehicle_details, max(arrival_times) if arrival_times else None
 
-        # Adicionar os resultados
-        results.append({
-            'start_node': start_node,
-            'end_node': end_node,
-            'population': population,
-            'distance': distance,
-            'best_path': formatted_path,
+def build_result(end_node, path_data, graph, travel_times, reference_time):
+    """
+    Constrói o registo de resultado de uma zona normal. Uma zona servida em várias entregas
+    (lista 'deliveries', cada uma com o seu caminho, veículos e data/hora de partida) junta os
+    veículos de todas as entregas, cada um com o percurso da sua entrega; o caminho e a distância
+    do registo são os da primeira entrega e o resumo de cada entrega fica em 'deliveries'.
+
+    :param end_node: Zona normal.
+    :param path_data: Dicionário com o caminho, o custo e os veículos usados (e, opcionalmente,
+                      a data/hora de partida e a lista de entregas).
+    :param graph: Grafo representando o mapa.
+    :param travel_times: TravelTimeTable do grafo.
+    :param reference_time: Relógio de referência da simulação (partida das entregas sem data/hora própria).
+    :return: Dicionário do registo.
+    """
+    population = graph.nodes[end_node].get('population', 0)
+    critical_time = graph.nodes[end_node].get('critical_time', "N/A")
+
+    deliveries = []
+    for delivery in path_data.get('deliveries', [path_data]):
+        departure_time = delivery.get('departure_time', reference_time)
+        vehicle_details, final_arrival_time = build_delivery(delivery, travel_times, departure_time)
+        deliveries.append({
+            'start_node': delivery['path'][0],
+            # Converter o caminho para o formato "A -> B -> C"
+            'best_path': " -> ".join(delivery['path']),
+            'distance': math.trunc(delivery['cost'] * 100) / 100,
+            'departure_time': departure_time,
             'vehicles': vehicle_details,
-            'critical_time': critical_time,
-            'final_arrival_time': final_arrival_time.strftime("%Y-%m-%d %H:%M:%S") if final_arrival_time else "N/A"
+            'final_arrival_time': final_arrival_time
         })
 
-    # Determinar o diretório de saída
-    output_dir = "results/normalSim" if type == 0 else "results/limitSim"
-    os.makedirs(output_dir, exist_ok=True)
+    arrival_times = [delivery['final_arrival_time'] for delivery in deliveries if delivery['final_arrival_time']]
+    final_arrival_time = max(arrival_times) if arrival_times else None
+
+    result = {
+        'start_node': deliveries[0]['start_node'],
+        'end_node': end_node,
+        'population': population,
+        'distance': deliveries[0]['distance'],
+        'best_path': deliveries[0]['best_path'],
+        'vehicles': [vehicle for delivery in deliveries for vehicle in delivery['vehicles']],
+        'critical_time': critical_time,
+        'final_arrival_time': final_arrival_time.strftime("%Y-%m-%d %H:%M:%S") if final_arrival_time else "N/A"
+    }
+
+    if len(deliveries) > 1:
+        result['deliveries'] = [{
+            'start_node': delivery['start_node'],
+            'best_path': delivery['best_path'],
+            'distance': delivery['distance'],
+            'departure_time': delivery['departure_time'].strftime("%Y-%m-%d %H:%M:%S"),
+            'final_arrival_time': (
+                delivery['final_arrival_time'].strftime("%Y-%m-%d %H:%M:%S") if delivery['final_arrival_time'] else "N/A"
+            )
+        } for delivery in deliveries]
+
+    return result
+
+@traced()
+def finish_results(sink, stats=None):
+    """
+    Termina a escrita dos resultados: exporta o JSON indentado e escreve as estatísticas.
+
+    :param sink: ResultsSink com os registos escritos.
+    :param stats: Estatísticas da simulação, escritas em stats_<algoritmo>.json; None para não escrever.
+    """
+    file_name = sink.export_json()
+    print(f"Resultados escritos no ficheiro '{file_name}'.")
+
+    if stats is not None:
+        stats_file_name = os.path.join(sink.output_dir, f"stats_{sink.algorithm_name}.json")
+        with open(stats_file_name, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, ensure_ascii=False, indent=4)
+        print(f"Estatísticas escritas no ficheiro '{stats_file_name}'.")
 
-    # Determinar o nome do ficheiro com base no algoritmo
-    file_name = os.path.join(output_dir, f"results_{algorithm_name.lower()}.json")
+@traced()
+def writeToJson(best_paths, graph, algorithm_name, type, output_dir="results", stats=None, reference_time=None):
+    """
+    Escreve os resultados dos melhores caminhos com base no algoritmo escolhido: em streaming
+    (results_<algoritmo>.jsonl e índice .idx) e exportados para o JSON indentado (results_<algoritmo>.json).
+
+    :param best_paths: Dicionário contendo os melhores caminhos calculados.
+    :param graph: Grafo representando o mapa.
+    :param algorithm_name: Nome do algoritmo utilizado.
+    :param type: Define o tipo de simulação. 0 para normalSim, 1 para limitSim.
+    :param output_dir: Pasta base dos resultados.
+    :param stats: Estatísticas da simulação (ex.: cache de rotas), escritas em stats_<algoritmo>.json
+                  ao lado dos resultados; None para não escrever.
+    :param reference_time: Relógio de referência da simulação (data/hora de partida dos veículos);
+                           por omissão, a data/hora atual, obtida uma única vez.
+    """
+    if reference_time is None:
+        reference_time = datetime.now()
 
-    # Escrever no ficheiro JSON
-    with open(file_name, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=4)
+    # Tempos de viagem por (estrada, tipo de veículo), calculados uma única vez por grafo
+    travel_times = TravelTimeTable.for_graph(graph)
 
-    print(f"Resultados escritos no ficheiro '{file_name}'.")
\ No newline at end of file
+    with ResultsSink(results_dir(output_dir, type), algorithm_name) as sink:
+        for end_node, path_data in best_paths.items():
+            sink.write(build_result(end_node, path_data, graph, travel_times, reference_time))
+        finish_results(sink, stats)